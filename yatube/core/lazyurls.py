@@ -0,0 +1,68 @@
+from importlib import import_module
+
+from django.conf import settings
+from django.urls import URLResolver, include, path
+from django.urls.resolvers import RoutePattern
+from django.utils.functional import cached_property
+
+
+class LazyURLconf:
+    """URLconf, который импортируется при первом обращении к нему.
+
+    urlconf — путь к модулю или функция, возвращающая маршруты.
+    """
+
+    def __init__(self, urlconf):
+        self.urlconf = urlconf
+
+    def __repr__(self):
+        return f'<LazyURLconf: {self.urlconf!r}>'
+
+    @property
+    def loaded(self):
+        return 'urlpatterns' in self.__dict__
+
+    @cached_property
+    def urlpatterns(self):
+        if callable(self.urlconf):
+            return self.urlconf()
+        return import_module(self.urlconf).urlpatterns
+
+
+class LazyURLResolver(URLResolver):
+    """Раздел, маршруты которого загружаются при первом запросе к нему.
+
+    Корневой резолвер при первом reverse() заполняет все вложенные.
+    Разделу с namespace это не нужно: его адреса ищутся через
+    namespace, и тогда же, как и при разборе пути запроса под его
+    префиксом, маршруты загружаются.
+    """
+
+    def _populate(self):
+        if self.app_name is None or self.urlconf_module.loaded:
+            super()._populate()
+
+
+def admin_urls():
+    """Маршруты админки; модули admin.py приложений ищутся здесь же."""
+    from django.contrib import admin
+
+    admin.autodiscover()
+    patterns, _, _ = admin.site.urls
+    return patterns
+
+
+def section(route, urlconf, namespace=None):
+    """path() для раздела сайта, который нужен не каждому запросу.
+
+    С LAZY_URLCONFS раздел загружается при первом обращении, а не при
+    старте процесса; app_name тогда берётся равным namespace.
+    """
+    if settings.LAZY_URLCONFS:
+        return LazyURLResolver(
+            RoutePattern(route, is_endpoint=False), LazyURLconf(urlconf),
+            app_name=namespace, namespace=namespace
+        )
+    if callable(urlconf):
+        return path(route, (urlconf(), namespace, namespace))
+    return path(route, include(urlconf, namespace=namespace))
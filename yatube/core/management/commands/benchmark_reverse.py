@@ -0,0 +1,94 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from core.urlcache import clear_url_cache, cached_reverse
+
+SEED = 42
+# Меню авторизованного пользователя в includes/header.html.
+NAV_ROUTES = (
+    'posts:index', 'about:author', 'about:tech', 'posts:search',
+    'posts:follow_index', 'posts:post_create', 'users:password_change',
+    'users:logout',
+)
+POSTS_PER_PAGE = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает reverse() и core.urlcache на адресах одной страницы '
+        'ленты: меню и по три ссылки на каждый пост. Результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=2000)
+        parser.add_argument('--posts', type=int, default=500)
+        parser.add_argument('--authors', type=int, default=50)
+        parser.add_argument('--groups', type=int, default=10)
+
+    def handle(self, *args, **options):
+        pages = self.make_pages(options)
+        clear_url_cache()
+        results = {
+            'reverse': self.measure(self.plain, pages),
+            # Первый проход заполняет кэш, второй читает из него.
+            'cached_cold': self.measure(self.cached, pages),
+            'cached_warm': self.measure(self.cached, pages),
+        }
+        results['saved_per_page_us'] = round(
+            results['reverse']['per_page_us']
+            - results['cached_warm']['per_page_us'], 1
+        )
+        results['speedup'] = round(
+            results['reverse']['per_page_us']
+            / results['cached_warm']['per_page_us'], 1
+        )
+        results['meta'] = {
+            key: options[key]
+            for key in ('pages', 'posts', 'authors', 'groups')
+        }
+        results['meta']['urls_per_page'] = len(pages[0])
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def make_pages(self, options):
+        """Списки (имя маршрута, аргументы) для каждой страницы."""
+        rng = random.Random(SEED)
+        pages = []
+        for _ in range(options['pages']):
+            urls = [(name, ()) for name in NAV_ROUTES]
+            for _ in range(POSTS_PER_PAGE):
+                urls.append((
+                    'posts:profile',
+                    (f'author{rng.randrange(options["authors"])}',)
+                ))
+                urls.append((
+                    'posts:post_detail', (rng.randrange(options['posts']),)
+                ))
+                urls.append((
+                    'posts:group_list',
+                    (f'group-{rng.randrange(options["groups"])}',)
+                ))
+            pages.append(urls)
+        return pages
+
+    def plain(self, viewname, args):
+        return reverse(viewname, args=args)
+
+    def cached(self, viewname, args):
+        return cached_reverse(viewname, *args)
+
+    def measure(self, build, pages):
+        started = time.perf_counter()
+        for urls in pages:
+            for name, args in urls:
+                build(name, args)
+        elapsed = time.perf_counter() - started
+        return {
+            'per_page_us': round(elapsed / len(pages) * 10 ** 6, 1),
+            'per_url_us': round(
+                elapsed / sum(map(len, pages)) * 10 ** 6, 2
+            ),
+        }
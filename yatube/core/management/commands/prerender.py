@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.prerender import pages, shared_cache, static_pages
+
+
+class Command(BaseCommand):
+    help = (
+        'Рендерит статические страницы (PrerenderedTemplateView) '
+        'и кладёт их в общий кэш страниц, чтобы воркеры после '
+        'выкладки не рендерили их сами'
+    )
+
+    def handle(self, *args, **options):
+        if not shared_cache():
+            raise CommandError(
+                f'Кэш {settings.POSTS_PAGE_CACHE} живёт в памяти процесса: '
+                'воркеры не увидят страницы. Нужен YATUBE_CACHE=file '
+                'или memcached'
+            )
+        for path, template_name in static_pages():
+            page = pages.render(path, template_name)
+            sizes = ', '.join(
+                f'{encoding or "identity"} {len(body)} Б'
+                for encoding, body in page.bodies.items()
+            )
+            self.stdout.write(f'{path}: {sizes}, ETag {page.etag}')
@@ -0,0 +1,73 @@
+import multiprocessing
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from core.tasks import Worker, release_stale
+
+
+def work(stop, batch_size, once, poll_interval):
+    try:
+        Worker(batch_size).run(stop, once, poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        'Запускает воркеры фоновых задач: пул потоков или процессов. '
+        'С --once выполняет всё, что есть в очереди, и завершается'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.TASKS_WORKERS
+        )
+        parser.add_argument(
+            '--processes', action='store_true',
+            help='Запускать воркеры процессами, а не потоками'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.TASKS_BATCH_SIZE
+        )
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true')
+
+    def handle(self, *args, **options):
+        release_stale()
+        # Открытое соединение нельзя делить с дочерними процессами.
+        connections.close_all()
+        if options['processes']:
+            context = multiprocessing.get_context('fork')
+            stop = context.Event()
+            starter = context.Process
+        else:
+            stop = threading.Event()
+            starter = threading.Thread
+        workers = [
+            starter(
+                target=work,
+                args=(
+                    stop, options['batch_size'], options['once'],
+                    options['poll_interval']
+                ),
+                name=f'worker-{number}',
+            )
+            for number in range(options['workers'])
+        ]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(
+            f'Запущено воркеров: {len(workers)}'
+            f' ({"процессы" if options["processes"] else "потоки"})'
+        )
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for worker in workers:
+                worker.join()
+        self.stdout.write(self.style.SUCCESS('Воркеры остановлены'))
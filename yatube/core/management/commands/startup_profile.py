@@ -0,0 +1,144 @@
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( +)(\S+)$')
+PHASES = (
+    ('settings', 'настройки'),
+    ('setup', 'django.setup()'),
+    ('middleware', 'middleware'),
+    ('urlconf', 'URLconf'),
+    ('first_reverse', 'первый reverse()'),
+)
+
+
+class ImportNode:
+    __slots__ = ('name', 'self_us', 'cumulative_us', 'children')
+
+    def __init__(self, name, self_us, cumulative_us, children):
+        self.name = name
+        self.self_us = self_us
+        self.cumulative_us = cumulative_us
+        self.children = children
+
+    def as_dict(self, min_us):
+        return {
+            'name': self.name,
+            'self_ms': round(self.self_us / 1000, 2),
+            'cumulative_ms': round(self.cumulative_us / 1000, 2),
+            'children': [
+                child.as_dict(min_us) for child in self.children
+                if child.cumulative_us >= min_us
+            ],
+        }
+
+
+def parse_importtime(lines):
+    """Дерево импортов из вывода python -X importtime.
+
+    Модуль печатается после всех своих зависимостей, с отступом
+    в два пробела на уровень вложенности.
+    """
+    pending = defaultdict(list)
+    for line in lines:
+        match = IMPORT_RE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        level = (len(indent) - 1) // 2
+        pending[level].append(ImportNode(
+            name, int(self_us), int(cumulative_us),
+            pending.pop(level + 1, [])
+        ))
+    return pending[0]
+
+
+def milliseconds(seconds):
+    return round(seconds * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет холодный старт в отдельном процессе: время импорта '
+        'модулей деревом, как python -X importtime, импорт моделей '
+        'и ready() каждого приложения, загрузку URLconf'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-ms', type=float, default=5,
+            help='Не показывать импорты дешевле этого'
+        )
+        parser.add_argument('--depth', type=int, default=3)
+        parser.add_argument(
+            '--urlconfs', choices=('lazy', 'eager'),
+            help='Режим LAZY_URLCONFS; по умолчанию — из настроек'
+        )
+        parser.add_argument('--json', action='store_true')
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        if options['urlconfs']:
+            env['YATUBE_LAZY_URLCONFS'] = (
+                '1' if options['urlconfs'] == 'lazy' else '0'
+            )
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-m', 'core.startup'],
+            cwd=settings.BASE_DIR, env=env,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+        report = json.loads(result.stdout)
+        roots = parse_importtime(result.stderr.splitlines())
+        min_us = options['min_ms'] * 1000
+        if options['json']:
+            report['imports'] = [
+                root.as_dict(min_us) for root in roots
+                if root.cumulative_us >= min_us
+            ]
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.write_phases(report)
+        self.write_apps(report)
+        self.stdout.write(
+            f'\nИмпорты от {options["min_ms"]:g} мс '
+            '(всего с зависимостями / сам модуль):'
+        )
+        total = 0
+        for root in sorted(roots, key=lambda node: -node.cumulative_us):
+            total += root.cumulative_us
+            self.write_node(root, 0, min_us, options['depth'])
+        self.stdout.write(f'Всего на импорт: {total / 1000:.1f} мс')
+
+    def write_phases(self, report):
+        phases = report['phases']
+        self.stdout.write('Этапы старта, мс:')
+        for key, title in PHASES:
+            self.stdout.write(f'  {title:<20}{milliseconds(phases[key]):>8}')
+
+    def write_apps(self, report):
+        self.stdout.write('\nПриложения, мс:   модели   ready()')
+        for label, seconds in report['ready'].items():
+            self.stdout.write(
+                f'  {label:<14}'
+                f'{milliseconds(report["models"].get(label, 0)):>8}'
+                f'{milliseconds(seconds):>10}'
+            )
+
+    def write_node(self, node, level, min_us, depth):
+        if node.cumulative_us < min_us or level >= depth:
+            return
+        self.stdout.write(
+            f'{node.cumulative_us / 1000:>9.1f}{node.self_us / 1000:>8.1f}  '
+            f'{"  " * level}{node.name}'
+        )
+        for child in sorted(node.children, key=lambda n: -n.cumulative_us):
+            self.write_node(child, level + 1, min_us, depth)
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core.replication import sync_replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик. С --interval '
+        'повторяет копирование, изображая репликацию с отставанием'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Пауза между копированиями в секундах'
+        )
+
+    def handle(self, *args, **options):
+        if connections['default'].vendor != 'sqlite':
+            raise CommandError(
+                'Реплики PostgreSQL обновляет сам сервер базы'
+            )
+        while True:
+            aliases = sync_replicas()
+            self.stdout.write(
+                f'Обновлено реплик: {len(aliases)} {", ".join(aliases)}'
+            )
+            if options['interval'] is None:
+                return
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                return
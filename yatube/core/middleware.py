@@ -0,0 +1,62 @@
+import time
+
+from django.conf import settings
+
+from .perf import RequestRecord, current, store, track_queries
+from .routers import pin, written
+
+
+class PerformanceMiddleware:
+    """Меряет время запроса, SQL и рендеринг шаблонов.
+
+    Итог уходит в заголовок Server-Timing, а выборка запросов —
+    в кольцевой буфер core.perf.records и лог yatube.perf.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        record = RequestRecord(request.method)
+        token = current.set(record)
+        started = time.perf_counter()
+        try:
+            with track_queries(record):
+                response = self.get_response(request)
+        finally:
+            current.reset(token)
+        record.total = time.perf_counter() - started
+        if request.resolver_match is not None:
+            record.view = request.resolver_match.view_name
+        record.status = response.status_code
+        if not response.streaming:
+            record.size = len(response.content)
+        if settings.PERF_SERVER_TIMING:
+            response['Server-Timing'] = record.server_timing()
+        store(record)
+        return response
+
+
+class ReplicaPinMiddleware:
+    """Закрепляет пользователя за основной базой после записи.
+
+    Записью считается любой запрос, который роутер направил в
+    default, в том числе подписка по GET-ссылке. Пока отметка
+    в сессии не истекла, replica_reads не уводит чтения на реплики:
+    автор сразу видит свой пост после редиректа.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = written.set(False)
+        try:
+            response = self.get_response(request)
+            wrote = written.get()
+        finally:
+            written.reset(token)
+        if (wrote and settings.DATABASE_REPLICAS
+                and request.user.is_authenticated):
+            pin(request)
+        return response
@@ -0,0 +1,58 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+THREAD_PREFIX = 'db-read'
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.DB_READ_THREADS,
+                thread_name_prefix=THREAD_PREFIX
+            )
+    return _executor
+
+
+def in_worker(func):
+    try:
+        return func()
+    finally:
+        # Как в конце запроса: соединение потока живёт CONN_MAX_AGE.
+        close_old_connections()
+
+
+def run_inline(calls):
+    return (
+        settings.DB_READ_THREADS < 2
+        or len(calls) < 2
+        or connection.in_atomic_block
+        or threading.current_thread().name.startswith(THREAD_PREFIX)
+    )
+
+
+def gather(**calls):
+    """Выполняет независимые чтения из базы одновременно.
+
+    Каждое чтение идёт в своём потоке общего пула из DB_READ_THREADS
+    потоков со своим соединением; контекст запроса (реплика для
+    чтения, замер) копируется в поток. SQL из потоков пула в замер
+    запроса не попадает. Внутри транзакции другие соединения
+    не видят её изменений, поэтому там чтения идут по очереди.
+    Возвращает словарь результатов с теми же именами.
+    """
+    if run_inline(calls):
+        return {name: call() for name, call in calls.items()}
+    futures = {
+        name: executor().submit(copy_context().run, in_worker, call)
+        for name, call in calls.items()
+    }
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,86 @@
+import json
+import logging
+import random
+import time
+from collections import deque
+from contextlib import ExitStack
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('yatube.perf')
+records = deque(maxlen=settings.PERF_BUFFER_SIZE)
+current = ContextVar('perf_record', default=None)
+
+
+class RequestRecord:
+    """Замеры одного запроса: SQL, шаблоны и общее время."""
+
+    # Экземпляр вызывается как execute_wrapper, в шаблонах — только поля.
+    do_not_call_in_templates = True
+
+    __slots__ = (
+        'view', 'method', 'status', 'total', 'sql_count', 'sql_time',
+        'template_time', 'template_depth', 'templates', 'size',
+        'timestamp',
+    )
+
+    def __init__(self, method):
+        self.view = None
+        self.method = method
+        self.status = None
+        self.total = 0.0
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        # Имя шаблона -> [число рендеров, секунды].
+        self.templates = {}
+        self.size = None
+        self.timestamp = time.time()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_time += time.perf_counter() - started
+
+    def add_template(self, name, elapsed):
+        stat = self.templates.setdefault(name, [0, 0.0])
+        stat[0] += 1
+        stat[1] += elapsed
+
+    @property
+    def total_ms(self):
+        return self.total * 1000
+
+    def server_timing(self):
+        return (
+            f'app;dur={self.total * 1000:.1f}, '
+            f'sql;dur={self.sql_time * 1000:.1f};'
+            f'desc="{self.sql_count} queries", '
+            f'tpl;dur={self.template_time * 1000:.1f}'
+        )
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__
+                if name != 'template_depth'}
+
+
+def track_queries(record):
+    """Подключает record ко всем открытым алиасам БД."""
+    stack = ExitStack()
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(record))
+    return stack
+
+
+def store(record):
+    if random.random() >= settings.PERF_SAMPLE_RATE:
+        return
+    records.append(record)
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps(record.as_dict()))
@@ -0,0 +1,248 @@
+import gzip
+import os
+from datetime import datetime
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpRequest, HttpResponse
+from django.template import engines
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+from django.views.generic.base import TemplateView
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+CACHE_KEY = 'core:prerendered:{}'
+# Кодировки в порядке предпочтения; brotli — если установлен пакет.
+ENCODINGS = ('br', 'gzip')
+
+
+def template_files(template_name):
+    """Файлы шаблона и всех шаблонов, которые он расширяет и включает.
+
+    Учитываются только extends и include с именем-константой: других
+    в статических страницах нет.
+    """
+    files = {}
+    names = [template_name]
+    while names:
+        name = names.pop()
+        if name in files:
+            continue
+        template = get_template(name).template
+        files[name] = template.origin.name
+        names.extend(
+            node.parent_name.var
+            for node in template.nodelist.get_nodes_by_type(ExtendsNode)
+        )
+        names.extend(
+            node.template.var
+            for node in template.nodelist.get_nodes_by_type(IncludeNode)
+        )
+        names = [name for name in names if isinstance(name, str)]
+    return tuple(files.values())
+
+
+def mtimes(files):
+    return tuple(os.stat(path).st_mtime for path in files)
+
+
+def reset_template_cache():
+    """Забывает скомпилированные шаблоны кэширующих загрузчиков.
+
+    Иначе изменённый на диске шаблон отрендерился бы из старой копии.
+    """
+    for backend in engines.all():
+        for loader in getattr(backend.engine, 'template_loaders', ()):
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+def shared_cache():
+    """Кэш страниц общий для процессов, а не память одного из них."""
+    return not isinstance(caches[settings.POSTS_PAGE_CACHE], LocMemCache)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с их весом q.
+
+    q=0 означает, что клиент кодировку не принимает: такая запись
+    остаётся в словаре, чтобы «*» её не разрешила.
+    """
+    accepted = {}
+    for item in header.split(','):
+        name, *params = item.split(';')
+        weight = 1.0
+        for param in params:
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        name = name.strip().lower()
+        if name:
+            accepted[name] = weight
+    return accepted
+
+
+def anonymous_request(path):
+    """Запрос анонимного посетителя, от имени которого рендерится страница."""
+    request = HttpRequest()
+    request.method = 'GET'
+    request.path = request.path_info = path
+    request.user = AnonymousUser()
+    request.resolver_match = resolve(path)
+    return request
+
+
+class PrerenderedPage:
+    """Готовая страница: тело без сжатия и сжатые варианты.
+
+    Устаревает, если сменился год (подвал выводит его через
+    core.context_processors.year) или изменился файл одного
+    из шаблонов страницы.
+    """
+
+    __slots__ = ('bodies', 'etag', 'year', 'files', 'mtimes')
+
+    def __init__(self, content, year, files):
+        self.bodies = {None: content, 'gzip': gzip.compress(content, 9)}
+        if brotli is not None:
+            self.bodies['br'] = brotli.compress(content)
+        self.etag = md5(content).hexdigest()
+        self.year = year
+        self.files = files
+        self.mtimes = mtimes(files)
+
+    def files_changed(self):
+        try:
+            return mtimes(self.files) != self.mtimes
+        except OSError:
+            return True
+
+    def is_fresh(self):
+        return (self.year == datetime.today().year
+                and not self.files_changed())
+
+    def choose_encoding(self, header):
+        accepted = accepted_encodings(header)
+        weights = {
+            name: accepted.get(name, accepted.get('*', 0))
+            for name in ENCODINGS if name in self.bodies
+        }
+        weights = {name: weight for name, weight in weights.items() if weight}
+        if not weights:
+            return None
+        # При равных весах побеждает кодировка, идущая раньше в ENCODINGS.
+        return max(weights, key=lambda name: (
+            weights[name], -ENCODINGS.index(name)
+        ))
+
+    def response(self, request):
+        encoding = self.choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', '')
+        )
+        # Сильный ETag должен различать байты ответа, поэтому у сжатых
+        # вариантов он свой.
+        etag = quote_etag(
+            self.etag if encoding is None else f'{self.etag}-{encoding}'
+        )
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(self.bodies[encoding])
+            if encoding is not None:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+
+def render_page(path, template_name):
+    year = datetime.today().year
+    request = anonymous_request(path)
+    content = get_template(template_name).render(request=request)
+    return PrerenderedPage(
+        content.encode(), year, template_files(template_name)
+    )
+
+
+class PrerenderedPages:
+    """Статические страницы в памяти процесса, по пути внутри сайта.
+
+    Промах в памяти сначала ищется в общем кэше страниц: туда
+    их кладёт команда prerender при выкладке. Страница, которой
+    нет и там, рендерится при первом запросе.
+    """
+
+    def __init__(self):
+        self.pages = {}
+
+    def get(self, path, template_name):
+        page = self.pages.get(path)
+        if page is not None and page.is_fresh():
+            return page
+        shared = caches[settings.POSTS_PAGE_CACHE].get(CACHE_KEY.format(path))
+        if shared is not None and shared.is_fresh():
+            self.pages[path] = shared
+            return shared
+        if any(old is not None and old.files_changed()
+               for old in (page, shared)):
+            reset_template_cache()
+        return self.render(path, template_name)
+
+    def render(self, path, template_name):
+        page = render_page(path, template_name)
+        caches[settings.POSTS_PAGE_CACHE].set(
+            CACHE_KEY.format(path), page, None
+        )
+        self.pages[path] = page
+        return page
+
+    def clear(self):
+        self.pages.clear()
+
+
+pages = PrerenderedPages()
+
+
+def static_pages(patterns=None, prefix='/'):
+    """Пары (путь, шаблон) всех страниц на PrerenderedTemplateView.
+
+    Пропускаются адреса с параметрами: у статической страницы их нет.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        path = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from static_pages(pattern.url_patterns, path)
+            continue
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if (view_class is not None and '<' not in path
+                and issubclass(view_class, PrerenderedTemplateView)):
+            yield path, view_class.template_name
+
+
+class PrerenderedTemplateView(TemplateView):
+    """TemplateView для страниц без данных: анонимам — готовые байты.
+
+    Авторизованный пользователь видит в шапке своё меню, поэтому
+    ему страница рендерится как обычно.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if (not settings.PRERENDER_STATIC_PAGES
+                or request.user.is_authenticated):
+            return super().get(request, *args, **kwargs)
+        page = pages.get(request.path_info, self.template_name)
+        return page.response(request)
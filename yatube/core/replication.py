@@ -0,0 +1,33 @@
+import sqlite3
+
+from django.conf import settings
+from django.db import connections
+
+
+def copy_sqlite(source, target):
+    """Копирует базу SQLite целиком через backup API.
+
+    Копия согласованна, даже если в источник в это время пишут,
+    а читатели реплики лишь ненадолго ждут окончания копирования.
+    """
+    src = sqlite3.connect(source)
+    dst = sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+
+
+def sync_replicas():
+    """Обновляет файлы реплик SQLite из основной базы.
+
+    Заменяет репликацию для локальной проверки: между запусками
+    реплики отстают, как настоящие. Возвращает обновлённые алиасы.
+    """
+    source = connections.databases['default']
+    if source['ENGINE'] != 'django.db.backends.sqlite3':
+        return []
+    for alias in settings.DATABASE_REPLICAS:
+        copy_sqlite(source['NAME'], connections.databases[alias]['NAME'])
+    return list(settings.DATABASE_REPLICAS)
@@ -0,0 +1,85 @@
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+PIN_KEY = '_db_primary_until'
+# Сессии читаются только с основной базы: свежая сессия после входа
+# могла ещё не дойти до реплики.
+PRIMARY_ONLY_APPS = {'sessions'}
+
+read_alias = ContextVar('read_alias', default=None)
+written = ContextVar('written', default=False)
+primary_only = ContextVar('primary_only', default=False)
+
+
+def is_pinned(request):
+    """Пользователь недавно писал в базу и читает только с основной."""
+    session = getattr(request, 'session', None)
+    return session is not None and session.get(PIN_KEY, 0) > time.time()
+
+
+def pin(request):
+    request.session[PIN_KEY] = time.time() + settings.REPLICA_PIN_SECONDS
+
+
+@contextmanager
+def primary_reads():
+    """Внутри блока replica_reads читает с основной базы."""
+    token = primary_only.set(True)
+    try:
+        yield
+    finally:
+        primary_only.reset(token)
+
+
+def replica_reads(view):
+    """Направляет чтения представления на одну из реплик.
+
+    Реплика выбирается одна на весь запрос, чтобы страница не
+    собиралась из данных с разным отставанием. Пользователь,
+    закреплённый за основной базой после записи, читает с неё.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (not settings.DATABASE_REPLICAS or primary_only.get()
+                or is_pinned(request)):
+            return view(request, *args, **kwargs)
+        token = read_alias.set(random.choice(settings.DATABASE_REPLICAS))
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            read_alias.reset(token)
+    return wrapper
+
+
+class ReplicaRouter:
+    """Запись всегда идёт в default, чтение — туда, куда его направил
+    replica_reads, иначе тоже в default.
+
+    Реплики — копии основной базы, поэтому миграции на них
+    не применяются, а связи между объектами разрешены.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return 'default'
+        return read_alias.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        written.set(True)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.DATABASE_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
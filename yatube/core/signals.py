@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+from .urlcache import clear_url_cache
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    # Напрямую через sqlite3: эти PRAGMA не должны попадать
+    # в замеры и счётчики SQL-запросов.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(setting_changed)
+def reset_url_cache(sender, setting, **kwargs):
+    # Тесты подменяют URLconf через override_settings.
+    if setting == 'ROOT_URLCONF':
+        clear_url_cache()
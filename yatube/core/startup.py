@@ -0,0 +1,64 @@
+"""Замер холодного старта; запускается командой startup_profile.
+
+Выполняется в отдельном процессе под python -X importtime, поэтому
+до django.setup() модуль импортирует только стандартную библиотеку.
+Результат — JSON в stdout, дерево импортов — в stderr.
+"""
+import json
+import os
+import time
+
+
+def timed(timings, label, method):
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            timings[label] = time.perf_counter() - started
+    return wrapper
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    phases = {}
+    models = {}
+    ready = {}
+    started = time.perf_counter()
+    import django
+    from django.apps.config import AppConfig
+    from django.conf import settings
+    settings.INSTALLED_APPS
+    phases['settings'] = time.perf_counter() - started
+
+    create = AppConfig.create.__func__
+
+    def create_timed(cls, entry):
+        config = create(cls, entry)
+        config.import_models = timed(
+            models, config.label, config.import_models
+        )
+        config.ready = timed(ready, config.label, config.ready)
+        return config
+
+    AppConfig.create = classmethod(create_timed)
+    started = time.perf_counter()
+    django.setup()
+    phases['setup'] = time.perf_counter() - started
+
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.urls import get_resolver, reverse
+    started = time.perf_counter()
+    WSGIHandler()
+    phases['middleware'] = time.perf_counter() - started
+    started = time.perf_counter()
+    get_resolver().url_patterns
+    phases['urlconf'] = time.perf_counter() - started
+    started = time.perf_counter()
+    reverse(settings.LOGIN_REDIRECT_URL)
+    phases['first_reverse'] = time.perf_counter() - started
+    print(json.dumps({'phases': phases, 'models': models, 'ready': ready}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+import json
+import logging
+import os
+import socket
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger('yatube.tasks')
+TASKS = {}
+
+
+class TaskType:
+    def __init__(self, name, func, batch):
+        self.name = name
+        self.func = func
+        self.batch = batch
+
+    def __call__(self, payloads):
+        if self.batch:
+            return self.func(payloads)
+        for payload in payloads:
+            self.func(**payload)
+
+    def enqueue(self, payload=None, key=None):
+        return enqueue(self.name, payload, key)
+
+
+def task(name, batch=False):
+    """Регистрирует обработчик фоновой задачи.
+
+    Обычный обработчик получает параметры задачи именованными
+    аргументами. Пакетный (batch=True) — список параметров всех
+    задач этого типа, взятых воркером за один раз.
+    """
+    def decorator(func):
+        TASKS[name] = TaskType(name, func, batch)
+        return TASKS[name]
+    return decorator
+
+
+def enqueue(name, payload=None, key=None):
+    """Ставит задачу в очередь в текущей транзакции.
+
+    Задача появится у воркеров только вместе с изменениями, которые
+    её породили. Если задача с тем же ключом ещё ждёт в очереди,
+    новая не создаётся.
+    """
+    payload = json.dumps(payload or {})
+    if settings.TASKS_ALWAYS_EAGER:
+        TASKS[name]([json.loads(payload)])
+        return
+    try:
+        with transaction.atomic():
+            Task.objects.create(name=name, payload=payload, key=key)
+    except IntegrityError:
+        if key is None:
+            raise
+
+
+def worker_name():
+    return (
+        f'{socket.gethostname()}:{os.getpid()}:'
+        f'{threading.current_thread().name}'
+    )[:100]
+
+
+def release_stale():
+    """Возвращает в очередь задачи воркеров, которые не ответили вовремя."""
+    expired = timezone.now() - timedelta(seconds=settings.TASKS_LOCK_TIMEOUT)
+    return Task.objects.filter(
+        status=Task.RUNNING, locked_at__lt=expired
+    ).update(status=Task.PENDING, locked_by='', locked_at=None)
+
+
+class Worker:
+    """Берёт из очереди пачки задач одного типа и выполняет их."""
+
+    def __init__(self, batch_size=None, name=None):
+        self.batch_size = batch_size or settings.TASKS_BATCH_SIZE
+        self.name = name or worker_name()
+        self.processed = 0
+
+    def claim(self):
+        now = timezone.now()
+        due = Task.objects.filter(
+            status=Task.PENDING, run_after__lte=now
+        ).order_by('run_after', 'pk')
+        name = due.values_list('name', flat=True).first()
+        if name is None:
+            return None, []
+        task_type = TASKS.get(name)
+        size = self.batch_size if task_type and task_type.batch else 1
+        ids = list(
+            due.filter(name=name).values_list('pk', flat=True)[:size]
+        )
+        # Условие status=PENDING делает захват атомарным: задачу,
+        # которую успел взять другой воркер, UPDATE не тронет.
+        Task.objects.filter(pk__in=ids, status=Task.PENDING).update(
+            status=Task.RUNNING,
+            locked_by=self.name,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            key=None,
+        )
+        return name, list(Task.objects.filter(
+            pk__in=ids, status=Task.RUNNING,
+            locked_by=self.name, locked_at=now
+        ))
+
+    def run_once(self):
+        """Выполняет одну пачку; возвращает число взятых задач."""
+        name, tasks = self.claim()
+        if not tasks:
+            return 0
+        try:
+            with transaction.atomic():
+                TASKS[name]([json.loads(task.payload) for task in tasks])
+        except Exception:
+            logger.exception('Задачи %s упали', name)
+            self.retry(tasks, traceback.format_exc())
+        else:
+            Task.objects.filter(pk__in=[task.pk for task in tasks]).delete()
+        self.processed += len(tasks)
+        return len(tasks)
+
+    def retry(self, tasks, error):
+        for task in tasks:
+            if task.attempts >= settings.TASKS_MAX_ATTEMPTS:
+                task.status = Task.FAILED
+            else:
+                task.status = Task.PENDING
+                task.run_after = timezone.now() + timedelta(
+                    seconds=settings.TASKS_RETRY_DELAY
+                    * 2 ** (task.attempts - 1)
+                )
+            task.locked_by = ''
+            task.locked_at = None
+            task.last_error = error
+            task.save(update_fields=(
+                'status', 'run_after', 'locked_by', 'locked_at',
+                'last_error'
+            ))
+
+    def run(self, stop, once=False, poll_interval=1.0):
+        while not stop.is_set():
+            if self.run_once():
+                continue
+            if once:
+                return
+            release_stale()
+            stop.wait(poll_interval)
@@ -0,0 +1,41 @@
+import time
+
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (DjangoTemplates, Template,
+                                             reraise)
+
+from .perf import current
+
+
+class TimedBackendTemplate(Template):
+    """Обёртка шаблона бэкенда: считает общее время рендеринга."""
+
+    def render(self, context=None, request=None):
+        record = current.get()
+        if record is None:
+            return super().render(context, request)
+        record.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            record.template_depth -= 1
+            if not record.template_depth:
+                record.template_time += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """DjangoTemplates, который засчитывает рендеринг в замер запроса."""
+
+    def from_string(self, template_code):
+        return TimedBackendTemplate(
+            self.engine.from_string(template_code), self
+        )
+
+    def get_template(self, template_name):
+        try:
+            return TimedBackendTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
@@ -0,0 +1,119 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import (Template, TemplateDoesNotExist,
+                             TemplateSyntaxError, engines)
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders import app_directories, base, cached, filesystem
+from django.template.utils import get_app_template_dirs
+
+from .perf import current
+
+logger = logging.getLogger('yatube.perf')
+
+
+class TimedTemplate(Template):
+    """Шаблон, который записывает своё время рендеринга в замер запроса.
+
+    Время включает вложенные include и extends, поэтому base.html
+    покрывает почти всю страницу, а карточка поста — только себя.
+    """
+
+    def _render(self, context):
+        record = current.get()
+        if record is None:
+            return super()._render(context)
+        started = time.perf_counter()
+        try:
+            return super()._render(context)
+        finally:
+            record.add_template(self.name, time.perf_counter() - started)
+
+
+class TimedLoaderMixin(base.Loader):
+    def get_template(self, template_name, skip=None):
+        tried = []
+        for origin in self.get_template_sources(template_name):
+            if skip is not None and origin in skip:
+                tried.append((origin, 'Skipped'))
+                continue
+            try:
+                contents = self.get_contents(origin)
+            except TemplateDoesNotExist:
+                tried.append((origin, 'Source does not exist'))
+                continue
+            return TimedTemplate(
+                contents, origin, origin.template_name, self.engine
+            )
+        raise TemplateDoesNotExist(template_name, tried=tried)
+
+
+class FilesystemLoader(TimedLoaderMixin, filesystem.Loader):
+    pass
+
+
+class AppDirectoriesLoader(TimedLoaderMixin, app_directories.Loader):
+    pass
+
+
+class CachedLoader(cached.Loader, TimedLoaderMixin):
+    """Кэширующий загрузчик: шаблон разбирается один раз на процесс."""
+
+
+def template_names(directory):
+    for root, _, files in os.walk(directory):
+        for filename in files:
+            path = os.path.relpath(os.path.join(root, filename), directory)
+            yield path.replace(os.sep, '/')
+
+
+def project_template_dirs(engine):
+    """Каталоги шаблонов проекта: DIRS и шаблоны приложений проекта.
+
+    Шаблоны сторонних приложений (админка и прочие) не нужны
+    на первых запросах к сайту, их загрузит кэш при обращении.
+    """
+    directories = list(engine.dirs)
+    directories.extend(
+        directory for directory in get_app_template_dirs('templates')
+        if str(directory).startswith(settings.BASE_DIR)
+    )
+    return directories
+
+
+def preload_templates():
+    """Компилирует шаблоны проекта заранее.
+
+    С кэширующим загрузчиком первый запрос после запуска уже не
+    читает и не разбирает шаблоны с диска. Возвращает их число.
+    """
+    loaded = 0
+    started = time.perf_counter()
+    for backend in engines.all():
+        if not isinstance(backend, DjangoTemplates):
+            continue
+        for directory in project_template_dirs(backend.engine):
+            for name in template_names(directory):
+                try:
+                    backend.engine.get_template(name)
+                except (TemplateDoesNotExist, TemplateSyntaxError) as error:
+                    logger.warning('Шаблон %s не загружен: %s', name, error)
+                else:
+                    loaded += 1
+    logger.info(
+        'Загружено шаблонов: %s за %.0f мс',
+        loaded, (time.perf_counter() - started) * 1000
+    )
+    return loaded
+
+
+def preload_for_serving():
+    """Прогрев шаблонов из точек входа wsgi и asgi.
+
+    Management-командам он не нужен, поэтому вызывается не из
+    AppConfig.ready, а только при запуске сервера.
+    """
+    if settings.TEMPLATES_CACHED:
+        preload_templates()
@@ -0,0 +1,11 @@
+from django import template
+
+from core.urlcache import cached_reverse
+
+register = template.Library()
+
+
+@register.simple_tag
+def cached_url(viewname, *args):
+    """Как {% url %}, но адрес берётся из core.urlcache."""
+    return cached_reverse(viewname, *args)
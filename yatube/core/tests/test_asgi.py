@@ -0,0 +1,70 @@
+import asyncio
+import threading
+from http import HTTPStatus
+
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from ..asgi import ASGIHandler
+from ..parallel import THREAD_PREFIX, gather
+
+
+def thread_name():
+    return threading.current_thread().name
+
+
+class ASGIHandlerTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.handler = ASGIHandler(threads=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.handler.executor.shutdown()
+        super().tearDownClass()
+
+    def call(self, path):
+        messages = []
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'testserver')],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(self.handler(scope, receive, send))
+        return messages
+
+    def test_page_served(self):
+        start, body = self.call(reverse('about:author'))
+        self.assertEqual(start['status'], HTTPStatus.OK)
+        self.assertIn(
+            (b'content-type', b'text/html; charset=utf-8'), start['headers']
+        )
+        self.assertIn('Об авторе'.encode(), body['body'])
+
+    def test_missing_page(self):
+        start, _ = self.call('/no-such-page/')
+        self.assertEqual(start['status'], HTTPStatus.NOT_FOUND)
+
+
+@override_settings(DB_READ_THREADS=4)
+class GatherTest(SimpleTestCase):
+    def test_reads_run_in_pool(self):
+        names = gather(first=thread_name, second=thread_name)
+        self.assertEqual(set(names), {'first', 'second'})
+        for name in names.values():
+            self.assertTrue(name.startswith(THREAD_PREFIX))
+
+    @override_settings(DB_READ_THREADS=0)
+    def test_inline_without_pool(self):
+        names = gather(first=thread_name, second=thread_name)
+        self.assertEqual(names['first'], thread_name())
@@ -0,0 +1,62 @@
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import SimpleTestCase, TestCase, override_settings
+
+SYNCHRONOUS_NORMAL = 1
+
+
+class FakeWrapper:
+    vendor = 'sqlite'
+
+    def __init__(self, path):
+        self.connection = sqlite3.connect(path)
+
+
+class SqlitePragmasTest(TestCase):
+    def test_connection_tuned(self):
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA synchronous')
+            self.assertEqual(cursor.fetchone()[0], SYNCHRONOUS_NORMAL)
+
+    @override_settings(SQLITE_PRAGMAS={'journal_mode': 'wal'})
+    def test_file_database_in_wal_mode(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = FakeWrapper(os.path.join(directory, 'test.sqlite3'))
+            connection_created.send(sender=None, connection=wrapper)
+            mode = wrapper.connection.execute('PRAGMA journal_mode')
+            self.assertEqual(mode.fetchone()[0], 'wal')
+            wrapper.connection.close()
+
+
+class SettingsProfileTest(SimpleTestCase):
+    """Ошибки конфигурации видны при старте, а не на первом запросе."""
+
+    def load_settings(self, **env):
+        return subprocess.run(
+            [sys.executable, '-c', 'import yatube.settings'],
+            cwd=settings.BASE_DIR, env=dict(os.environ, **env),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True,
+        )
+
+    def test_prod_requires_shared_cache(self):
+        prod = {'YATUBE_PROFILE': 'prod', 'YATUBE_SECRET_KEY': 'secret'}
+        result = self.load_settings(YATUBE_CACHE='locmem', **prod)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+        self.assertIn('YATUBE_CACHE', result.stderr)
+        self.assertEqual(self.load_settings(**prod).returncode, 0)
+
+    def test_postgres_replicas_require_hosts(self):
+        result = self.load_settings(
+            YATUBE_DB='postgres', YATUBE_REPLICAS='1',
+            YATUBE_DB_REPLICA_HOSTS=''
+        )
+        self.assertIn('YATUBE_DB_REPLICA_HOSTS', result.stderr)
+        self.assertNotIn('ZeroDivisionError', result.stderr)
@@ -0,0 +1,52 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..perf import records
+
+User = get_user_model()
+
+
+@override_settings(PERF_SAMPLE_RATE=1.0)
+class PerformanceMiddlewareTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.staff = User.objects.create(username='staff', is_staff=True)
+        cls.user = User.objects.create(username='user')
+
+    def setUp(self):
+        records.clear()
+        self.guest_client = Client()
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+
+    def test_server_timing_header(self):
+        response = self.guest_client.get(reverse('about:author'))
+        self.assertIn('sql;dur=', response['Server-Timing'])
+        self.assertIn('tpl;dur=', response['Server-Timing'])
+
+    def test_request_recorded(self):
+        self.staff_client.get(
+            reverse('posts:profile', kwargs={'username': 'user'})
+        )
+        record = records[-1]
+        self.assertEqual(record.view, 'posts:profile')
+        self.assertEqual(record.status, HTTPStatus.OK)
+        self.assertGreater(record.sql_count, 0)
+        self.assertGreater(record.template_time, 0)
+        self.assertIn('posts/profile.html', record.templates)
+        self.assertIn('includes/header.html', record.templates)
+        self.assertGreater(record.size, 0)
+
+    def test_stats_page_staff_only(self):
+        self.guest_client.get(reverse('posts:index'))
+        response = self.staff_client.get(reverse('core:perf_stats'))
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertContains(response, 'posts:index')
+        user_client = Client()
+        user_client.force_login(self.user)
+        response = user_client.get(reverse('core:perf_stats'))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
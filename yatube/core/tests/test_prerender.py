@@ -0,0 +1,123 @@
+import gzip
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from io import StringIO
+from http import HTTPStatus
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..prerender import accepted_encodings, pages, static_pages
+
+User = get_user_model()
+TEMP_TEMPLATES_DIR = tempfile.mkdtemp()
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'DIRS': [TEMP_TEMPLATES_DIR],
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [(
+            'core.template_loaders.CachedLoader',
+            ['core.template_loaders.FilesystemLoader'],
+        )],
+    },
+}]
+
+
+class NextYear(datetime):
+    @classmethod
+    def today(cls):
+        return datetime(datetime.today().year + 1, 1, 1)
+
+
+@override_settings(PRERENDER_STATIC_PAGES=True)
+class PrerenderedPagesTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_TEMPLATES_DIR, ignore_errors=True)
+
+    def setUp(self):
+        pages.clear()
+        caches['pages'].clear()
+        self.client = Client()
+
+    def test_served_compressed_with_etag(self):
+        url = reverse('about:author')
+        with override_settings(PRERENDER_STATIC_PAGES=False):
+            rendered = self.client.get(url).content
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), rendered)
+        self.assertEqual(self.client.get(url).content, rendered)
+        with self.assertTemplateNotUsed('about/author.html'):
+            response = self.client.get(
+                url, HTTP_ACCEPT_ENCODING='gzip',
+                HTTP_IF_NONE_MATCH=response['ETag']
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_encoding_weights(self):
+        url = reverse('about:author')
+        for header, encoding in (
+            ('gzip;q=0', None),
+            ('GZIP', 'gzip'),
+            ('*;q=0.1', 'gzip'),
+            ('*, gzip;q=0', None),
+            ('deflate', None),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(url, HTTP_ACCEPT_ENCODING=header)
+                self.assertEqual(response.get('Content-Encoding'), encoding)
+        self.assertEqual(
+            accepted_encodings('br;q=0.5, gzip ; q=1, x;q=oops'),
+            {'br': 0.5, 'gzip': 1.0, 'x': 0.0}
+        )
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_changed_template_bypasses_cached_loader(self):
+        path = os.path.join(TEMP_TEMPLATES_DIR, 'page.html')
+        url = reverse('about:tech')
+        for version, content in enumerate(('Первая версия', 'Вторая версия')):
+            with open(path, 'w', encoding='utf-8') as template:
+                template.write(content)
+            os.utime(path, (version, version))
+            page = pages.get(url, 'page.html')
+            self.assertEqual(page.bodies[None].decode(), content)
+
+    def test_command_requires_shared_cache(self):
+        with self.assertRaisesMessage(CommandError, 'YATUBE_CACHE'):
+            call_command('prerender', stdout=StringIO())
+
+    def test_rerendered_when_stale(self):
+        url = reverse('about:tech')
+        self.client.get(url)
+        page = pages.pages[url]
+        self.assertTrue(page.is_fresh())
+        self.assertIn('templates/base.html', ' '.join(page.files))
+        with mock.patch('core.prerender.datetime', NextYear):
+            self.assertFalse(page.is_fresh())
+            with self.assertTemplateUsed('about/tech.html'):
+                self.client.get(url)
+            self.assertTrue(pages.pages[url].is_fresh())
+
+    def test_authenticated_user_gets_own_menu(self):
+        self.client.force_login(User.objects.create(username='reader'))
+        with self.assertTemplateUsed('about/author.html'):
+            response = self.client.get(reverse('about:author'))
+        self.assertContains(response, 'Пользователь: reader')
+        self.assertNotIn('ETag', response)
+
+    def test_static_pages_found_in_urlconf(self):
+        self.assertEqual(dict(static_pages()), {
+            '/auth/justpage/': 'app_name/just_page.html',
+            '/about/author/': 'about/author.html',
+            '/about/tech/': 'about/tech.html',
+        })
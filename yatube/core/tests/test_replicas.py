@@ -0,0 +1,109 @@
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.test import Client, RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from posts.cache import (BUMPED_KEY, GENERATION_KEY, bump_generation,
+                         cache_page_for_guests)
+from posts.models import Post
+
+from ..replication import copy_sqlite
+from ..routers import PIN_KEY, ReplicaRouter, replica_reads
+
+User = get_user_model()
+
+
+@replica_reads
+def read_view(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Post))
+
+
+@cache_page_for_guests
+@replica_reads
+def cached_read_view(request):
+    return HttpResponse(ReplicaRouter().db_for_read(Post))
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRouterTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.reader = User.objects.create(username='reader')
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def read_from(self, session):
+        request = self.factory.get('/')
+        request.session = session
+        return read_view(request).content.decode()
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.read_from({}), 'replica1')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_pinned_user_reads_primary(self):
+        session = {PIN_KEY: time.time() + 10}
+        self.assertEqual(self.read_from(session), 'default')
+        session[PIN_KEY] = time.time() - 1
+        self.assertEqual(self.read_from(session), 'replica1')
+
+    def test_guest_page_after_change_built_from_primary(self):
+        pages = caches['pages']
+        pages.clear()
+        request = self.factory.get('/')
+        request.session = {}
+        request.user = AnonymousUser()
+        bump_generation()
+        self.assertEqual(cached_read_view(request).content, b'default')
+        pages.set(
+            BUMPED_KEY, time.time() - settings.REPLICA_PIN_SECONDS - 1, None
+        )
+        pages.incr(GENERATION_KEY)
+        self.assertEqual(cached_read_view(request).content, b'replica1')
+
+    def test_writes_go_to_primary(self):
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertFalse(
+            self.router.allow_migrate('replica1', 'posts', 'post')
+        )
+
+    def test_write_pins_session(self):
+        self.client.get(
+            reverse('posts:profile_follow', kwargs={'username': 'author'})
+        )
+        self.assertGreater(self.client.session[PIN_KEY], time.time())
+
+    def test_read_does_not_pin_session(self):
+        self.client.get(reverse('posts:follow_index'))
+        self.assertNotIn(PIN_KEY, self.client.session)
+
+
+class CopySqliteTest(TestCase):
+    def test_replica_gets_primary_rows(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = os.path.join(directory, 'primary.sqlite3')
+            replica = os.path.join(directory, 'replica.sqlite3')
+            source = sqlite3.connect(primary)
+            source.execute('CREATE TABLE post (text TEXT)')
+            source.execute("INSERT INTO post VALUES ('первый')")
+            source.commit()
+            source.close()
+            copy_sqlite(primary, replica)
+            target = sqlite3.connect(replica)
+            rows = target.execute('SELECT text FROM post').fetchall()
+            target.close()
+        self.assertEqual(rows, [('первый',)])
@@ -0,0 +1,64 @@
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from django.urls import path, resolve, reverse
+
+from ..lazyurls import section
+from ..management.commands.startup_profile import parse_importtime
+
+IMPORTTIME = '''\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     leaf
+import time:       200 |        300 |   middle
+import time:        50 |         50 |   sibling
+import time:        10 |        360 | top
+import time:         5 |          5 | other
+'''
+loaded = []
+
+
+def lazy_patterns():
+    loaded.append(True)
+    return [path('page/', lambda request: None, name='page')]
+
+
+class URLconf:
+    def __init__(self):
+        self.urlpatterns = [
+            path('eager/', lambda request: None, name='eager'),
+            section('lazy/', lazy_patterns, namespace='lazy'),
+        ]
+
+
+class StartupProfileTest(SimpleTestCase):
+    def test_parse_importtime_tree(self):
+        top, other = parse_importtime(IMPORTTIME.splitlines())
+        self.assertEqual((top.name, top.cumulative_us), ('top', 360))
+        self.assertEqual(
+            [child.name for child in top.children], ['middle', 'sibling']
+        )
+        self.assertEqual(top.children[0].children[0].name, 'leaf')
+        self.assertEqual(other.children, [])
+
+    @override_settings(LAZY_URLCONFS=True)
+    def test_lazy_section_loaded_on_first_use(self):
+        for first_use in (
+            lambda: reverse('lazy:page'),
+            lambda: resolve('/lazy/page/'),
+        ):
+            loaded.clear()
+            with override_settings(ROOT_URLCONF=URLconf()):
+                self.assertEqual(reverse('eager'), '/eager/')
+                self.assertEqual(loaded, [])
+                first_use()
+                self.assertEqual(loaded, [True])
+
+    def test_command_reports_phases(self):
+        out = StringIO()
+        call_command('startup_profile', '--json', stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertIn('urlconf', report['phases'])
+        self.assertIn('posts', report['ready'])
+        self.assertTrue(report['imports'])
@@ -0,0 +1,60 @@
+from django.test import TestCase, override_settings
+
+from ..models import Task
+from ..tasks import Worker, enqueue, task
+
+calls = []
+
+
+@task('tests.collect', batch=True)
+def collect(payloads):
+    calls.append(sorted(payload['number'] for payload in payloads))
+
+
+@task('tests.fail')
+def fail(number):
+    raise RuntimeError(number)
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False, TASKS_MAX_ATTEMPTS=2)
+class TaskQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.worker = Worker(batch_size=10)
+
+    def test_same_type_tasks_run_in_one_batch(self):
+        for number in range(3):
+            enqueue('tests.collect', {'number': number})
+        self.assertEqual(self.worker.run_once(), 3)
+        self.assertEqual(calls, [[0, 1, 2]])
+        self.assertFalse(Task.objects.exists())
+        self.assertEqual(self.worker.run_once(), 0)
+
+    def test_idempotency_key(self):
+        enqueue('tests.collect', {'number': 1}, key='one')
+        enqueue('tests.collect', {'number': 1}, key='one')
+        self.assertEqual(Task.objects.count(), 1)
+        self.worker.claim()
+        enqueue('tests.collect', {'number': 1}, key='one')
+        self.assertEqual(Task.objects.filter(key='one').count(), 1)
+
+    def test_retry_then_fail(self):
+        enqueue('tests.fail', {'number': 1})
+        with self.assertLogs('yatube.tasks', 'ERROR'):
+            self.worker.run_once()
+        failed = Task.objects.get()
+        self.assertEqual(failed.status, Task.PENDING)
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('RuntimeError', failed.last_error)
+        self.assertEqual(self.worker.run_once(), 0)
+        Task.objects.update(run_after=failed.created)
+        with self.assertLogs('yatube.tasks', 'ERROR') as logs:
+            self.worker.run_once()
+        self.assertIn('tests.fail', logs.output[0])
+        self.assertEqual(Task.objects.get().status, Task.FAILED)
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager(self):
+        enqueue('tests.collect', {'number': 5})
+        self.assertEqual(calls, [[5]])
+        self.assertFalse(Task.objects.exists())
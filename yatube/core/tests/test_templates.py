@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.template import engines
+from django.test import TestCase, override_settings
+
+from ..template_loaders import preload_templates
+
+CACHED_TEMPLATES = [{
+    'BACKEND': 'django.template.backends.django.DjangoTemplates',
+    'DIRS': [settings.TEMPLATES_DIR],
+    'OPTIONS': {
+        'loaders': [(
+            'core.template_loaders.CachedLoader',
+            [
+                'core.template_loaders.FilesystemLoader',
+                'core.template_loaders.AppDirectoriesLoader',
+            ],
+        )],
+    },
+}]
+
+
+@override_settings(TEMPLATES=CACHED_TEMPLATES)
+class PreloadTemplatesTest(TestCase):
+    def test_project_templates_compiled_once(self):
+        self.assertGreater(preload_templates(), 0)
+        engine = engines['django'].engine
+        loader = engine.template_loaders[0]
+        self.assertIn('base.html', loader.get_template_cache)
+        self.assertNotIn('admin/base.html', loader.get_template_cache)
+        self.assertIs(
+            engine.get_template('base.html'),
+            loader.get_template_cache['base.html']
+        )
@@ -0,0 +1,49 @@
+from django.template import Context, Template
+from django.test import SimpleTestCase, override_settings
+from django.urls import path, reverse
+
+from ..urlcache import (URL_CACHE_SIZE, cached_reverse, clear_url_cache,
+                        reverse_with_args)
+
+urlpatterns = [
+    path('other/', lambda request: None, name='other'),
+]
+
+
+class CachedReverseTest(SimpleTestCase):
+    def setUp(self):
+        clear_url_cache()
+
+    def test_same_urls_as_reverse(self):
+        routes = (
+            ('posts:index', ()),
+            ('posts:profile', ('author',)),
+            ('posts:post_detail', (5,)),
+            ('posts:group_list', ('slug',)),
+        )
+        for viewname, args in routes:
+            with self.subTest(viewname=viewname):
+                self.assertEqual(
+                    cached_reverse(viewname, *args),
+                    reverse(viewname, args=args)
+                )
+                self.assertEqual(
+                    cached_reverse(viewname, *args),
+                    reverse(viewname, args=args)
+                )
+        info = reverse_with_args.cache_info()
+        self.assertEqual(info.hits, 3)
+        self.assertEqual(info.maxsize, URL_CACHE_SIZE)
+
+    def test_cache_follows_urlconf(self):
+        self.assertEqual(cached_reverse('posts:index'), '/')
+        with override_settings(ROOT_URLCONF=__name__):
+            self.assertEqual(cached_reverse('other'), '/other/')
+
+    def test_template_tag(self):
+        template = Template(
+            "{% load cached_urls %}{% cached_url 'posts:profile' name %}"
+        )
+        self.assertEqual(
+            template.render(Context({'name': 'author'})), '/profile/author/'
+        )
@@ -0,0 +1,40 @@
+from functools import lru_cache
+
+from django.urls import get_script_prefix, get_urlconf, reverse
+
+# Адресов с аргументами столько же, сколько постов, авторов и групп,
+# поэтому их кэш ограничен и вытесняет давно не нужные адреса.
+URL_CACHE_SIZE = 4096
+
+constant_urls = {}
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def reverse_with_args(viewname, args, urlconf, prefix):
+    return reverse(viewname, urlconf=urlconf, args=args)
+
+
+def cached_reverse(viewname, *args):
+    """reverse() с запоминанием результата.
+
+    Адреса без аргументов (меню, главная) хранятся без ограничений,
+    с аргументами — в LRU-кэше на URL_CACHE_SIZE адресов. Аргументы
+    приводятся к строкам, как это делает и сам reverse(). Ключ включает
+    URLconf и префикс скрипта текущего запроса.
+    """
+    urlconf = get_urlconf()
+    prefix = get_script_prefix()
+    if args:
+        return reverse_with_args(
+            viewname, tuple(str(arg) for arg in args), urlconf, prefix
+        )
+    key = (viewname, urlconf, prefix)
+    url = constant_urls.get(key)
+    if url is None:
+        url = constant_urls[key] = reverse(viewname, urlconf=urlconf)
+    return url
+
+
+def clear_url_cache():
+    constant_urls.clear()
+    reverse_with_args.cache_clear()
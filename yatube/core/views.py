@@ -0,0 +1,63 @@
+from collections import defaultdict
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import render
+
+from .perf import records
+
+SLOWEST = 20
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[max(0, round(percent / 100 * len(ordered)) - 1)]
+
+
+@staff_member_required
+def perf_stats(request):
+    sampled = list(records)
+    by_view = defaultdict(list)
+    for record in sampled:
+        by_view[record.view or '-'].append(record)
+    views = []
+    for view, view_records in by_view.items():
+        count = len(view_records)
+        views.append({
+            'view': view,
+            'count': count,
+            'avg_ms': sum(r.total for r in view_records) / count * 1000,
+            'p95_ms': percentile(
+                [r.total for r in view_records], 95
+            ) * 1000,
+            'sql_count': sum(r.sql_count for r in view_records) / count,
+            'sql_ms': sum(r.sql_time for r in view_records) / count * 1000,
+            'template_ms': sum(
+                r.template_time for r in view_records
+            ) / count * 1000,
+            'size': sum(r.size or 0 for r in view_records) // count,
+        })
+    views.sort(key=lambda row: row['avg_ms'] * row['count'], reverse=True)
+    templates = defaultdict(lambda: [0, 0.0])
+    for record in sampled:
+        for name, (count, elapsed) in record.templates.items():
+            templates[name][0] += count
+            templates[name][1] += elapsed
+    context = {
+        'views': views,
+        'slowest': sorted(
+            sampled, key=lambda r: r.total, reverse=True
+        )[:SLOWEST],
+        'sampled': len(sampled),
+        'templates': [
+            {
+                'name': name,
+                'count': count,
+                'total_ms': elapsed * 1000,
+                'avg_ms': elapsed / count * 1000,
+            }
+            for name, (count, elapsed) in sorted(
+                templates.items(), key=lambda item: item[1][1], reverse=True
+            )
+        ],
+    }
+    return render(request, 'core/perf_stats.html', context)
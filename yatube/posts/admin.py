@@ -1,6 +1,7 @@
 from django.contrib import admin
 
 from .models import Group, Post
+from .search import matching_posts, query_terms
 
 
 class PostAdmin(admin.ModelAdmin):
@@ -17,6 +18,14 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = ('-пусто-')
 
+    def get_search_results(self, request, queryset, search_term):
+        terms = query_terms(search_term)
+        if not terms:
+            return queryset, False
+        return queryset.filter(
+            pk__in=matching_posts(terms).values('post')
+        ), False
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = (
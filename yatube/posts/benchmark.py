@@ -0,0 +1,136 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from io import BytesIO
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.utils import timezone
+
+from .bulk import explicit_pub_date
+from .counters import rebuild_counters
+from .models import Group, Post
+
+User = get_user_model()
+BATCH_SIZE = 5000
+SEED = 20230215
+
+
+@contextmanager
+def scratch_database(verbosity=0, name=None):
+    """Создаёт пустую тестовую базу на время замера.
+
+    Рабочая база не затрагивается: данные для замеров живут
+    в базе test_<имя>, которая удаляется на выходе. name задаёт
+    имя тестовой базы; для SQLite это файл вместо базы в памяти.
+    """
+    old_name = connection.settings_dict['NAME']
+    old_test_name = connection.settings_dict['TEST']['NAME']
+    if name is not None:
+        connection.settings_dict['TEST']['NAME'] = name
+    connection.creation.create_test_db(
+        verbosity=verbosity, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=verbosity)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+
+
+def default_text(rng, number):
+    return f'Пост номер {number} ' + 'текст ' * rng.randint(5, 60)
+
+
+def seed_posts(posts, authors=100, groups=20, text_factory=default_text,
+               batch_size=BATCH_SIZE, progress=None):
+    """Наполняет базу авторами, группами и постами.
+
+    Даты публикации разбросаны случайно и не совпадают с порядком id,
+    как это бывает после импорта. Возвращает id авторов и групп.
+    """
+    rng = random.Random(SEED)
+    User.objects.bulk_create(
+        User(username=f'bench_{i}', first_name='Автор', last_name=str(i))
+        for i in range(authors)
+    )
+    Group.objects.bulk_create(
+        Group(title=f'Группа {i}', slug=f'bench-{i}', description='')
+        for i in range(groups)
+    )
+    author_ids = list(User.objects.filter(
+        username__startswith='bench_'
+    ).values_list('pk', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith='bench-'
+    ).values_list('pk', flat=True)) + [None]
+    now = timezone.now()
+    with explicit_pub_date():
+        for start in range(0, posts, batch_size):
+            stop = min(start + batch_size, posts)
+            with transaction.atomic():
+                Post.objects.bulk_create(
+                    Post(
+                        text=text_factory(rng, number),
+                        author_id=rng.choice(author_ids),
+                        group_id=rng.choice(group_ids),
+                        pub_date=now - timedelta(
+                            seconds=rng.randrange(posts * 60)
+                        ),
+                    )
+                    for number in range(start, stop)
+                )
+            if progress is not None:
+                progress(stop)
+    rebuild_counters()
+    return author_ids, group_ids[:-1]
+
+
+def best_time(func, repeat):
+    """Лучшее из repeat времён выполнения func, в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+class WSGIDriver:
+    """Прогоняет запросы через WSGI-приложение Django в этом процессе."""
+
+    def __init__(self):
+        self.application = WSGIHandler()
+        self.factory = RequestFactory()
+
+    def request(self, method, path, query='', cookies=None, data=None,
+                headers=None):
+        body = urlencode(data).encode() if data else b''
+        environ = self.factory._base_environ(
+            REQUEST_METHOD=method,
+            PATH_INFO=path,
+            QUERY_STRING=query,
+            CONTENT_TYPE='application/x-www-form-urlencoded',
+            CONTENT_LENGTH=str(len(body)),
+            HTTP_COOKIE='; '.join(
+                f'{name}={value}' for name, value in (cookies or {}).items()
+            ),
+            **(headers or {})
+        )
+        environ['wsgi.input'] = BytesIO(body)
+        status = []
+
+        def start_response(response_status, response_headers, *args):
+            status.append(int(response_status.split()[0]))
+
+        response = self.application(environ, start_response)
+        try:
+            content = b''.join(response)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        return status[0], content
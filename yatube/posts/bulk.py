@@ -0,0 +1,150 @@
+from contextlib import contextmanager
+
+from django.db import connections, transaction
+
+from .models import Post
+
+# Типы полей, значения которых драйвер БД принимает как есть.
+PLAIN_FIELD_TYPES = frozenset((
+    'AutoField', 'BigIntegerField', 'CharField', 'ForeignKey',
+    'IntegerField', 'PositiveIntegerField', 'PositiveSmallIntegerField',
+    'SlugField', 'SmallIntegerField', 'TextField',
+))
+# Предел параметров одного запроса в протоколе PostgreSQL.
+MAX_QUERY_PARAMS = 65535
+
+
+@contextmanager
+def explicit_pub_date():
+    """Позволяет сохранить pub_date, заданную вручную.
+
+    auto_now_add перезаписывает дату при любом INSERT, включая
+    bulk_create, поэтому на время массовой загрузки его отключаем.
+    Рассчитано на management-команды, а не на обработку запросов.
+    """
+    field = Post._meta.get_field('pub_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def insert_rows(model, field_names, rows, using='default'):
+    """Вставляет кортежи значений одним executemany.
+
+    В отличие от bulk_create не создаёт экземпляры моделей
+    и не упирается в лимит параметров SQLite на один запрос,
+    поэтому подходит для миллионов строк. Сигналы не отправляются,
+    значения по умолчанию и auto_now не подставляются.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in field_names]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    prepared = [
+        (index, field) for index, field in enumerate(fields)
+        if field.get_internal_type() not in PLAIN_FIELD_TYPES
+    ]
+    if prepared:
+        rows = (_prepare(row, prepared, connection) for row in rows)
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+
+
+def insert_rows_returning_ids(model, field_names, rows, using='default'):
+    """То же, что insert_rows, но возвращает id вставленных строк.
+
+    Вызывается внутри transaction.atomic. PostgreSQL отдаёт id через
+    RETURNING у многострочного INSERT. SQLite пускает только одного
+    писателя, и блокировка держится с первого INSERT до конца
+    транзакции, поэтому id строк идут подряд и заканчиваются
+    максимальным — чужие вставки в этот диапазон не попадут.
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+    connection = connections[using]
+    pk_column = connection.ops.quote_name(model._meta.pk.column)
+    table = connection.ops.quote_name(model._meta.db_table)
+    if not connection.features.can_return_ids_from_bulk_insert:
+        insert_rows(model, field_names, rows, using=using)
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX({pk_column}) FROM {table}')
+            last_id = cursor.fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+    quote = connection.ops.quote_name
+    fields = [model._meta.get_field(name) for name in field_names]
+    placeholders = '({})'.format(', '.join(['%s'] * len(fields)))
+    batch_size = min(
+        connection.ops.bulk_batch_size(fields, rows),
+        MAX_QUERY_PARAMS // len(fields),
+    )
+    returning, _ = connection.ops.return_insert_id()
+    ids = []
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), batch_size):
+            batch = [
+                _prepare(row, list(enumerate(fields)), connection)
+                for row in rows[start:start + batch_size]
+            ]
+            cursor.execute('INSERT INTO {} ({}) VALUES {} {}'.format(
+                table,
+                ', '.join(quote(field.column) for field in fields),
+                ', '.join([placeholders] * len(batch)),
+                returning % pk_column,
+            ), [value for row in batch for value in row])
+            ids.extend(connection.ops.fetch_returned_insert_ids(cursor))
+    return ids
+
+
+def allocate_ids(model, count, using='default'):
+    """Выдаёт count новых id из автоинкремента таблицы model.
+
+    Строки вставляются и тут же удаляются в отдельной транзакции:
+    после неё выданные id уже не вернутся счётчику, даже если
+    вызывающий код потом откатится. Непрерывность диапазона
+    в SQLite держится на той же блокировке писателя, что
+    и в insert_rows_returning_ids.
+    """
+    if count <= 0:
+        return []
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    table = quote(model._meta.db_table)
+    pk_column = quote(model._meta.pk.column)
+    ids = []
+    with transaction.atomic(using=using), connection.cursor() as cursor:
+        if connection.features.can_return_ids_from_bulk_insert:
+            returning, _ = connection.ops.return_insert_id()
+            for start in range(0, count, MAX_QUERY_PARAMS):
+                size = min(MAX_QUERY_PARAMS, count - start)
+                cursor.execute('INSERT INTO {} ({}) VALUES {} {}'.format(
+                    table, pk_column, ', '.join(['(DEFAULT)'] * size),
+                    returning % pk_column,
+                ))
+                ids.extend(connection.ops.fetch_returned_insert_ids(cursor))
+        else:
+            cursor.executemany(
+                f'INSERT INTO {table} ({pk_column}) VALUES (NULL)',
+                [()] * count
+            )
+            cursor.execute(f'SELECT MAX({pk_column}) FROM {table}')
+            last_id = cursor.fetchone()[0]
+            ids = list(range(last_id - count + 1, last_id + 1))
+        cursor.execute(
+            f'DELETE FROM {table} WHERE {pk_column} BETWEEN %s AND %s',
+            [min(ids), max(ids)]
+        )
+    return ids
+
+
+def _prepare(row, prepared, connection):
+    row = list(row)
+    for index, field in prepared:
+        row[index] = field.get_db_prep_save(row[index], connection)
+    return row
@@ -0,0 +1,118 @@
+import time
+from functools import wraps
+from hashlib import md5
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.http import parse_http_date
+
+from core.routers import primary_reads
+
+from .conditional import conditional_response
+
+GENERATION_KEY = 'posts:generation'
+BUMPED_KEY = 'posts:generation:bumped_at'
+
+
+def page_cache():
+    return caches[settings.POSTS_PAGE_CACHE]
+
+
+def get_generation(cache):
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Начинаем с текущего времени, а не с нуля: если счётчик
+        # вытеснили из кэша, старые страницы не оживут.
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    cache = page_cache()
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+    cache.set(BUMPED_KEY, time.time(), None)
+
+
+def recently_changed(cache):
+    """Изменение могло ещё не дойти до реплик.
+
+    Если отметка потерялась, считаем, что изменение было только что.
+    """
+    bumped_at = cache.get(BUMPED_KEY)
+    if bumped_at is None:
+        cache.add(BUMPED_KEY, time.time(), None)
+        bumped_at = cache.get(BUMPED_KEY)
+    return time.time() - bumped_at < settings.REPLICA_PIN_SECONDS
+
+
+def invalidate_pages():
+    """Сбрасывает все закэшированные страницы лент.
+
+    Повторный сброс после коммита нужен, чтобы страница,
+    собранная параллельным запросом до коммита, не осталась в кэше.
+    """
+    bump_generation()
+    transaction.on_commit(bump_generation)
+
+
+def page_key(request, view_name, kwargs, generation):
+    parts = [view_name]
+    parts.extend(f'{name}={value}' for name, value in sorted(kwargs.items()))
+    parts.append(request.GET.get('page', ''))
+    parts.append(request.GET.get('cursor', ''))
+    digest = md5('|'.join(parts).encode()).hexdigest()
+    return f'posts:page:v2:{generation}:{digest}'
+
+
+def cache_page_for_guests(view):
+    """Кэширует страницу ленты для анонимных посетителей.
+
+    Ключ зависит от номера страницы или курсора и от поколения,
+    которое увеличивается при любом изменении постов, поэтому
+    время жизни записи нужно только для вытеснения. Вместе со
+    страницей хранятся её ETag и Last-Modified: повторный запрос
+    с ними получает 304 без обращения к базе. В течение
+    REPLICA_PIN_SECONDS после изменения страница собирается
+    с основной базы.
+    """
+    @wraps(view)
+    def wrapper(request, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return view(request, **kwargs)
+        cache = page_cache()
+        key = page_key(request, view.__name__, kwargs, get_generation(cache))
+        cached = cache.get(key)
+        if cached is not None:
+            content, etag, last_modified = cached
+            response = HttpResponse(content)
+            if etag is None:
+                return response
+            return conditional_response(
+                request, response, etag, parse_http_date(last_modified)
+            )
+        if settings.DATABASE_REPLICAS and recently_changed(cache):
+            # Страница попадёт в кэш под новым поколением, поэтому
+            # её нельзя собирать с реплики, которая ещё отстаёт.
+            with primary_reads():
+                response = view(request, **kwargs)
+        else:
+            response = view(request, **kwargs)
+        if response.status_code == HTTPStatus.OK:
+            cache.set(
+                key,
+                (
+                    response.content,
+                    response.get('ETag'),
+                    response.get('Last-Modified'),
+                ),
+                settings.POSTS_PAGE_CACHE_TIMEOUT
+            )
+        return response
+    return wrapper
@@ -0,0 +1,106 @@
+from functools import wraps
+from hashlib import md5
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+TOUCHED_KEY = 'posts:touched_at'
+
+
+def touch():
+    """Отмечает изменение, которое не видно по Post.updated_at.
+
+    Это удаление поста, правка группы или подписки: страницы,
+    отданные раньше, после этого нельзя подтверждать ответом 304.
+    """
+    cache.set(TOUCHED_KEY, timezone.now(), None)
+
+
+def last_modified(posts):
+    """Время последнего изменения постов выборки — один запрос к индексу.
+
+    posts может быть списком выборок с разных шардов.
+    """
+    if not isinstance(posts, list):
+        posts = [posts]
+    return latest_change(
+        shard.aggregate(latest=Max('updated_at'))['latest']
+        for shard in posts
+    )
+
+
+def touched_at():
+    """Время последнего touch().
+
+    Отметка хранится в общем кэше без срока. Если кэш её потерял,
+    отметкой становится текущее время: все ранее выданные валидаторы
+    перестают совпадать, и удаление не останется незамеченным.
+    """
+    touched = cache.get(TOUCHED_KEY)
+    if touched is None:
+        cache.add(TOUCHED_KEY, timezone.now(), None)
+        touched = cache.get(TOUCHED_KEY)
+    return touched
+
+
+def latest_change(times):
+    """Самое позднее из времён изменения и отметки touch()."""
+    times = [*times, touched_at()]
+    times = [value for value in times if value is not None]
+    return max(times) if times else None
+
+
+def page_etag(request, view_name, kwargs, modified):
+    parts = [view_name, modified.isoformat(), str(request.user.pk or '')]
+    parts.extend(f'{name}={value}' for name, value in sorted(kwargs.items()))
+    parts.append(request.GET.get('page', ''))
+    parts.append(request.GET.get('cursor', ''))
+    return quote_etag(md5('|'.join(parts).encode()).hexdigest())
+
+
+def conditional_response(request, response, etag, timestamp):
+    """Ставит валидаторы на ответ; если клиент их прислал, отдаёт 304."""
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(timestamp)
+    # Браузер должен каждый раз переспрашивать сервер,
+    # а не показывать страницу из своего кэша наугад.
+    patch_cache_control(response, no_cache=True)
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True)
+    return get_conditional_response(
+        request, etag=etag, last_modified=timestamp, response=response
+    )
+
+
+def conditional_page(scope, modified=last_modified):
+    """Отвечает 304 Not Modified, если страница не менялась.
+
+    scope(**kwargs) возвращает выборку постов, от которых зависит
+    страница. Валидаторы считаются по максимальному updated_at
+    выборки, без построения самой страницы. modified(scope) можно
+    заменить, если время изменения известно без запроса.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, **kwargs)
+            changed = modified(scope(**kwargs))
+            if changed is None:
+                return view(request, **kwargs)
+            etag = page_etag(request, view.__name__, kwargs, changed)
+            timestamp = int(changed.timestamp())
+            response = get_conditional_response(
+                request, etag=etag, last_modified=timestamp
+            )
+            if response is None:
+                response = view(request, **kwargs)
+                if response.status_code != HTTPStatus.OK:
+                    return response
+            return conditional_response(request, response, etag, timestamp)
+        return wrapper
+    return decorator
@@ -0,0 +1,135 @@
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import AuthorStat, Follow, Group, Post
+from .sharding import each_shard, for_author
+from .sharding import enabled as sharded
+
+
+def create_author_stat(author_id):
+    """Создаёт строку счётчиков автора, посчитав всё один раз."""
+    AuthorStat.objects.get_or_create(
+        author_id=author_id,
+        defaults={
+            'posts_count': for_author(
+                Post.objects.filter(author_id=author_id), author_id
+            ).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=author_id
+            ).count(),
+        }
+    )
+
+
+def change_author_stat(author_id, field, delta):
+    updated = AuthorStat.objects.filter(author_id=author_id).update(
+        **{field: F(field) + delta}
+    )
+    if not updated and delta > 0:
+        # Строки ещё нет: считаем один раз, дальше только инкременты.
+        create_author_stat(author_id)
+
+
+def change_author_count(author_id, delta):
+    change_author_stat(author_id, 'posts_count', delta)
+
+
+def change_author_followers(author_id, delta):
+    change_author_stat(author_id, 'followers_count', delta)
+
+
+def change_group_count(group_id, delta):
+    if group_id is None:
+        return
+    Group.objects.filter(pk=group_id).update(
+        posts_count=F('posts_count') + delta
+    )
+
+
+def change_group_followers(group_id, delta):
+    Group.objects.filter(pk=group_id).update(
+        followers_count=F('followers_count') + delta
+    )
+
+
+def author_posts_count(author_id):
+    posts_count = AuthorStat.objects.filter(
+        author_id=author_id
+    ).values_list('posts_count', flat=True).first()
+    return posts_count or 0
+
+
+def post_author_posts_count(post_id):
+    """Число постов автора поста: не нужно ждать загрузки самого поста."""
+    posts_count = AuthorStat.objects.filter(
+        author__posts=post_id
+    ).values_list('posts_count', flat=True).first()
+    return posts_count or 0
+
+
+def group_posts_count(group_id):
+    posts_count = Group.objects.filter(
+        pk=group_id
+    ).values_list('posts_count', flat=True).first()
+    return posts_count or 0
+
+
+def count_by(field, posts):
+    """Число постов на каждое значение field по всем шардам."""
+    counts = Counter()
+    for shard in each_shard(posts):
+        counts.update(dict(
+            shard.values(field).annotate(
+                count=Count('pk')
+            ).order_by().values_list(field, 'count')
+        ))
+    return counts
+
+
+def rebuild_counters():
+    """Пересчитывает все счётчики по таблицам постов и подписок.
+
+    Возвращает количество авторов со счётчиком и количество групп.
+    """
+    posts = count_by('author', Post.objects.all())
+    followers = dict(
+        Follow.objects.filter(author__isnull=False).values('author').annotate(
+            count=Count('pk')
+        ).order_by().values_list('author', 'count')
+    )
+    AuthorStat.objects.all().delete()
+    stats = AuthorStat.objects.bulk_create(
+        AuthorStat(
+            author_id=author_id,
+            posts_count=posts.get(author_id, 0),
+            followers_count=followers.get(author_id, 0),
+        )
+        for author_id in posts.keys() | followers.keys()
+    )
+    group_counts = Post.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group').annotate(
+        count=Count('pk')
+    ).values('count')
+    group_followers = Follow.objects.filter(
+        group=OuterRef('pk')
+    ).order_by().values('group').annotate(
+        count=Count('pk')
+    ).values('count')
+    if not sharded():
+        groups = Group.objects.update(
+            posts_count=Coalesce(Subquery(group_counts), 0),
+            followers_count=Coalesce(Subquery(group_followers), 0),
+        )
+        return len(stats), groups
+    # Посты в других базах: подзапрос к ним не дотянется.
+    groups = Group.objects.update(
+        posts_count=0,
+        followers_count=Coalesce(Subquery(group_followers), 0),
+    )
+    group_posts = count_by('group', Post.objects.filter(group__isnull=False))
+    for group_id, count in group_posts.items():
+        Group.objects.filter(pk=group_id).update(posts_count=count)
+    return len(stats), groups
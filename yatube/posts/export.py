@@ -0,0 +1,72 @@
+import csv
+import json
+from heapq import merge
+from operator import itemgetter
+
+from .pagination import FEED_ORDER, older_than
+
+BATCH_SIZE = 2000
+# Те же поля, что читает import_posts.
+EXPORT_FIELDS = ('text', 'author', 'group', 'pub_date')
+
+
+def iter_posts(queryset, batch_size=BATCH_SIZE):
+    """Отдаёт посты словарями от новых к старым.
+
+    Пачки выбираются по ключу (pub_date, id), как в keyset-пагинации,
+    и читаются через iterator(), так что в памяти никогда не больше
+    одной пачки, а первая строка готова после первого запроса.
+    queryset может быть списком выборок с разных шардов
+    (sharding.scatter): их потоки сливаются по тому же ключу.
+    """
+    if not isinstance(queryset, list):
+        queryset = [queryset]
+    streams = [keyed_records(posts, batch_size) for posts in queryset]
+    for _, record in merge(*streams, key=itemgetter(0), reverse=True):
+        yield record
+
+
+def keyed_records(queryset, batch_size):
+    rows = queryset.order_by(*FEED_ORDER).values_list(
+        'pk', 'pub_date', 'text', 'author__username', 'group__slug'
+    )
+    batch = rows
+    while True:
+        fetched = 0
+        for pk, pub_date, text, author, group in batch[:batch_size].iterator(
+                chunk_size=batch_size):
+            fetched += 1
+            yield (pub_date, pk), {
+                'text': text,
+                'author': author,
+                'group': group or '',
+                'pub_date': pub_date.isoformat(),
+            }
+        if fetched < batch_size:
+            return
+        batch = rows.filter(older_than(pub_date, pk))
+
+
+def jsonl_lines(records):
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект, который возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(records):
+    writer = csv.DictWriter(Echo(), fieldnames=EXPORT_FIELDS)
+    yield writer.writeheader()
+    for record in records:
+        yield writer.writerow(record)
+
+
+FORMATS = {
+    'jsonl': (jsonl_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,225 @@
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from .bulk import insert_rows
+from .counters import change_author_followers, change_group_followers
+from .models import AuthorStat, Follow, Group, Post, TimelineEntry
+from .pagination import (BACKWARD, FEED_ORDER, FORWARD, REVERSED_FEED_ORDER,
+                         KeysetPage, decode_cursor, newer_than, older_than)
+from .sharding import each_shard, for_author, get_post, in_bulk
+
+TIMELINE_FIELDS = ('user', 'post', 'pub_date', 'author', 'group')
+FANOUT_BATCH_SIZE = 1000
+
+
+def is_celebrity(followers_count):
+    """Посты таких авторов и групп читаются из ленты при запросе."""
+    return followers_count >= settings.FEED_FANOUT_LIMIT
+
+
+def followers_count(author_id=None, group_id=None):
+    if author_id is not None:
+        stats = AuthorStat.objects.filter(author_id=author_id)
+    else:
+        stats = Group.objects.filter(pk=group_id)
+    return stats.values_list('followers_count', flat=True).first() or 0
+
+
+def fan_out(post_id):
+    """Раскладывает пост по лентам подписчиков автора и группы.
+
+    Подписчиков «звёзд» пропускаем: эти посты лента читает сама.
+    Повторный вызов для того же поста ничего не дублирует.
+    """
+    post = get_post(
+        Post.objects.only('author_id', 'group_id', 'pub_date'), post_id
+    )
+    if post is None:
+        return 0
+    targets = Q()
+    if not is_celebrity(followers_count(author_id=post.author_id)):
+        targets |= Q(author_id=post.author_id)
+    if (post.group_id is not None
+            and not is_celebrity(followers_count(group_id=post.group_id))):
+        targets |= Q(group_id=post.group_id)
+    if not targets:
+        return 0
+    followers = Follow.objects.filter(targets).values_list(
+        'user_id', flat=True
+    ).distinct().order_by().iterator()
+    fanned = 0
+    with transaction.atomic():
+        TimelineEntry.objects.filter(post_id=post_id).delete()
+        while True:
+            batch = list(islice(followers, FANOUT_BATCH_SIZE))
+            if not batch:
+                return fanned
+            insert_rows(TimelineEntry, TIMELINE_FIELDS, (
+                (user_id, post_id, post.pub_date, post.author_id,
+                 post.group_id)
+                for user_id in batch
+            ))
+            fanned += len(batch)
+
+
+def subscription_posts(author_id=None, group_id=None):
+    """Выборки постов автора или группы — по одной на шард."""
+    if author_id is not None:
+        return [for_author(
+            Post.objects.filter(author_id=author_id), author_id
+        )]
+    return each_shard(Post.objects.filter(group_id=group_id))
+
+
+def backfill(user_id, post_lists):
+    """Добавляет в ленту последние посты новой подписки.
+
+    post_lists — выборки постов по шардам (subscription_posts):
+    их начала сливаются, уже разложенные посты пропускаются.
+    """
+    size = settings.FEED_BACKFILL_SIZE
+    latest = list(islice(merge(*(
+        posts.order_by(*FEED_ORDER).values_list(
+            'pub_date', 'pk', 'author_id', 'group_id'
+        )[:size]
+        for posts in post_lists
+    ), reverse=True), size))
+    present = set(TimelineEntry.objects.filter(
+        user_id=user_id, post_id__in=[row[1] for row in latest]
+    ).values_list('post_id', flat=True))
+    insert_rows(TimelineEntry, TIMELINE_FIELDS, (
+        (user_id, pk, pub_date, author_id, group_id)
+        for pub_date, pk, author_id, group_id in latest
+        if pk not in present
+    ))
+
+
+def backfill_followers(author_id=None, group_id=None):
+    """Заполняет ленты всех подписчиков автора или группы.
+
+    Нужно, когда автор или группа перестали быть «звездой»: их посты
+    больше не читаются при запросе, а разложены по лентам только
+    новые.
+    """
+    if author_id is not None:
+        follows = Follow.objects.filter(author_id=author_id)
+    else:
+        follows = Follow.objects.filter(group_id=group_id)
+    post_lists = subscription_posts(author_id, group_id)
+    with transaction.atomic():
+        for user_id in follows.values_list('user_id', flat=True).iterator():
+            backfill(user_id, post_lists)
+
+
+@transaction.atomic
+def follow(user, author=None, group=None):
+    """Подписывает user на автора или группу; False, если уже подписан."""
+    _, created = Follow.objects.get_or_create(
+        user=user, author=author, group=group
+    )
+    if not created:
+        return False
+    if author is not None:
+        change_author_followers(author.pk, 1)
+        if not is_celebrity(followers_count(author_id=author.pk)):
+            backfill(user.pk, subscription_posts(author_id=author.pk))
+    else:
+        change_group_followers(group.pk, 1)
+        if not is_celebrity(followers_count(group_id=group.pk)):
+            backfill(user.pk, subscription_posts(group_id=group.pk))
+    return True
+
+
+@transaction.atomic
+def unfollow(user, author=None, group=None):
+    from .tasks import backfill_followers_task
+
+    deleted, _ = Follow.objects.filter(
+        user=user, author=author, group=group
+    ).delete()
+    if not deleted:
+        return False
+    if author is not None:
+        change_author_followers(author.pk, -1)
+        target = {'author_id': author.pk}
+        key = f'posts.backfill_followers:author:{author.pk}'
+        entries = user.timeline.filter(author=author)
+    else:
+        change_group_followers(group.pk, -1)
+        target = {'group_id': group.pk}
+        key = f'posts.backfill_followers:group:{group.pk}'
+        entries = user.timeline.filter(group=group)
+    if followers_count(**target) == settings.FEED_FANOUT_LIMIT - 1:
+        # Автор или группа перестали быть «звездой»: их посты теперь
+        # читаются из лент, и старые посты нужно туда разложить.
+        backfill_followers_task.enqueue(target, key=key)
+    # Посты, которые приходят и по другой подписке, остаются в ленте.
+    follows = user.follows.all()
+    entries.exclude(
+        author__in=follows.filter(author__isnull=False).values('author')
+    ).exclude(
+        group__in=follows.filter(group__isnull=False).values('group')
+    ).delete()
+    return True
+
+
+def celebrity_posts(user):
+    """Посты «звёзд», на которых подписан user, по шардам, или None."""
+    follows = user.follows.filter(
+        Q(author__stat__followers_count__gte=settings.FEED_FANOUT_LIMIT)
+        | Q(group__followers_count__gte=settings.FEED_FANOUT_LIMIT)
+    ).values_list('author_id', 'group_id')
+    authors, groups = set(), set()
+    for author_id, group_id in follows:
+        if author_id is not None:
+            authors.add(author_id)
+        else:
+            groups.add(group_id)
+    if not authors and not groups:
+        return None
+    return each_shard(
+        Post.objects.filter(Q(author__in=authors) | Q(group__in=groups))
+    )
+
+
+def timeline_page(user, token, per_page):
+    """Страница ленты подписок с курсором по (pub_date, id).
+
+    Разложенные посты читаются одним проходом по индексу ленты,
+    посты «звёзд» — отдельным запросом; обе выборки сливаются.
+    """
+    sources = [(user.timeline.all(), 'post_id')]
+    post_lists = celebrity_posts(user)
+    if post_lists is not None:
+        sources.extend((posts, 'pk') for posts in post_lists)
+    cursor = decode_cursor(token)
+    direction = cursor[0] if cursor else None
+    backward = direction == BACKWARD
+    keys = []
+    for queryset, pk_field in sources:
+        if cursor is not None:
+            _, pub_date, pk = cursor
+            after = newer_than if backward else older_than
+            queryset = queryset.filter(after(pub_date, pk, pk_field))
+        order = REVERSED_FEED_ORDER if backward else FEED_ORDER
+        order = [name.replace('pk', pk_field) for name in order]
+        keys.append(list(
+            queryset.order_by(*order).values_list('pub_date', pk_field)
+            [:per_page + 1]
+        ))
+    keys = list(dict.fromkeys(merge(*keys, reverse=not backward)))
+    has_more = len(keys) > per_page
+    keys = keys[:per_page]
+    if backward:
+        keys.reverse()
+    found = in_bulk(Post.objects.for_feed(), (pk for _, pk in keys))
+    page = [found[pk] for _, pk in keys if pk in found]
+    if backward:
+        return KeysetPage(page, has_next=True, has_previous=has_more)
+    return KeysetPage(
+        page, has_next=has_more, has_previous=direction == FORWARD
+    )
@@ -1,12 +1,104 @@
-from django.forms import ModelForm
+from django.core.exceptions import ValidationError
+from django.forms import ModelChoiceField, ModelForm, Widget
+from django.urls import reverse
+from django.utils.html import format_html
 
-from .models import Post
+from .models import Group, Post
+from .registry import groups
+
+
+def group_pk(value):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
+class SearchText(str):
+    """Текст из поля поиска группы — в отличие от id из скрытого поля."""
+
+
+def find_group(value):
+    """Группа по id из скрытого поля или по введённому slug или названию.
+
+    Без JavaScript или до ответа подсказок скрытое поле пустое,
+    и тогда форма получает текст, набранный в поле поиска. Такой
+    текст никогда не считается id, даже если состоит из цифр.
+    """
+    if not isinstance(value, SearchText):
+        pk = group_pk(value)
+        return groups.get_many([pk]).get(pk) if pk is not None else None
+    value = value.strip()
+    group = groups.get_by_slug(value.lower())
+    if group is None:
+        # Точное совпадение, как у подсказок (views.prefix_range):
+        # title__iexact в SQLite не использует индекс.
+        titles = {value, value[:1].upper() + value[1:]}
+        found = list(Group.objects.filter(title__in=titles)[:2])
+        group = found[0] if len(found) == 1 else None
+    return group
+
+
+class GroupAutocompleteWidget(Widget):
+    """Поле поиска группы с подсказками и скрытым полем с её id.
+
+    Список групп в страницу не попадает: подсказки загружаются
+    по первым буквам из posts:group_autocomplete.
+    """
+
+    class Media:
+        js = ('js/group_autocomplete.js',)
+
+    def value_from_datadict(self, data, files, name):
+        if data.get(name):
+            return data[name]
+        typed = data.get(f'{name}_search')
+        return SearchText(typed) if typed else typed
+
+    def render(self, name, value, attrs=None, renderer=None):
+        attrs = self.build_attrs(self.attrs, attrs)
+        field_id = attrs.get('id', f'id_{name}')
+        pk = None if isinstance(value, SearchText) else group_pk(value)
+        if pk is None:
+            pk, shown = '', value or ''
+        else:
+            group = groups.get_many([pk]).get(pk)
+            shown = group.title if group else ''
+        return format_html(
+            '<input type="hidden" name="{}" id="{}" value="{}">'
+            '<input type="search" class="form-control" name="{}_search" '
+            'id="{}_search" value="{}" list="{}_options" autocomplete="off" '
+            'placeholder="Начните вводить название группы" '
+            'data-group-autocomplete data-target="{}" data-url="{}">'
+            '<datalist id="{}_options"></datalist>',
+            name, field_id, pk, name, field_id, shown, field_id, field_id,
+            reverse('posts:group_autocomplete'), field_id,
+        )
+
+
+class GroupChoiceField(ModelChoiceField):
+    """Выбор группы по id без построения полного списка вариантов."""
+
+    widget = GroupAutocompleteWidget
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        group = find_group(value)
+        if group is None:
+            raise ValidationError(
+                self.error_messages['invalid_choice'], code='invalid_choice'
+            )
+        return group
 
 
 class PostForm(ModelForm):
     class Meta:
         model = Post
         fields = ('text', 'group')
+        field_classes = {
+            'group': GroupChoiceField,
+        }
         labels = {
             'group': 'Группа',
             'text': 'Текст поста',
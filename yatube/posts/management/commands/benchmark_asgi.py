@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client
+from django.urls import reverse
+
+from core.asgi import ASGIHandler
+from posts.benchmark import SEED, WSGIDriver, scratch_database, seed_posts
+from posts.models import Post
+
+from .benchmark_urls import PERCENTILES, percentile
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI при одинаковом числе рабочих потоков: '
+        'клиенты запрашивают страницы постов и профилей и медленно '
+        'забирают ответ. Результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=10)
+        parser.add_argument(
+            '--latency', type=float, default=50,
+            help='Сколько миллисекунд клиент забирает ответ'
+        )
+
+    def handle(self, *args, **options):
+        self.options = options
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, 'benchmark.sqlite3')
+        with directory, scratch_database(name=path):
+            author_ids, _ = seed_posts(options['posts'])
+            author = User.objects.get(pk=author_ids[0])
+            self.cookie = self.login(author)
+            self.paths = self.pick_paths(author_ids)
+            connections.close_all()
+            results = {
+                'wsgi': self.report('wsgi', self.run_wsgi()),
+                'asgi': self.report('asgi', self.run_asgi()),
+            }
+            connections.close_all()
+        results['throughput_ratio'] = round(
+            results['asgi']['requests_per_second']
+            / results['wsgi']['requests_per_second'], 2
+        )
+        results['meta'] = {
+            key: options[key]
+            for key in ('posts', 'workers', 'clients', 'requests', 'latency')
+        }
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def login(self, author):
+        client = Client()
+        client.force_login(author)
+        return {settings.SESSION_COOKIE_NAME: client.cookies[
+            settings.SESSION_COOKIE_NAME
+        ].value}
+
+    def pick_paths(self, author_ids):
+        # Страницы авторизованного пользователя не берутся из кэша.
+        rng = random.Random(SEED)
+        post_ids = list(Post.objects.values_list('pk', flat=True))
+        usernames = dict(
+            User.objects.filter(pk__in=author_ids)
+            .values_list('pk', 'username')
+        )
+        paths = []
+        for _ in range(self.options['clients'] * self.options['requests']):
+            if rng.random() < 0.7:
+                paths.append(reverse(
+                    'posts:post_detail',
+                    kwargs={'post_id': rng.choice(post_ids)}
+                ))
+            else:
+                paths.append(reverse(
+                    'posts:profile',
+                    kwargs={'username': usernames[rng.choice(author_ids)]}
+                ))
+        return paths
+
+    def client_paths(self, number):
+        count = self.options['requests']
+        return self.paths[number * count:(number + 1) * count]
+
+    def run_wsgi(self):
+        """Синхронный сервер: поток занят, пока клиент забирает ответ."""
+        driver = WSGIDriver()
+        latency = self.options['latency'] / 1000
+        timings = []
+        lock = threading.Lock()
+
+        def serve(path):
+            status, _ = driver.request('GET', path, cookies=self.cookie)
+            time.sleep(latency)
+            return status
+
+        def client(pool, number):
+            for path in self.client_paths(number):
+                started = time.perf_counter()
+                pool.submit(serve, path).result()
+                with lock:
+                    timings.append(time.perf_counter() - started)
+
+        pool = ThreadPoolExecutor(
+            self.options['workers'], thread_name_prefix='wsgi'
+        )
+        started = time.perf_counter()
+        clients = [
+            threading.Thread(target=client, args=(pool, number))
+            for number in range(self.options['clients'])
+        ]
+        for thread in clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        pool.shutdown()
+        return elapsed, timings
+
+    def run_asgi(self):
+        """ASGI: медленную отдачу ответа ждёт цикл событий, а не поток."""
+        handler = ASGIHandler(threads=self.options['workers'])
+        latency = self.options['latency'] / 1000
+        timings = []
+        cookie = '; '.join(
+            f'{name}={value}' for name, value in self.cookie.items()
+        ).encode()
+
+        async def request(path):
+            scope = {
+                'type': 'http',
+                'method': 'GET',
+                'path': path,
+                'query_string': b'',
+                'headers': [(b'cookie', cookie)],
+            }
+
+            async def receive():
+                return {'type': 'http.request', 'body': b''}
+
+            async def send(message):
+                if (message['type'] == 'http.response.body'
+                        and not message.get('more_body')):
+                    await asyncio.sleep(latency)
+
+            await handler(scope, receive, send)
+
+        async def client(number):
+            for path in self.client_paths(number):
+                started = time.perf_counter()
+                await request(path)
+                timings.append(time.perf_counter() - started)
+
+        async def main():
+            await asyncio.gather(*(
+                client(number) for number in range(self.options['clients'])
+            ))
+
+        started = time.perf_counter()
+        asyncio.run(main())
+        elapsed = time.perf_counter() - started
+        handler.executor.shutdown()
+        return elapsed, timings
+
+    def report(self, name, measured):
+        elapsed, timings = measured
+        timings = [timing * 1000 for timing in timings]
+        result = {
+            'requests_per_second': round(len(timings) / elapsed, 1),
+            'mean_ms': round(statistics.mean(timings), 1),
+        }
+        for percent in PERCENTILES:
+            result[f'p{percent}_ms'] = round(percentile(timings, percent), 1)
+        self.stderr.write(
+            f'{name}: {result["requests_per_second"]} запросов/с, '
+            f'p50 {result["p50_ms"]} мс'
+        )
+        return result
@@ -0,0 +1,137 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from posts.benchmark import SEED, WSGIDriver, scratch_database, seed_posts
+from posts.models import Post
+
+User = get_user_model()
+
+# Настройки SQLite до профилей: журнал отката и fsync на каждом
+# коммите, новое соединение на каждый запрос.
+BASELINE = {
+    'CONN_MAX_AGE': 0,
+    'SQLITE_PRAGMAS': {'journal_mode': 'delete', 'synchronous': 'full'},
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает пропускную способность базы со старыми и новыми '
+        'настройками: читатели запрашивают страницы через WSGI, '
+        'писатель параллельно создаёт посты. Результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=5000)
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5.0)
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('Замер рассчитан на SQLite')
+        self.options = options
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, 'benchmark.sqlite3')
+        with directory, scratch_database(name=path):
+            author_ids, _ = seed_posts(options['posts'])
+            self.author = User.objects.get(pk=author_ids[0])
+            self.post_ids = list(Post.objects.values_list('pk', flat=True))
+            results = {
+                'baseline': self.measure(**BASELINE),
+                'tuned': self.measure(
+                    CONN_MAX_AGE=settings.CONN_MAX_AGE or 600,
+                    SQLITE_PRAGMAS=settings.SQLITE_PRAGMAS,
+                ),
+            }
+        for name in ('reads_per_second', 'writes_per_second'):
+            results[f'{name}_ratio'] = round(
+                results['tuned'][name] / max(results['baseline'][name], 1), 2
+            )
+        self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+
+    def login(self):
+        client = Client()
+        client.force_login(self.author)
+        return {settings.SESSION_COOKIE_NAME: client.cookies[
+            settings.SESSION_COOKIE_NAME
+        ].value}
+
+    def measure(self, CONN_MAX_AGE, SQLITE_PRAGMAS):
+        # Новые PRAGMA применяются только к новым соединениям.
+        connections.close_all()
+        connection.settings_dict['CONN_MAX_AGE'] = CONN_MAX_AGE
+        stop = threading.Event()
+        counts = {'reads': 0, 'writes': 0, 'errors': 0}
+        lock = threading.Lock()
+        with override_settings(SQLITE_PRAGMAS=SQLITE_PRAGMAS):
+            # Страницы авторизованного пользователя не попадают
+            # в кэш страниц, поэтому каждый запрос доходит до базы.
+            cookies = self.login()
+            workers = [
+                threading.Thread(
+                    target=self.read, args=(stop, counts, lock, cookies, i)
+                )
+                for i in range(self.options['readers'])
+            ]
+            workers.append(
+                threading.Thread(target=self.write, args=(stop, counts, lock))
+            )
+            started = time.perf_counter()
+            for worker in workers:
+                worker.start()
+            time.sleep(self.options['seconds'])
+            stop.set()
+            for worker in workers:
+                worker.join()
+            elapsed = time.perf_counter() - started
+        connections.close_all()
+        result = {
+            'conn_max_age': CONN_MAX_AGE,
+            'pragmas': SQLITE_PRAGMAS,
+            'reads_per_second': round(counts['reads'] / elapsed, 1),
+            'writes_per_second': round(counts['writes'] / elapsed, 1),
+            'errors': counts['errors'],
+        }
+        self.stderr.write(
+            f'CONN_MAX_AGE={CONN_MAX_AGE} {SQLITE_PRAGMAS}: '
+            f'чтений {result["reads_per_second"]}/с, '
+            f'записей {result["writes_per_second"]}/с'
+        )
+        return result
+
+    def read(self, stop, counts, lock, cookies, number):
+        driver = WSGIDriver()
+        rng = random.Random(SEED + number)
+        try:
+            while not stop.is_set():
+                path = reverse(
+                    'posts:post_detail',
+                    kwargs={'post_id': rng.choice(self.post_ids)}
+                )
+                status, _ = driver.request('GET', path, cookies=cookies)
+                with lock:
+                    counts['reads' if status == 200 else 'errors'] += 1
+        finally:
+            connections.close_all()
+
+    def write(self, stop, counts, lock):
+        try:
+            while not stop.is_set():
+                Post.objects.create(
+                    text='Пост из замера базы', author=self.author
+                )
+                with lock:
+                    counts['writes'] += 1
+        finally:
+            connections.close_all()
@@ -0,0 +1,70 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+
+from posts.benchmark import best_time, scratch_database, seed_posts
+from posts.models import Post
+from posts.pagination import FEED_ORDER
+from posts.views import POSTS_NUM
+
+
+def feed_queries():
+    author_id = Post.objects.values('author').annotate(
+        count=Count('pk')
+    ).order_by('-count').values_list('author', flat=True).first()
+    group_id = Post.objects.filter(group__isnull=False).values(
+        'group'
+    ).annotate(count=Count('pk')).order_by(
+        '-count'
+    ).values_list('group', flat=True).first()
+    feed = Post.objects.for_feed().order_by(*FEED_ORDER)
+    return {
+        'index': feed[:POSTS_NUM],
+        'profile': feed.filter(author_id=author_id)[:POSTS_NUM],
+        'group_list': feed.filter(group_id=group_id)[:POSTS_NUM],
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную базу постами и сравнивает планы и время '
+        'запросов лент без индексов и с индексами Post.Meta.indexes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--authors', type=int, default=100)
+        parser.add_argument('--groups', type=int, default=20)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        with scratch_database():
+            self.stdout.write(f'Наполняем базу: {options["posts"]} постов')
+            seed_posts(
+                options['posts'],
+                authors=options['authors'],
+                groups=options['groups'],
+            )
+            with connection.schema_editor() as editor:
+                for index in Post._meta.indexes:
+                    editor.remove_index(Post, index)
+            before = self.measure('без индексов', options['repeat'])
+            with connection.schema_editor() as editor:
+                for index in Post._meta.indexes:
+                    editor.add_index(Post, index)
+            after = self.measure('с индексами', options['repeat'])
+        self.stdout.write(self.style.MIGRATE_HEADING('Итог'))
+        for name, timing in before.items():
+            self.stdout.write(
+                f'{name}: {timing:.2f} мс -> {after[name]:.2f} мс '
+                f'(x{timing / max(after[name], 1e-6):.1f})'
+            )
+
+    def measure(self, title, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        timings = {}
+        for name, queryset in feed_queries().items():
+            timings[name] = best_time(lambda: list(queryset.all()), repeat)
+            self.stdout.write(f'{name}: {timings[name]:.2f} мс')
+            self.stdout.write(queryset.explain())
+        return timings
@@ -0,0 +1,201 @@
+import json
+import platform
+import random
+import re
+import statistics
+import sys
+import time
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.benchmark import SEED, WSGIDriver, scratch_database, seed_posts
+from posts.cache import page_cache
+from posts.models import Group, Post
+
+User = get_user_model()
+TEXT_POOL_SIZE = 1000
+PERCENTILES = (50, 95, 99)
+CSRF_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def faker_texts(size):
+    try:
+        from faker import Faker
+    except ImportError:
+        raise CommandError('Для наполнения базы нужен пакет Faker')
+    fake = Faker('ru_RU')
+    Faker.seed(SEED)
+    rng = random.Random(SEED)
+    pool = [
+        fake.paragraph(nb_sentences=rng.randint(1, 8))
+        for _ in range(size)
+    ]
+    return lambda rng, number: rng.choice(pool)
+
+
+def percentile(timings, percent):
+    ordered = sorted(timings)
+    index = max(0, round(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Наполняет временную базу фейковыми постами и замеряет '
+        'задержки p50/p95/p99, число запросов к БД и размер ответа '
+        'для страниц posts. Результат — JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--authors', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=30)
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--cold-cache', action='store_true',
+            help='Очищать кэш страниц перед каждым запросом'
+        )
+        parser.add_argument('--output', default='-')
+
+    def handle(self, *args, **options):
+        self.options = options
+        with scratch_database():
+            started = time.perf_counter()
+            author_ids, group_ids = seed_posts(
+                options['posts'],
+                authors=options['authors'],
+                groups=options['groups'],
+                text_factory=faker_texts(TEXT_POOL_SIZE),
+                progress=self.progress,
+            )
+            seed_seconds = time.perf_counter() - started
+            self.driver = WSGIDriver()
+            self.cookies = self.login(author_ids[0])
+            results = {
+                name: self.measure(*scenario)
+                for name, scenario in self.scenarios(
+                    author_ids[0], group_ids[0]
+                ).items()
+            }
+        report = {
+            'meta': {
+                'posts': options['posts'],
+                'authors': options['authors'],
+                'groups': options['groups'],
+                'requests': options['requests'],
+                'cold_cache': options['cold_cache'],
+                'seed_seconds': round(seed_seconds, 2),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            },
+            'results': results,
+        }
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output'] == '-':
+            self.stdout.write(output)
+        else:
+            with open(options['output'], 'w', encoding='utf-8') as report:
+                report.write(output + '\n')
+
+    def progress(self, done):
+        sys.stderr.write(f'\rНаполнение: {done}/{self.options["posts"]}')
+        if done == self.options['posts']:
+            sys.stderr.write('\n')
+
+    def login(self, author_id):
+        client = Client()
+        client.force_login(User.objects.get(pk=author_id))
+        return {settings.SESSION_COOKIE_NAME: client.cookies[
+            settings.SESSION_COOKIE_NAME
+        ].value}
+
+    def scenarios(self, author_id, group_id):
+        username = User.objects.get(pk=author_id).username
+        slug = Group.objects.get(pk=group_id).slug
+        post_id = Post.objects.filter(author_id=author_id).values_list(
+            'pk', flat=True
+        ).first()
+        pages = {
+            'index': (reverse('posts:index'), ''),
+            'index_deep': (
+                reverse('posts:index'),
+                f'page={max(1, self.options["posts"] // 20)}'
+            ),
+            'group_posts': (
+                reverse('posts:group_list', kwargs={'slug': slug}), ''
+            ),
+            'profile': (
+                reverse('posts:profile', kwargs={'username': username}), ''
+            ),
+            'post_detail': (
+                reverse('posts:post_detail', kwargs={'post_id': post_id}),
+                ''
+            ),
+        }
+        scenarios = {}
+        for name, (path, query) in pages.items():
+            scenarios[f'{name}:guest'] = ('GET', path, query, False)
+            scenarios[f'{name}:auth'] = ('GET', path, query, True)
+        create = reverse('posts:post_create')
+        scenarios['post_create:auth'] = ('GET', create, '', True)
+        scenarios['post_create_submit:auth'] = ('POST', create, '', True)
+        return scenarios
+
+    def call(self, method, path, query, auth):
+        cookies = dict(self.cookies) if auth else {}
+        data = headers = None
+        if method == 'POST':
+            _, form = self.driver.request('GET', path, cookies=cookies)
+            token = CSRF_RE.search(form).group(1).decode()
+            cookies[settings.CSRF_COOKIE_NAME] = token
+            data = {'text': 'Пост из бенчмарка'}
+            headers = {'HTTP_X_CSRFTOKEN': token}
+        if self.options['cold_cache']:
+            page_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            status, content = self.driver.request(
+                method, path, query, cookies, data, headers
+            )
+            elapsed = time.perf_counter() - started
+        return elapsed, status, len(content), len(queries)
+
+    def measure(self, method, path, query, auth):
+        for _ in range(self.options['warmup']):
+            self.call(method, path, query, auth)
+        timings, statuses, sizes, query_counts = [], set(), [], []
+        for _ in range(self.options['requests']):
+            elapsed, status, size, queries = self.call(
+                method, path, query, auth
+            )
+            timings.append(elapsed * 1000)
+            statuses.add(status)
+            sizes.append(size)
+            query_counts.append(queries)
+        result = {
+            'path': path + (f'?{query}' if query else ''),
+            'method': method,
+            'statuses': sorted(statuses),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': round(statistics.mean(query_counts), 2),
+            'bytes': round(statistics.mean(sizes)),
+        }
+        for percent in PERCENTILES:
+            result[f'p{percent}_ms'] = round(
+                percentile(timings, percent), 3
+            )
+        self.stderr.write(
+            f'{path}?{query} {method} auth={auth}: '
+            f'p50 {result["p50_ms"]} мс, запросов {result["queries"]}'
+        )
+        return result
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.export import BATCH_SIZE, FORMATS, iter_posts
+from posts.models import Post
+from posts.sharding import scatter
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты в JSONL или CSV в файл или stdout; '
+        'результат читается командой import_posts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--author', help='username автора')
+        parser.add_argument('--group', help='slug группы')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument('--output', default='-')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        post_list = Post.objects.all()
+        if options['author']:
+            post_list = post_list.filter(
+                author__username=options['author']
+            )
+        if options['group']:
+            post_list = post_list.filter(group__slug=options['group'])
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size должен быть больше нуля')
+        lines, _ = FORMATS[options['format']]
+        records = iter_posts(scatter(post_list), options['batch_size'])
+        if options['output'] == '-':
+            for line in lines(records):
+                self.stdout.write(line, ending='')
+            return
+        with open(options['output'], 'w', newline='',
+                  encoding='utf-8') as output:
+            output.writelines(lines(records))
@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+from datetime import datetime
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import allocate_ids, insert_rows
+from posts.bulk import insert_rows_returning_ids
+from posts.cache import invalidate_pages
+from posts.counters import change_author_count, change_group_count
+from posts.models import Follow, Group, Post, PostTicket
+from posts.search import index_new_posts
+from posts.sharding import enabled as sharded
+from posts.sharding import shard_for
+from posts.tasks import fan_out_task
+
+User = get_user_model()
+BATCH_SIZE = 5000
+LOOKUP_CHUNK_SIZE = 500
+POST_FIELDS = ('text', 'pub_date', 'updated_at', 'author', 'group')
+
+
+def parse_pub_date(value):
+    """Дата публикации из записи или None, если её не разобрать.
+
+    Время без смещения (и дата без времени) тоже None: угадывать
+    часовой пояс не будем, как и для курсоров ленты.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except TypeError:
+        return None
+    except ValueError:
+        try:
+            parsed = parse_datetime(value)
+        except ValueError:
+            return None
+    if parsed is None or timezone.is_naive(parsed):
+        return None
+    return parsed
+
+
+def read_jsonl(stream):
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+class LookupCache:
+    """Кэш id по натуральному ключу: username автора или slug группы.
+
+    Неизвестные ключи добираются одним запросом на пачку.
+    """
+
+    def __init__(self, queryset, field):
+        self.queryset = queryset
+        self.field = field
+        self.ids = {}
+
+    def load(self, keys):
+        missing = list({key for key in keys if key and key not in self.ids})
+        for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+            chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+            self.ids.update(
+                self.queryset.filter(**{f'{self.field}__in': chunk})
+                .values_list(self.field, 'pk')
+            )
+        for key in missing:
+            self.ids.setdefault(key, None)
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из JSONL или CSV (файл или stdin) пачками '
+        'в транзакциях. Поля: text, author, group, pub_date '
+        '(ISO 8601 со смещением часового пояса)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source', nargs='?', default='-',
+            help='Путь к файлу или «-» для stdin'
+        )
+        parser.add_argument('--format', choices=READERS, default=None)
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+        parser.add_argument(
+            '--no-search-index', action='store_true',
+            help='Не индексировать тексты; потом запустить '
+                 'rebuild_search_index'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='Файл, в котором запоминается число обработанных записей'
+        )
+
+    def handle(self, *args, **options):
+        source = options['source']
+        fmt = options['format'] or (
+            'csv' if source.endswith('.csv') else 'jsonl'
+        )
+        self.checkpoint = options['checkpoint']
+        self.search_index = not options['no_search_index']
+        self.done = self.read_checkpoint()
+        self.authors = LookupCache(User.objects.all(), 'username')
+        self.groups = LookupCache(Group.objects.all(), 'slug')
+        self.imported = 0
+        self.skipped = 0
+        self.started = time.perf_counter()
+        if source == '-':
+            stream = sys.stdin
+        else:
+            stream = open(source, newline='', encoding='utf-8')
+        try:
+            records = islice(READERS[fmt](stream), self.done, None)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                self.import_batch(batch)
+        except (csv.Error, ValueError) as error:
+            raise CommandError(
+                f'Ошибка в записи после {self.done}: {error}'
+            )
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+            if self.imported:
+                invalidate_pages()
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано: {self.imported}, пропущено: {self.skipped}'
+        ))
+
+    def import_batch(self, batch):
+        self.authors.load(record.get('author') for record in batch)
+        self.groups.load(record.get('group') for record in batch)
+        now = timezone.now()
+        rows = []
+        for record in batch:
+            author_id = self.authors.get(record.get('author'))
+            group_slug = record.get('group')
+            group_id = self.groups.get(group_slug)
+            pub_date = record.get('pub_date')
+            pub_date = parse_pub_date(pub_date) if pub_date else now
+            if (not record.get('text') or author_id is None
+                    or (group_slug and group_id is None)
+                    or pub_date is None):
+                self.skipped += 1
+                continue
+            rows.append(
+                (record['text'], pub_date, now, author_id, group_id)
+            )
+        ids = self.insert_sharded(rows) if sharded() else None
+        with transaction.atomic():
+            if ids is None:
+                ids = insert_rows_returning_ids(Post, POST_FIELDS, rows)
+            for author_id, count in Counter(row[3] for row in rows).items():
+                change_author_count(author_id, count)
+            for group_id, count in Counter(row[4] for row in rows).items():
+                change_group_count(group_id, count)
+            if self.search_index:
+                index_new_posts(zip(ids, (row[0] for row in rows)))
+            self.fan_out(ids, rows)
+        self.imported += len(rows)
+        self.done += len(batch)
+        self.write_checkpoint()
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(
+            f'Обработано записей: {self.done} '
+            f'({self.imported / elapsed:.0f} постов/с)'
+        )
+
+    def insert_sharded(self, rows):
+        """Раскладывает посты пачки по шардам авторов.
+
+        id выдаёт PostTicket основной базы, как и при обычном
+        сохранении поста, поэтому они не пересекаются между шардами.
+        """
+        ids = allocate_ids(PostTicket, len(rows))
+        shards = defaultdict(list)
+        for pk, row in zip(ids, rows):
+            shards[shard_for(row[3])].append((pk, *row))
+        for alias, shard_rows in shards.items():
+            with transaction.atomic(using=alias):
+                insert_rows(
+                    Post, ('id', *POST_FIELDS), shard_rows, using=alias
+                )
+        return ids
+
+    def fan_out(self, ids, rows):
+        """Ставит в очередь раскладку постов, у которых есть подписчики."""
+        followed = set(Follow.objects.filter(
+            Q(author__in={row[3] for row in rows})
+            | Q(group__in={row[4] for row in rows if row[4]})
+        ).values_list('author_id', 'group_id').distinct())
+        authors = {author_id for author_id, _ in followed} - {None}
+        groups = {group_id for _, group_id in followed} - {None}
+        for pk, row in zip(ids, rows):
+            if row[3] in authors or row[4] in groups:
+                fan_out_task.enqueue(
+                    {'post_id': pk}, key=f'posts.fan_out:{pk}'
+                )
+
+    def read_checkpoint(self):
+        if not self.checkpoint or not os.path.exists(self.checkpoint):
+            return 0
+        with open(self.checkpoint, encoding='utf-8') as checkpoint:
+            return json.load(checkpoint)['done']
+
+    def write_checkpoint(self):
+        if not self.checkpoint:
+            return
+        temporary = f'{self.checkpoint}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as checkpoint:
+            json.dump({'done': self.done}, checkpoint)
+        os.replace(temporary, self.checkpoint)
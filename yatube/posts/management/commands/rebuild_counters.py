@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов у авторов и групп'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            authors, groups = rebuild_counters()
+        self.stdout.write(self.style.SUCCESS(
+            f'Счётчики пересчитаны: авторов {authors}, групп {groups}'
+        ))
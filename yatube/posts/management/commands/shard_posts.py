@@ -0,0 +1,92 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Max
+
+from posts.bulk import insert_rows
+from posts.models import Group, Post, PostTicket
+from posts.sharding import shard_for
+
+User = get_user_model()
+BATCH_SIZE = 5000
+POST_FIELDS = ('id', 'text', 'pub_date', 'updated_at', 'author', 'group')
+
+
+def copy_missing(model, alias):
+    """Копирует в шард строки модели, которых там ещё нет."""
+    present = set(
+        model._base_manager.using(alias).values_list('pk', flat=True)
+    )
+    rows = [
+        row for row in model._base_manager.using('default').iterator()
+        if row.pk not in present
+    ]
+    model._base_manager.using(alias).bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def reset_tickets(last_id):
+    """Новые посты получат id больше уже существующих."""
+    connection = connections['default']
+    with transaction.atomic():
+        PostTicket.objects.create(pk=last_id)
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(
+                    no_style(), [PostTicket]):
+                cursor.execute(sql)
+        PostTicket.objects.all().delete()
+
+
+class Command(BaseCommand):
+    help = (
+        'Раскладывает посты основной базы по шардам из POST_SHARDS '
+        'с теми же id и копирует туда пользователей и группы. '
+        'Посты в основной базе остаются; схема шардов должна быть '
+        'создана заранее (migrate --database=shardN)'
+    )
+
+    def handle(self, *args, **options):
+        if not settings.POST_SHARDS:
+            raise CommandError('Не заданы шарды: YATUBE_POST_SHARDS')
+        for alias in settings.POST_SHARDS:
+            users = copy_missing(User, alias)
+            groups = copy_missing(Group, alias)
+            self.stdout.write(
+                f'{alias}: пользователей {users}, групп {groups}'
+            )
+        moved = 0
+        last_pk = 0
+        posts = Post.objects.using('default').order_by('pk').values_list(
+            'pk', 'text', 'pub_date', 'updated_at', 'author_id', 'group_id'
+        )
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not batch:
+                break
+            by_shard = defaultdict(list)
+            for row in batch:
+                by_shard[shard_for(row[4])].append(row)
+            for alias, rows in by_shard.items():
+                present = set(
+                    Post.objects.using(alias).filter(
+                        pk__in=[row[0] for row in rows]
+                    ).values_list('pk', flat=True)
+                )
+                rows = [row for row in rows if row[0] not in present]
+                # Даты сохраняются как есть, сигналов нет: счётчики
+                # и индексы уже посчитаны по основной базе.
+                insert_rows(Post, POST_FIELDS, rows, using=alias)
+                moved += len(rows)
+            last_pk = batch[-1][0]
+        last_id = Post.objects.using('default').aggregate(
+            last=Max('pk')
+        )['last']
+        if last_id:
+            reset_tickets(last_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Разложено постов: {moved}'
+        ))
@@ -1,12 +1,35 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
 
+from .sharding import shard_for
+
 User = get_user_model()
 SYMBOLS = 15
+# Колонки, которые карточки постов в лентах не показывают.
+FEED_DEFERRED_FIELDS = (
+    'author__password',
+    'author__last_login',
+    'author__is_superuser',
+    'author__email',
+    'author__is_staff',
+    'author__is_active',
+    'author__date_joined',
+)
+
+
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для лент: автор через JOIN, группа из реестра групп."""
+        from .registry import GroupFromRegistryIterable
+
+        queryset = self.select_related('author').defer(*FEED_DEFERRED_FIELDS)
+        queryset._iterable_class = GroupFromRegistryIterable
+        return queryset
 
 
 class Post(models.Model):
-    objects = None
+    objects = PostQuerySet.as_manager()
     text = models.TextField(
         'Текст поста',
         help_text='Введите текст поста'
@@ -15,6 +38,11 @@ class Post(models.Model):
         'Дата публикации',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -34,14 +62,199 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:SYMBOLS]
 
+    def save(self, *args, **kwargs):
+        if settings.POST_SHARDS:
+            # Посты всегда пишутся в шард автора, даже если using
+            # пришёл из менеджера (Post.objects.create).
+            kwargs['using'] = shard_for(self.author_id)
+            if self.pk is None:
+                # У каждого шарда свой автоинкремент, поэтому id нового
+                # поста выдаёт основная база, общая для всех шардов.
+                self.pk = PostTicket.allocate()
+                kwargs['force_insert'] = True
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ('-pub_date',)
+        # Совпадают с порядком keyset-пагинации (pub_date, id):
+        # страница ленты читается упорядоченным проходом по индексу.
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=('group', '-pub_date', '-id'),
+                name='post_group_feed_idx'
+            ),
+            # Время изменения страниц группы и автора (posts.conditional)
+            # читается из индекса, без прохода по всем их постам.
+            models.Index(
+                fields=('author', 'updated_at'),
+                name='post_author_updated_idx'
+            ),
+            models.Index(
+                fields=('group', 'updated_at'),
+                name='post_group_updated_idx'
+            ),
+        )
 
 
 class Group(models.Model):
-    title = models.CharField(max_length=200)
+    title = models.CharField(max_length=200, db_index=True)
     slug = models.SlugField(unique=True)
     description = models.TextField()
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0,
+        editable=False
+    )
 
     def __str__(self):
         return self.title
+
+
+class AuthorStat(models.Model):
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stat',
+        verbose_name='Автор'
+    )
+    posts_count = models.PositiveIntegerField(
+        'Количество постов',
+        default=0
+    )
+    followers_count = models.PositiveIntegerField(
+        'Количество подписчиков',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.author}: {self.posts_count}'
+
+
+class Follow(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follows',
+        verbose_name='Подписчик'
+    )
+    author = models.ForeignKey(
+        User,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        Group,
+        blank=True,
+        null=True,
+        on_delete=models.CASCADE,
+        related_name='followers',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        unique_together = (('user', 'author'), ('user', 'group'))
+
+    def __str__(self):
+        return f'{self.user} → {self.author or self.group}'
+
+
+class TimelineEntry(models.Model):
+    """Пост в личной ленте подписчика, разложенный при публикации.
+
+    Ленты лежат в основной базе, а посты могут лежать в шардах,
+    поэтому ссылка на пост без ограничения в базе; строки удаляются
+    вместе с постом сигналом (posts.signals).
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    # Копии полей поста: страница ленты читается по индексу
+    # (user, pub_date, post), а отписка — по автору и группе,
+    # без JOIN с таблицей постов.
+    pub_date = models.DateTimeField('Дата публикации')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        'Group',
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        verbose_name='Группа'
+    )
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = (
+            models.Index(
+                fields=('user', '-pub_date', '-post'),
+                name='timeline_user_feed_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.user}: {self.post_id}'
+
+
+class PostTerm(models.Model):
+    term = models.CharField('Основа слова', max_length=64)
+    # Как и у TimelineEntry: индекс общий, посты могут быть в шардах.
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='terms',
+        verbose_name='Пост'
+    )
+    weight = models.PositiveSmallIntegerField('Вес', default=1)
+
+    class Meta:
+        unique_together = ('term', 'post')
+
+    def __str__(self):
+        return self.term
+
+
+class PostTicket(models.Model):
+    """Источник id постов, разложенных по шардам.
+
+    Строка вставляется и сразу удаляется: нужен только
+    автоинкремент основной базы.
+    """
+
+    @classmethod
+    def allocate(cls):
+        ticket = cls.objects.create()
+        cls.objects.filter(pk=ticket.pk).delete()
+        return ticket.pk
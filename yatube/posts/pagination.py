@@ -0,0 +1,232 @@
+import base64
+import binascii
+import json
+from heapq import merge
+from itertools import islice
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.parallel import gather
+
+FORWARD = 'n'
+BACKWARD = 'p'
+FEED_ORDER = ('-pub_date', '-pk')
+REVERSED_FEED_ORDER = ('pub_date', 'pk')
+# Границы BIGINT: большее число из токена база не примет.
+DB_INT_RANGE = range(-2 ** 63, 2 ** 63)
+
+
+def encode_token(values):
+    """Упаковывает значения ключа в непрозрачный токен для URL."""
+    token = base64.urlsafe_b64encode(json.dumps(values).encode())
+    return token.decode().rstrip('=')
+
+
+def decode_token(token):
+    """Распаковывает токен; для битого токена возвращает None."""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw.decode())
+    except (binascii.Error, TypeError, ValueError):
+        return None
+    return values if isinstance(values, list) else None
+
+
+def encode_cursor(direction, pub_date, pk):
+    return encode_token([direction, pub_date.isoformat(), pk])
+
+
+def db_int(value):
+    """Целое из токена, которое можно передать в запрос к базе."""
+    value = int(value)
+    if value not in DB_INT_RANGE:
+        raise ValueError(f'{value} не помещается в BIGINT')
+    return value
+
+
+def decode_cursor(token):
+    try:
+        direction, pub_date, pk = decode_token(token)
+        pub_date = parse_datetime(pub_date)
+        pk = db_int(pk)
+    except (TypeError, ValueError):
+        return None
+    if (direction not in (FORWARD, BACKWARD) or pub_date is None
+            or timezone.is_naive(pub_date)):
+        return None
+    return direction, pub_date, pk
+
+
+def older_than(pub_date, pk, pk_field='pk'):
+    return (
+        Q(pub_date__lt=pub_date)
+        | Q(pub_date=pub_date, **{f'{pk_field}__lt': pk})
+    )
+
+
+def newer_than(pub_date, pk, pk_field='pk'):
+    return (
+        Q(pub_date__gt=pub_date)
+        | Q(pub_date=pub_date, **{f'{pk_field}__gt': pk})
+    )
+
+
+class KeysetPage:
+    """Страница ленты, полученная поиском по ключу (pub_date, id).
+
+    Повторяет ту часть интерфейса django.core.paginator.Page,
+    которой пользуются шаблоны, но вместо номеров страниц
+    отдаёт токены соседних страниц.
+    """
+
+    is_keyset = True
+
+    def __init__(self, object_list, has_next, has_previous, query=''):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+        # Остальные GET-параметры страницы, например 'q=...&'.
+        self.query = query
+
+    def __repr__(self):
+        return f'<KeysetPage: {len(self)} objects>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next and bool(self.object_list)
+
+    def has_previous(self):
+        return self._has_previous and bool(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        last = self.object_list[-1]
+        return encode_cursor(FORWARD, last.pub_date, last.pk)
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        first = self.object_list[0]
+        return encode_cursor(BACKWARD, first.pub_date, first.pk)
+
+
+def keyset_rows(post_list, cursor, per_page):
+    """Первые per_page + 1 постов после курсора в порядке обхода.
+
+    Вперёд обход идёт от новых постов к старым, назад — наоборот.
+    """
+    if cursor is None:
+        return list(post_list.order_by(*FEED_ORDER)[:per_page + 1])
+    direction, pub_date, pk = cursor
+    if direction == FORWARD:
+        post_list = post_list.filter(older_than(pub_date, pk))
+        order = FEED_ORDER
+    else:
+        post_list = post_list.filter(newer_than(pub_date, pk))
+        order = REVERSED_FEED_ORDER
+    return list(post_list.order_by(*order)[:per_page + 1])
+
+
+def make_keyset_page(posts, cursor, per_page):
+    more = len(posts) > per_page
+    posts = posts[:per_page]
+    if cursor is None:
+        return KeysetPage(posts, has_next=more, has_previous=False)
+    if cursor[0] == FORWARD:
+        return KeysetPage(posts, has_next=more, has_previous=True)
+    posts.reverse()
+    return KeysetPage(posts, has_next=True, has_previous=more)
+
+
+def keyset_page(post_list, token, per_page):
+    """Возвращает страницу post_list, следующую за позицией из токена.
+
+    Вместо COUNT(*) и OFFSET делается один запрос с условием
+    по (pub_date, id) и LIMIT per_page + 1, поэтому время ответа
+    не зависит от глубины страницы.
+    """
+    cursor = decode_cursor(token)
+    return make_keyset_page(
+        keyset_rows(post_list, cursor, per_page), cursor, per_page
+    )
+
+
+def feed_key(post):
+    return post.pub_date, post.pk
+
+
+def merged_keyset_page(post_lists, token, per_page):
+    """Страница ленты, собранная из нескольких выборок (шардов).
+
+    Каждая выборка отдаёт свои per_page + 1 постов после курсора,
+    запросы идут одновременно; упорядоченные потоки сливаются
+    k-путевым слиянием, и от результата берётся начало.
+    """
+    cursor = decode_cursor(token)
+    backward = cursor is not None and cursor[0] == BACKWARD
+    found = gather(**{
+        str(number): (lambda posts=posts: keyset_rows(posts, cursor, per_page))
+        for number, posts in enumerate(post_lists)
+    })
+    posts = list(islice(
+        merge(*found.values(), key=feed_key, reverse=not backward),
+        per_page + 1
+    ))
+    return make_keyset_page(posts, cursor, per_page)
+
+
+class MergedPostList:
+    """Несколько выборок постов как одна упорядоченная — для Paginator.
+
+    Срез [a:b] берёт первые b постов каждой выборки и сливает их,
+    поэтому глубокие страницы дороги, как и OFFSET в одной базе.
+    """
+
+    ordered = True
+
+    def __init__(self, post_lists):
+        self.post_lists = post_lists
+
+    def count(self):
+        counts = gather(**{
+            str(number): posts.count
+            for number, posts in enumerate(self.post_lists)
+        })
+        return sum(counts.values())
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        found = gather(**{
+            str(number): (
+                lambda posts=posts: list(
+                    posts.order_by(*FEED_ORDER)[:index.stop]
+                )
+            )
+            for number, posts in enumerate(self.post_lists)
+        })
+        return list(islice(
+            merge(*found.values(), key=feed_key, reverse=True),
+            index.start, index.stop
+        ))
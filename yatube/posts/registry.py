@@ -0,0 +1,167 @@
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.query import ModelIterable
+from django.http import Http404
+
+from .models import Group, Post
+
+VERSION_KEY = 'posts:groups:version'
+ATTACH_CHUNK_SIZE = 100
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+class Entries:
+    """Неизменяемое содержимое реестра.
+
+    Реестр не правит словари на месте, а собирает новый объект
+    и подменяет его одним присваиванием: поток, читающий старый
+    объект, не увидит наполовину обновлённые данные. Версия берётся
+    до запроса к базе, поэтому группы, прочитанные до чужого
+    изменения, не попадут в реестр под новой версией.
+    """
+
+    __slots__ = ('version', 'loaded_at', 'by_slug', 'by_id', 'missing',
+                 'complete')
+
+    def __init__(self, version, loaded_at, by_slug=None, by_id=None,
+                 missing=frozenset(), complete=False):
+        self.version = version
+        self.loaded_at = loaded_at
+        self.by_slug = by_slug or {}
+        self.by_id = by_id or {}
+        self.missing = missing
+        self.complete = complete
+
+    def fresh(self, version, now):
+        return (self.version == version
+                and now - self.loaded_at < settings.GROUP_REGISTRY_MAX_AGE)
+
+    def with_groups(self, found, missing=(), complete=False):
+        found = list(found)
+        by_slug = {**self.by_slug, **{group.slug: group for group in found}}
+        by_id = {**self.by_id, **{group.pk: group for group in found}}
+        missing = self.missing.union(missing)
+        if len(missing) > settings.GROUP_REGISTRY_MISSING_LIMIT:
+            missing = self.missing
+        return Entries(
+            self.version, self.loaded_at, by_slug, by_id, missing,
+            complete or self.complete,
+        )
+
+
+class GroupRegistry:
+    """Группы, загруженные в память процесса, по slug и по id.
+
+    Группы меняются редко, поэтому на каждое обращение сверяется только
+    номер версии в общем кэше. Сохранение или удаление группы увеличивает
+    версию, и все процессы забывают свои копии. Копии старше
+    GROUP_REGISTRY_MAX_AGE тоже перечитываются — на случай, если
+    увеличение версии потерялось вместе с кэшем.
+    """
+
+    def __init__(self):
+        self.entries = None
+
+    def reset(self):
+        self.entries = None
+
+    def sync(self):
+        entries = self.entries
+        version = get_version()
+        now = time.monotonic()
+        if entries is None or not entries.fresh(version, now):
+            entries = Entries(version, now)
+            self.entries = entries
+        return entries
+
+    def get_by_slug(self, slug):
+        """Группа по slug или None."""
+        entries = self.sync()
+        if (slug in entries.by_slug or slug in entries.missing
+                or entries.complete):
+            return entries.by_slug.get(slug)
+        found = list(Group.objects.filter(slug=slug))
+        # Запоминаем и отсутствие группы, чтобы несуществующий адрес
+        # не ходил каждый раз в базу, но не больше
+        # GROUP_REGISTRY_MISSING_LIMIT адресов.
+        self.entries = entries.with_groups(
+            found, missing=() if found else (slug,)
+        )
+        return found[0] if found else None
+
+    def get_by_slug_or_404(self, slug):
+        group = self.get_by_slug(slug)
+        if group is None:
+            raise Http404(f'Группа {slug} не найдена')
+        return group
+
+    def get_many(self, ids):
+        """Словарь id → группа; недостающие загружаются одним запросом."""
+        entries = self.sync()
+        missing = [pk for pk in ids if pk not in entries.by_id]
+        if missing and not entries.complete:
+            entries = entries.with_groups(Group.objects.filter(pk__in=missing))
+            self.entries = entries
+        return {pk: entries.by_id[pk] for pk in ids if pk in entries.by_id}
+
+    def all(self):
+        """Все группы в порядке id."""
+        entries = self.sync()
+        if not entries.complete:
+            entries = Entries(entries.version, entries.loaded_at).with_groups(
+                Group.objects.order_by('pk'), complete=True
+            )
+            self.entries = entries
+        return sorted(entries.by_id.values(), key=lambda group: group.pk)
+
+
+groups = GroupRegistry()
+
+
+def invalidate_groups():
+    """Сбрасывает реестр групп во всех процессах.
+
+    Повторный сброс после коммита не даёт параллельному запросу
+    закрепить в реестре версию группы до коммита.
+    """
+    groups.reset()
+    bump_version()
+    transaction.on_commit(bump_version)
+
+
+class GroupFromRegistryIterable(ModelIterable):
+    """Подставляет постам группы из реестра вместо JOIN с таблицей групп."""
+
+    def __iter__(self):
+        posts = super().__iter__()
+        while True:
+            chunk = list(islice(posts, ATTACH_CHUNK_SIZE))
+            if not chunk:
+                return
+            found = groups.get_many(
+                {post.group_id for post in chunk if post.group_id}
+            )
+            for post in chunk:
+                if post.group_id in found:
+                    Post.group.field.set_cached_value(
+                        post, found[post.group_id]
+                    )
+                yield post
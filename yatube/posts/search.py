@@ -0,0 +1,279 @@
+import re
+from collections import Counter
+from functools import lru_cache
+from urllib.parse import urlencode
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from .bulk import insert_rows
+from .models import Post, PostTerm
+from .pagination import (BACKWARD, FORWARD, KeysetPage, db_int, decode_token,
+                         encode_token)
+from .sharding import each_shard, in_bulk
+
+MAX_TERM_LENGTH = 64
+MAX_WEIGHT = 32767
+MAX_QUERY_TERMS = 8
+INDEX_BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'\w+')
+VOWEL_RE = re.compile('[аеиоуыэюя]')
+STOP_WORDS = frozenset((
+    'а', 'без', 'бы', 'был', 'была', 'были', 'было', 'быть', 'в', 'вам',
+    'вас', 'вот', 'все', 'всё', 'вы', 'да', 'для', 'до', 'его', 'ее',
+    'её', 'ей', 'ему', 'если', 'есть', 'еще', 'ещё', 'же', 'за', 'и',
+    'из', 'или', 'им', 'их', 'к', 'как', 'ли', 'мне', 'мы', 'на', 'над',
+    'не', 'нет', 'ни', 'но', 'о', 'об', 'он', 'она', 'они', 'оно', 'от',
+    'по', 'под', 'при', 'с', 'со', 'так', 'там', 'то', 'того', 'тоже',
+    'только', 'ты', 'у', 'уже', 'что', 'это', 'этот', 'я',
+))
+
+# Окончания русского стеммера Snowball (Портера).
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+REFLEXIVE = ('ся', 'сь')
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+VERB = (
+    (
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    (
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+SUPERLATIVE = ('ейш', 'ейше')
+DERIVATIONAL = ('ост', 'ость')
+STEM_CACHE_SIZE = 100000
+
+
+def _longest_first(*groups):
+    return tuple(
+        tuple(sorted(suffixes, key=len, reverse=True)) for suffixes in groups
+    )
+
+
+PERFECTIVE_GERUND = _longest_first(*PERFECTIVE_GERUND)
+PARTICIPLE = _longest_first(*PARTICIPLE)
+VERB = _longest_first(*VERB)
+REFLEXIVE, ADJECTIVE, NOUN, SUPERLATIVE, DERIVATIONAL = _longest_first(
+    REFLEXIVE, ADJECTIVE, NOUN, SUPERLATIVE, DERIVATIONAL
+)
+
+
+def _strip(word, suffixes, after_a=False):
+    """Отрезает самое длинное подходящее окончание.
+
+    Окончания должны быть отсортированы по убыванию длины.
+    after_a — окончание засчитывается, только если перед ним «а» или «я»;
+    сама буква при этом остаётся в основе.
+    """
+    for suffix in suffixes:
+        if not word.endswith(suffix):
+            continue
+        base = word[:-len(suffix)]
+        if after_a and not base.endswith(('а', 'я')):
+            continue
+        return base, True
+    return word, False
+
+
+def _strip_groups(word, groups):
+    first, second = groups
+    for suffixes, after_a in ((first, True), (second, False)):
+        base, found = _strip(word, suffixes, after_a)
+        if found:
+            return base, True
+    return word, False
+
+
+def _r2_start(word):
+    start = 0
+    for _ in range(2):
+        match = re.search('[аеиоуыэюя][^аеиоуыэюя]', word[start:])
+        if match is None:
+            return len(word)
+        start += match.end()
+    return start
+
+
+@lru_cache(maxsize=STEM_CACHE_SIZE)
+def stem(word):
+    """Русский стеммер Snowball; нерусские слова не меняются."""
+    match = VOWEL_RE.search(word)
+    if match is None:
+        return word
+    prefix, rv = word[:match.end()], word[match.end():]
+    rv, found = _strip_groups(rv, PERFECTIVE_GERUND)
+    if not found:
+        rv, _ = _strip(rv, REFLEXIVE)
+        rv, found = _strip(rv, ADJECTIVE)
+        if found:
+            rv, _ = _strip_groups(rv, PARTICIPLE)
+        else:
+            rv, found = _strip_groups(rv, VERB)
+            if not found:
+                rv, _ = _strip(rv, NOUN)
+    rv, _ = _strip(rv, ('и',))
+    r2 = _r2_start(prefix + rv) - len(prefix)
+    base, found = _strip(rv, DERIVATIONAL)
+    if found and len(base) >= r2:
+        rv = base
+    if rv.endswith('нн'):
+        return prefix + rv[:-1]
+    rv, found = _strip(rv, SUPERLATIVE)
+    if found and rv.endswith('нн'):
+        rv = rv[:-1]
+    elif not found and rv.endswith('ь'):
+        rv = rv[:-1]
+    return prefix + rv
+
+
+def tokenize(text):
+    """Разбивает текст на основы слов без стоп-слов."""
+    for word in WORD_RE.findall(text.lower().replace('ё', 'е')):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        yield stem(word)[:MAX_TERM_LENGTH]
+
+
+def term_rows(pk, text):
+    weights = Counter(tokenize(text))
+    return (
+        (term, pk, min(weight, MAX_WEIGHT))
+        for term, weight in weights.items()
+    )
+
+
+def index_new_posts(posts):
+    """Добавляет в индекс ещё не проиндексированные посты.
+
+    posts — пары (id, текст).
+    """
+    insert_rows(
+        PostTerm,
+        ('term', 'post', 'weight'),
+        (row for pk, text in posts for row in term_rows(pk, text))
+    )
+
+
+def index_posts(posts):
+    """Перестраивает строки инвертированного индекса для постов."""
+    posts = list(posts)
+    with transaction.atomic():
+        PostTerm.objects.filter(post__in=[post.pk for post in posts]).delete()
+        index_new_posts((post.pk, post.text) for post in posts)
+
+
+def rebuild_index(batch_size=INDEX_BATCH_SIZE):
+    """Индексирует все посты заново; возвращает их количество."""
+    PostTerm.objects.all().delete()
+    indexed = 0
+    for posts in each_shard(Post.objects.all()):
+        last_pk = 0
+        while True:
+            batch = list(
+                posts.filter(pk__gt=last_pk).order_by('pk')
+                .values_list('pk', 'text')[:batch_size]
+            )
+            if not batch:
+                break
+            index_new_posts(batch)
+            indexed += len(batch)
+            last_pk = batch[-1][0]
+    return indexed
+
+
+def query_terms(query):
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def matching_posts(terms):
+    """Id постов, содержащих все основы, с рангом по частоте слов."""
+    return PostTerm.objects.filter(term__in=terms).values('post').annotate(
+        rank=Sum('weight'),
+        matched=Count('term'),
+    ).filter(matched=len(terms))
+
+
+class SearchPage(KeysetPage):
+    """Страница результатов поиска с курсором по ключу (rank, id)."""
+
+    def __init__(self, object_list, ranks, **kwargs):
+        super().__init__(object_list, **kwargs)
+        self.ranks = ranks
+
+    @property
+    def next_cursor(self):
+        if not self.has_next():
+            return None
+        return encode_token(
+            [FORWARD, self.ranks[-1], self.object_list[-1].pk]
+        )
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous():
+            return None
+        return encode_token(
+            [BACKWARD, self.ranks[0], self.object_list[0].pk]
+        )
+
+
+def search_posts(query, token, per_page):
+    """Страница постов по запросу, от более релевантных к менее."""
+    terms = query_terms(query)
+    page_query = urlencode({'q': query}) + '&'
+    if not terms:
+        return SearchPage(
+            [], [], has_next=False, has_previous=False, query=page_query
+        )
+    matches = matching_posts(terms)
+    try:
+        direction, rank, pk = decode_token(token)
+        rank, pk = db_int(rank), db_int(pk)
+    except (TypeError, ValueError):
+        direction = None
+    if direction == BACKWARD:
+        rows = list(matches.filter(
+            Q(rank__gt=rank) | Q(rank=rank, post__gt=pk)
+        ).order_by('rank', 'post_id')[:per_page + 1])
+        has_previous = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+        has_next = True
+    else:
+        if direction == FORWARD:
+            matches = matches.filter(
+                Q(rank__lt=rank) | Q(rank=rank, post__lt=pk)
+            )
+        rows = list(matches.order_by('-rank', '-post_id')[:per_page + 1])
+        has_next = len(rows) > per_page
+        rows = rows[:per_page]
+        has_previous = direction == FORWARD
+    posts = in_bulk(Post.objects.for_feed(), (row['post'] for row in rows))
+    return SearchPage(
+        [posts[row['post']] for row in rows],
+        [row['rank'] for row in rows],
+        has_next=has_next,
+        has_previous=has_previous,
+        query=page_query,
+    )
@@ -0,0 +1,131 @@
+from zlib import crc32
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from core.parallel import gather
+from core.routers import written
+
+SHARDED_MODEL = 'posts.Post'
+
+
+def enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def shard_for(author_id):
+    """База, в которой лежат посты автора."""
+    shards = settings.POST_SHARDS
+    return shards[crc32(str(author_id).encode()) % len(shards)]
+
+
+def for_author(queryset, author_id):
+    """Выборка постов одного автора — из его шарда."""
+    if not enabled():
+        return queryset
+    return queryset.using(shard_for(author_id))
+
+
+def scatter(queryset):
+    """Выборка постов со всех шардов: список по одной на шард.
+
+    Без шардов возвращает саму выборку, и чтение идёт как обычно,
+    в том числе на реплики.
+    """
+    if not enabled():
+        return queryset
+    return [queryset.using(alias) for alias in settings.POST_SHARDS]
+
+
+def each_shard(queryset):
+    """Как scatter, но всегда список — для обхода в цикле."""
+    posts = scatter(queryset)
+    return posts if isinstance(posts, list) else [posts]
+
+
+def get_post(queryset, pk):
+    """Пост по id: точечный запрос ко всем шардам одновременно."""
+    if not enabled():
+        return queryset.filter(pk=pk).first()
+    found = gather(**{
+        alias: (lambda posts=posts: posts.filter(pk=pk).first())
+        for alias, posts in zip(settings.POST_SHARDS, scatter(queryset))
+    })
+    return next((post for post in found.values() if post), None)
+
+
+def in_bulk(queryset, ids):
+    """Посты по списку id со всех шардов: словарь id → пост."""
+    ids = list(ids)
+    if not enabled():
+        return queryset.in_bulk(ids)
+    found = gather(**{
+        alias: (lambda posts=posts: posts.in_bulk(ids))
+        for alias, posts in zip(settings.POST_SHARDS, scatter(queryset))
+    })
+    merged = {}
+    for posts in found.values():
+        merged.update(posts)
+    return merged
+
+
+def copy_to_shards(instance):
+    """Копирует строку пользователя или группы во все шарды.
+
+    Пишется напрямую через QuerySet, без сигналов модели:
+    копия не должна второй раз сбрасывать кэши и счётчики.
+    """
+    model = type(instance)
+    values = {
+        field.attname: getattr(instance, field.attname)
+        for field in model._meta.concrete_fields
+    }
+    for alias in settings.POST_SHARDS:
+        rows = model._base_manager.using(alias)
+        if not rows.filter(pk=instance.pk).update(**values):
+            rows.bulk_create([model(**values)])
+
+
+def delete_from_shards(instance):
+    """Удаляет копии из шардов вместе с постами, которые на них ссылаются."""
+    for alias in settings.POST_SHARDS:
+        type(instance)._base_manager.using(alias).filter(
+            pk=instance.pk
+        ).delete()
+
+
+class ShardRouter:
+    """Раскладывает посты по шардам по хэшу author_id.
+
+    Пользователи и группы копируются во все шарды (posts.signals),
+    поэтому внешние ключи и JOIN внутри шарда работают. Чтение
+    без подсказки не маршрутизируется: выборки по всем шардам
+    строятся явно через scatter.
+    """
+
+    def shard_of(self, model, instance):
+        if (not enabled() or model._meta.label != SHARDED_MODEL
+                or instance is None):
+            return None
+        if isinstance(instance, get_user_model()):
+            # author.posts и post.author = user: шард автора.
+            return shard_for(instance.pk)
+        if instance._meta.label == SHARDED_MODEL:
+            return shard_for(instance.author_id)
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self.shard_of(model, hints.get('instance'))
+
+    def db_for_write(self, model, **hints):
+        alias = self.shard_of(model, hints.get('instance'))
+        if alias is not None:
+            written.set(True)
+        return alias
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Схема шардов полная, а общие таблицы в них — копии основных.
+        databases = {'default', *settings.POST_SHARDS}
+        if enabled() and {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
@@ -0,0 +1,137 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import sharding
+from .cache import invalidate_pages
+from .conditional import touch
+from .counters import change_author_count, change_group_count
+from .models import Follow, Group, Post, PostTerm, TimelineEntry
+from .registry import invalidate_groups
+from .tasks import fan_out_task, index_posts_task
+
+User = get_user_model()
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # Через __dict__, чтобы не дёргать базу, если group_id отложен.
+    instance._counted_group_id = instance.__dict__.get('group_id')
+    instance._fanned_group_id = instance._counted_group_id
+
+
+@receiver(post_init, sender=User)
+def remember_names(sender, instance, **kwargs):
+    instance._shown_names = shown_names(instance)
+
+
+def shown_names(user):
+    """Поля автора, которые выводятся в карточках постов.
+
+    Через __dict__: отложенные поля не загружаются и не сравниваются.
+    """
+    return tuple(
+        user.__dict__.get(field)
+        for field in ('username', 'first_name', 'last_name')
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidate_renamed_author(sender, instance, created, raw=False,
+                              **kwargs):
+    # Вход пользователя тоже сохраняет его (last_login), поэтому
+    # страницы сбрасываются, только если изменилось имя.
+    if created or raw or instance._shown_names == shown_names(instance):
+        return
+    instance._shown_names = shown_names(instance)
+    invalidate_pages()
+    touch()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        change_author_count(instance.author_id, 1)
+        change_group_count(instance.group_id, 1)
+    elif instance._counted_group_id != instance.group_id:
+        change_group_count(instance._counted_group_id, -1)
+        change_group_count(instance.group_id, 1)
+        # Старая группа теряет пост, а время изменения её постов
+        # от этого не растёт: без отметки она ответила бы 304.
+        touch()
+    instance._counted_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    change_author_count(instance.author_id, -1)
+    change_group_count(instance.group_id, -1)
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_rows(sender, instance, **kwargs):
+    # Ленты и поисковый индекс лежат в основной базе и ссылаются
+    # на посты без ограничения FOREIGN KEY: посты могут быть в шардах.
+    TimelineEntry.objects.filter(post_id=instance.pk).delete()
+    PostTerm.objects.filter(post_id=instance.pk).delete()
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_feed_pages(sender, **kwargs):
+    invalidate_pages()
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def touch_pages(sender, **kwargs):
+    touch()
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_registry(sender, **kwargs):
+    invalidate_groups()
+
+
+@receiver(post_save, sender=Post)
+def index_saved_post(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_posts_task.enqueue(
+            {'post_id': instance.pk}, key=f'posts.index:{instance.pk}'
+        )
+
+
+@receiver(post_save, sender=Post)
+def fan_out_saved_post(sender, instance, created, raw=False, **kwargs):
+    # При смене группы пост раскладывается заново: fan_out убирает его
+    # из лент подписчиков старой группы.
+    if raw or not (created
+                   or instance._fanned_group_id != instance.group_id):
+        return
+    instance._fanned_group_id = instance.group_id
+    fan_out_task.enqueue(
+        {'post_id': instance.pk}, key=f'posts.fan_out:{instance.pk}'
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def copy_to_shards(sender, instance, raw=False, using=None, **kwargs):
+    if sharding.enabled() and not raw and using not in settings.POST_SHARDS:
+        sharding.copy_to_shards(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def delete_from_shards(sender, instance, using=None, **kwargs):
+    if sharding.enabled() and using not in settings.POST_SHARDS:
+        sharding.delete_from_shards(instance)
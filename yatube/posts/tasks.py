@@ -0,0 +1,23 @@
+from core.tasks import task
+
+from .feed import backfill_followers, fan_out
+from .models import Post
+from .search import index_posts
+from .sharding import in_bulk
+
+
+@task('posts.index_posts', batch=True)
+def index_posts_task(payloads):
+    index_posts(in_bulk(
+        Post.objects.all(), [payload['post_id'] for payload in payloads]
+    ).values())
+
+
+@task('posts.fan_out')
+def fan_out_task(post_id):
+    fan_out(post_id)
+
+
+@task('posts.backfill_followers')
+def backfill_followers_task(author_id=None, group_id=None):
+    backfill_followers(author_id, group_id)
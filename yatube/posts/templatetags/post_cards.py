@@ -0,0 +1,56 @@
+from hashlib import md5
+
+from django import template
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+from django.utils.translation import get_language
+
+register = template.Library()
+CARD_TEMPLATE = 'includes/post_card.html'
+CARD_TIMEOUT = 60 * 10
+
+
+def card_key(post, show_author):
+    """Ключ карточки: всё, что в ней выводится, кроме текста поста.
+
+    Текст меняется только вместе с updated_at. Имя автора и slug
+    группы входят в ключ сами: переименование не трогает
+    updated_at поста, а удаление группы обнуляет group_id без него.
+    Старая карточка больше не читается и вытесняется по времени.
+    """
+    author = post.author
+    group = post.group
+    parts = [
+        post.pk, post.updated_at.timestamp(), show_author, get_language(),
+        author.username, author.first_name, author.last_name,
+        group and group.slug,
+    ]
+    digest = md5('|'.join(map(str, parts)).encode()).hexdigest()
+    return f'posts:card:{post.pk}:{digest}'
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts, show_author=True):
+    """HTML карточек постов страницы — из кэша одним get_many.
+
+    Недостающие карточки рендерятся по CARD_TEMPLATE и сохраняются
+    одним set_many, поэтому страница ленты — это склейка строк.
+    """
+    posts = list(posts)
+    keys = [card_key(post, show_author) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = None
+    for key, post in zip(keys, posts):
+        if key in cards:
+            continue
+        if card_template is None:
+            card_template = context.template.engine.get_template(
+                CARD_TEMPLATE
+            )
+        with context.push(post=post, show_author=show_author):
+            missing[key] = card_template.render(context)
+    if missing:
+        cache.set_many(missing, CARD_TIMEOUT)
+        cards.update(missing)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,102 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..cache import GENERATION_KEY
+from ..models import Group, Post
+
+User = get_user_model()
+TEMP_CACHE_DIR = tempfile.mkdtemp()
+FILE_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'pages': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': TEMP_CACHE_DIR,
+    },
+}
+
+
+class PageCacheTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='cached')
+        cls.group = Group.objects.create(
+            title='Кэш',
+            slug='cache',
+            description='Описание'
+        )
+        Post.objects.create(text='Старый пост', author=cls.user)
+
+    def setUp(self):
+        caches['pages'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_guest_page_served_from_cache(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                first = self.guest_client.get(page)
+                with self.assertNumQueries(0):
+                    second = self.guest_client.get(page)
+                self.assertEqual(first.content, second.content)
+
+    def test_new_post_visible_immediately(self):
+        self.guest_client.get(reverse('posts:index'))
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Свежий пост', 'group': self.group.pk}
+        )
+        response = self.guest_client.get(reverse('posts:index'))
+        self.assertContains(response, 'Свежий пост')
+
+    def test_deleted_post_disappears(self):
+        post = Post.objects.create(text='Удалим', author=self.user)
+        self.assertContains(
+            self.guest_client.get(reverse('posts:index')), 'Удалим'
+        )
+        post.delete()
+        self.assertNotContains(
+            self.guest_client.get(reverse('posts:index')), 'Удалим'
+        )
+
+    def test_renamed_author_shown(self):
+        page = reverse('posts:index')
+        self.guest_client.get(page)
+        user = User.objects.get(pk=self.user.pk)
+        user.last_login = user.date_joined
+        user.save()
+        with self.assertNumQueries(0):
+            self.guest_client.get(page)
+        user.first_name = 'Переименованный'
+        user.save()
+        self.assertContains(self.guest_client.get(page), 'Переименованный')
+
+
+@override_settings(CACHES=FILE_CACHES)
+class FilePageCacheTest(PageCacheTest):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_CACHE_DIR, ignore_errors=True)
+
+    def test_generation_shared_between_processes(self):
+        page = reverse('posts:index')
+        self.guest_client.get(page)
+        # Тот же каталог, открытый другим процессом.
+        other_process = FileBasedCache(TEMP_CACHE_DIR, {})
+        other_process.incr(GENERATION_KEY)
+        self.assertIsNotNone(self.guest_client.get(page).context)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import translation
+
+from ..models import Group, Post
+from ..templatetags.post_cards import card_key
+
+User = get_user_model()
+MARKER = '<p>из кэша</p>'
+
+
+class PostCardsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='cards')
+        cls.group = Group.objects.create(
+            title='Карточки', slug='cards', description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Карточка', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def test_cards_read_from_cache(self):
+        pages = {
+            reverse('posts:index'): True,
+            reverse(
+                'posts:profile', kwargs={'username': self.user.username}
+            ): False,
+        }
+        for page, show_author in pages.items():
+            with self.subTest(page=page):
+                self.client.get(page)
+                key = card_key(self.post, show_author)
+                self.assertIn('Карточка', cache.get(key))
+                cache.set(key, MARKER)
+                self.assertContains(self.client.get(page), MARKER)
+
+    def test_edited_post_gets_new_card(self):
+        self.client.get(reverse('posts:index'))
+        self.client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Исправленная карточка'}
+        )
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Исправленная карточка')
+
+    def test_author_and_group_changes_shown(self):
+        page = reverse('posts:index')
+        self.client.get(page)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое'
+        user.last_name = 'Имя'
+        user.save()
+        self.assertContains(self.client.get(page), 'Новое Имя')
+        group = Group.objects.get(pk=self.group.pk)
+        group.slug = 'renamed'
+        group.save()
+        self.assertContains(
+            self.client.get(page),
+            reverse('posts:group_list', kwargs={'slug': 'renamed'})
+        )
+        group.delete()
+        self.assertNotContains(self.client.get(page), '/group/')
+
+    def test_key_depends_on_language(self):
+        with translation.override('en'):
+            english = card_key(self.post, True)
+        self.assertNotEqual(english, card_key(self.post, True))
+        self.assertNotEqual(card_key(self.post, False), card_key(
+            self.post, True
+        ))
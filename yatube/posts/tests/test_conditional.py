@@ -0,0 +1,114 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='etag')
+        cls.group = Group.objects.create(
+            title='Валидаторы',
+            slug='etag',
+            description='Описание'
+        )
+        cls.post = Post.objects.create(
+            text='Пост', author=cls.user, group=cls.group
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.pages = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+
+    def test_not_modified(self):
+        for client in (self.guest_client, self.authorized_client):
+            for page in self.pages:
+                with self.subTest(page=page):
+                    response = client.get(page)
+                    self.assertEqual(
+                        client.get(
+                            page, HTTP_IF_NONE_MATCH=response['ETag']
+                        ).status_code,
+                        HTTPStatus.NOT_MODIFIED
+                    )
+                    self.assertEqual(
+                        client.get(
+                            page,
+                            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+                        ).status_code,
+                        HTTPStatus.NOT_MODIFIED
+                    )
+
+    def test_cached_guest_page_validated_without_queries(self):
+        etag = self.guest_client.get(self.pages[0])['ETag']
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.pages[0], HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_edit_and_delete_change_validators(self):
+        etags = [self.guest_client.get(page)['ETag'] for page in self.pages]
+        updated_at = self.post.updated_at
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.post.pk}),
+            {'text': 'Исправленный пост', 'group': self.group.pk}
+        )
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated_at, updated_at)
+        for page, etag in zip(self.pages, etags):
+            with self.subTest(page=page):
+                response = self.guest_client.get(
+                    page, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+        second = Post.objects.create(text='Второй', author=self.user)
+        etag = self.guest_client.get(self.pages[0])['ETag']
+        second.delete()
+        response = self.guest_client.get(
+            self.pages[0], HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_lost_touch_mark_changes_validators(self):
+        page = self.pages[2]
+        client = self.authorized_client
+        etag = client.get(page)['ETag']
+        cache.clear()
+        self.assertEqual(
+            client.get(page, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK
+        )
+
+    def test_moving_post_changes_old_group_validators(self):
+        other = Group.objects.create(
+            title='Другая', slug='etag-other', description='Описание'
+        )
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        page = self.pages[1]
+        client = self.authorized_client
+        etag = client.get(page)['ETag']
+        post = Post.objects.get(pk=self.post.pk)
+        post.group = other
+        post.save()
+        self.assertEqual(
+            client.get(page, HTTP_IF_NONE_MATCH=etag).status_code,
+            HTTPStatus.OK
+        )
@@ -0,0 +1,75 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..counters import author_posts_count
+from ..models import AuthorStat, Group, Post
+
+User = get_user_model()
+
+
+class CountersTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='counter')
+        cls.first_group = Group.objects.create(
+            title='Первая',
+            slug='first',
+            description='Описание'
+        )
+        cls.second_group = Group.objects.create(
+            title='Вторая',
+            slug='second',
+            description='Описание'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def assertCounts(self, author, first, second):
+        self.first_group.refresh_from_db()
+        self.second_group.refresh_from_db()
+        self.assertEqual(author_posts_count(self.user.pk), author)
+        self.assertEqual(self.first_group.posts_count, first)
+        self.assertEqual(self.second_group.posts_count, second)
+
+    def test_counters_follow_create_edit_delete(self):
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост', 'group': self.first_group.pk}
+        )
+        self.assertCounts(1, 1, 0)
+        post = Post.objects.get()
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+            data={'text': 'Пост', 'group': self.second_group.pk}
+        )
+        self.assertCounts(1, 0, 1)
+        Post.objects.get().delete()
+        self.assertCounts(0, 0, 0)
+
+    def test_pages_read_counter(self):
+        post = Post.objects.create(text='Пост', author=self.user)
+        AuthorStat.objects.filter(author=self.user).update(posts_count=42)
+        pages = (
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:post_detail', kwargs={'post_id': post.pk}),
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                response = self.authorized_client.get(page)
+                self.assertEqual(response.context['posts_count'], 42)
+
+    def test_rebuild_counters(self):
+        Post.objects.bulk_create(
+            Post(text=f'Пост {i}', author=self.user, group=self.first_group)
+            for i in range(3)
+        )
+        self.assertCounts(0, 0, 0)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.assertCounts(3, 3, 0)
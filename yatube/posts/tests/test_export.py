@@ -0,0 +1,74 @@
+import csv
+import json
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..export import iter_posts
+from ..models import Group, Post
+
+User = get_user_model()
+POSTS_FOR_TEST = 7
+BATCH_SIZE = 3
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='exporter')
+        cls.group = Group.objects.create(
+            title='Экспорт',
+            slug='export',
+            description='Описание'
+        )
+        for i in range(POSTS_FOR_TEST):
+            Post.objects.create(
+                text=f'Пост {i}',
+                author=cls.user,
+                group=cls.group if i % 2 else None
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def test_keyset_batches_cover_all_posts(self):
+        records = list(iter_posts(Post.objects.all(), BATCH_SIZE))
+        self.assertEqual(
+            [record['text'] for record in records],
+            list(Post.objects.order_by('-pub_date', '-pk').values_list(
+                'text', flat=True
+            ))
+        )
+
+    def test_profile_export_jsonl(self):
+        response = self.guest_client.get(reverse(
+            'posts:profile_export', kwargs={'username': self.user.username}
+        ))
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), POSTS_FOR_TEST)
+        self.assertEqual(json.loads(lines[0])['author'], 'exporter')
+
+    def test_group_export_csv(self):
+        response = self.guest_client.get(reverse(
+            'posts:group_export', kwargs={'slug': self.group.slug}
+        ))
+        rows = list(csv.DictReader(StringIO(
+            b''.join(response.streaming_content).decode()
+        )))
+        self.assertEqual(len(rows), POSTS_FOR_TEST // 2)
+        self.assertEqual({row['group'] for row in rows}, {'export'})
+
+    def test_export_command_round_trip(self):
+        output = StringIO()
+        call_command('export_posts', '--author=exporter', stdout=output)
+        Post.objects.all().delete()
+        with mock.patch('sys.stdin', StringIO(output.getvalue())):
+            call_command('import_posts', stdout=StringIO())
+        self.assertEqual(Post.objects.count(), POSTS_FOR_TEST)
+        self.assertEqual(self.group.posts.count(), POSTS_FOR_TEST // 2)
@@ -0,0 +1,146 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..feed import fan_out
+from ..models import Follow, Group, Post, TimelineEntry
+
+User = get_user_model()
+POSTS_FOR_TEST = 13
+POST_NUM = 10
+
+
+@override_settings(TASKS_ALWAYS_EAGER=True, FEED_FANOUT_LIMIT=2)
+class FollowFeedTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='writer')
+        cls.star = User.objects.create(username='star')
+        cls.group = Group.objects.create(
+            title='Подписки',
+            slug='follow',
+            description='Описание'
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def feed(self, **params):
+        response = self.client.get(reverse('posts:follow_index'), params)
+        return response.context['page_obj']
+
+    def follow_author(self, author, client=None):
+        (client or self.client).get(
+            reverse('posts:profile_follow', kwargs={'username': author})
+        )
+
+    def test_follow_backfills_and_fans_out(self):
+        old = Post.objects.create(text='Старый', author=self.author)
+        self.follow_author(self.author.username)
+        new = Post.objects.create(text='Новый', author=self.author)
+        self.assertEqual(list(self.feed()), [new, old])
+        self.follow_author(self.reader.username)
+        self.assertFalse(Follow.objects.filter(author=self.reader).exists())
+
+    def test_group_and_author_overlap(self):
+        self.follow_author(self.author.username)
+        self.client.get(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        both = Post.objects.create(
+            text='Оба', author=self.author, group=self.group
+        )
+        other = Post.objects.create(
+            text='Группа', author=self.star, group=self.group
+        )
+        self.assertEqual(list(self.feed()), [other, both])
+        self.client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'writer'})
+        )
+        self.assertEqual(list(self.feed()), [other, both])
+        self.client.get(
+            reverse('posts:group_unfollow', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(list(self.feed()), [])
+
+    def test_celebrity_posts_read_at_query_time(self):
+        fan = User.objects.create(username='fan')
+        fan_client = Client()
+        fan_client.force_login(fan)
+        self.follow_author(self.star.username, fan_client)
+        self.follow_author(self.star.username)
+        self.follow_author(self.author.username)
+        for i in range(POSTS_FOR_TEST):
+            Post.objects.create(
+                text=f'Пост {i}', author=(self.star, self.author)[i % 2]
+            )
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=self.star).exists()
+        )
+        first = self.feed()
+        second = self.feed(cursor=first.next_cursor)
+        self.assertEqual(len(first), POST_NUM)
+        self.assertEqual(
+            list(first) + list(second),
+            list(Post.objects.order_by('-pub_date', '-pk'))
+        )
+        self.assertEqual(
+            list(self.feed(cursor=second.previous_cursor)), list(first)
+        )
+
+    def test_fan_out_is_idempotent(self):
+        self.follow_author(self.author.username)
+        post = Post.objects.create(text='Пост', author=self.author)
+        fan_out(post.pk)
+        self.assertEqual(TimelineEntry.objects.filter(post=post).count(), 1)
+
+    def test_former_celebrity_posts_backfilled(self):
+        fan = User.objects.create(username='fan')
+        fan_client = Client()
+        fan_client.force_login(fan)
+        self.follow_author(self.star.username, fan_client)
+        self.follow_author(self.star.username)
+        post = Post.objects.create(text='Звёздный', author=self.star)
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+        fan_client.get(
+            reverse('posts:profile_unfollow', kwargs={'username': 'star'})
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(post=post, user=self.reader).exists()
+        )
+        self.assertEqual(list(self.feed()), [post])
+
+    def test_changed_group_fanned_out_again(self):
+        self.client.get(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        post = Post.objects.create(text='Без группы', author=self.star)
+        self.assertEqual(list(self.feed()), [])
+        post.group = self.group
+        post.save()
+        self.assertEqual(list(self.feed()), [post])
+        post.group = None
+        post.save()
+        self.assertEqual(list(self.feed()), [])
+
+    def test_imported_posts_fanned_out(self):
+        self.follow_author(self.author.username)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'posts.jsonl')
+            with open(path, 'w', encoding='utf-8') as source:
+                source.write(json.dumps(
+                    {'text': 'Импортированный', 'author': 'writer'}
+                ))
+            call_command('import_posts', path, stdout=StringIO())
+        self.assertEqual(
+            [post.text for post in self.feed()], ['Импортированный']
+        )
@@ -4,6 +4,7 @@ from django.contrib.auth import get_user_model
 from django.test import Client, TestCase
 from django.urls import reverse
 
+from ..forms import PostForm
 from ..models import Group, Post
 
 User = get_user_model()
@@ -172,3 +173,71 @@ class CreateFormTests(TestCase):
         self.assertEqual(edited_post.text, crpost.text)
         self.assertEqual(edited_post.group.pk, crpost.group.pk)
         self.assertEqual(response.status_code, HTTPStatus.FOUND)
+
+
+class GroupAutocompleteTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.cats = Group.objects.create(
+            title='Коты', slug='cats', description='Описание'
+        )
+        cls.dogs = Group.objects.create(
+            title='Собаки', slug='dogs', description='Описание'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def autocomplete(self, query):
+        response = self.guest_client.get(
+            reverse('posts:group_autocomplete'), {'q': query}
+        )
+        return [group['slug'] for group in response.json()['results']]
+
+    def test_prefix_lookup(self):
+        self.assertEqual(self.autocomplete('Ко'), ['cats'])
+        self.assertEqual(self.autocomplete('ко'), ['cats'])
+        self.assertEqual(self.autocomplete('do'), ['dogs'])
+        self.assertEqual(self.autocomplete('оты'), [])
+        self.assertEqual(self.autocomplete(''), [])
+
+    def test_form_renders_only_chosen_group(self):
+        form = PostForm(initial={'group': self.cats.pk})
+        widget = str(form['group'])
+        self.assertIn(self.cats.title, widget)
+        self.assertNotIn(self.dogs.title, widget)
+        self.assertFalse(
+            PostForm({'text': 'Текст', 'group': 'nope'}).is_valid()
+        )
+
+    def test_typed_group_resolved_without_script(self):
+        typed_groups = (
+            ('Коты', self.cats), ('коты', self.cats), (' Dogs ', self.dogs),
+        )
+        for typed, group in typed_groups:
+            with self.subTest(typed=typed):
+                form = PostForm(
+                    {'text': 'Текст', 'group': '', 'group_search': typed}
+                )
+                self.assertTrue(form.is_valid())
+                self.assertEqual(form.cleaned_data['group'], group)
+        form = PostForm({'text': 'Текст', 'group_search': 'Кошки'})
+        self.assertFalse(form.is_valid())
+        self.assertIn('value="Кошки"', str(form['group']))
+
+    def test_typed_number_is_not_group_id(self):
+        form = PostForm({
+            'text': 'Текст', 'group': '', 'group_search': str(self.cats.pk)
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn(f'value="{self.cats.pk}"', str(form['group']))
+        numbered = Group.objects.create(
+            title=str(self.dogs.pk), slug='numbered', description='Описание'
+        )
+        form = PostForm({'text': 'Текст', 'group_search': str(self.dogs.pk)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], numbered)
+        form = PostForm({'text': 'Текст', 'group': str(self.dogs.pk)})
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.dogs)
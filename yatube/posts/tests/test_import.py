@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..counters import author_posts_count
+from ..models import Group, Post, PostTerm
+from ..search import search_posts
+
+User = get_user_model()
+TEMP_DIR = tempfile.mkdtemp()
+
+
+class ImportPostsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='importer')
+        cls.group = Group.objects.create(
+            title='Импорт',
+            slug='import',
+            description='Описание'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(TEMP_DIR, name)
+        with open(path, 'w', encoding='utf-8') as source:
+            source.write(content)
+        return path
+
+    def test_import_jsonl(self):
+        records = [
+            {
+                'text': 'Старый пост про котов',
+                'author': 'importer',
+                'group': 'import',
+                'pub_date': '2015-05-01T10:00:00+00:00',
+            },
+            {'text': 'Пост без группы', 'author': 'importer'},
+            {'text': 'Чужой автор', 'author': 'nobody'},
+        ]
+        path = self.write(
+            'posts.jsonl',
+            '\n'.join(json.dumps(record) for record in records)
+        )
+        call_command('import_posts', path, '--batch-size=2', stdout=StringIO())
+        self.group.refresh_from_db()
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            Post.objects.get(group=self.group).pub_date.year, 2015
+        )
+        self.assertEqual(author_posts_count(self.user.pk), 2)
+        self.assertEqual(self.group.posts_count, 1)
+        self.assertEqual(len(search_posts('коты', None, 10)), 1)
+
+    def test_import_csv_resumes_from_checkpoint(self):
+        path = self.write(
+            'posts.csv',
+            'text,author,group\n'
+            'Первый,importer,import\n'
+            'Второй,importer,\n'
+            'Третий,importer,import\n'
+        )
+        checkpoint = self.write('checkpoint.json', json.dumps({'done': 1}))
+        call_command(
+            'import_posts', path, f'--checkpoint={checkpoint}',
+            stdout=StringIO()
+        )
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Второй', 'Третий']
+        )
+        with open(checkpoint, encoding='utf-8') as saved:
+            self.assertEqual(json.load(saved), {'done': 3})
+
+    def test_bad_and_naive_dates_skipped_and_only_imported_posts_indexed(self):
+        Post.objects.create(text='Котик не из импорта', author=self.user)
+        records = [
+            {'text': 'Кот с числом', 'author': 'importer', 'pub_date': 5},
+            {
+                'text': 'Кот с датой',
+                'author': 'importer',
+                'pub_date': '2020-13-45T00:00:00+00:00',
+            },
+            {
+                'text': 'Кот без пояса',
+                'author': 'importer',
+                'pub_date': '2020-01-01T10:00:00',
+            },
+            {
+                'text': 'Кот с одной датой',
+                'author': 'importer',
+                'pub_date': '2020-01-02',
+            },
+            {'text': 'Кот без даты', 'author': 'importer'},
+        ]
+        path = self.write(
+            'dates.jsonl',
+            '\n'.join(json.dumps(record) for record in records)
+        )
+        call_command('import_posts', path, stdout=StringIO())
+        imported = Post.objects.get(text='Кот без даты')
+        self.assertEqual(Post.objects.count(), 2)
+        self.assertEqual(
+            set(PostTerm.objects.values_list('post', flat=True)),
+            {imported.pk}
+        )
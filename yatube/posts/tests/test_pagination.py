@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Group, Post
+from ..pagination import decode_cursor, encode_token
+
+User = get_user_model()
+POSTS_FOR_TEST = 15
+POST_NUM = 10
+
+
+class KeysetPaginatorTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.guest_client = Client()
+        cls.user = User.objects.create(username='keyset')
+        cls.group = Group.objects.create(
+            title='Курсоры',
+            slug='cursors',
+            description='Тест описание'
+        )
+        Post.objects.bulk_create(
+            Post(text=f'Текстик {i}', group=cls.group, author=cls.user)
+            for i in range(POSTS_FOR_TEST)
+        )
+        # Одинаковая дата у всех постов: порядок держится только на id.
+        Post.objects.update(pub_date=timezone.now())
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+
+    def test_cursor_walks_all_pages(self):
+        pages = (
+            reverse('posts:index'),
+            reverse('posts:profile', kwargs={'username': self.user.username}),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+        )
+        expected = list(
+            Post.objects.order_by('-pk').values_list('pk', flat=True)
+        )
+        for page in pages:
+            with self.subTest(page=page):
+                first = self.guest_client.get(page).context['page_obj']
+                second = self.guest_client.get(
+                    page, {'cursor': first.next_cursor}
+                ).context['page_obj']
+                self.assertEqual(len(first), POST_NUM)
+                self.assertEqual(len(second), POSTS_FOR_TEST - POST_NUM)
+                self.assertFalse(second.has_next())
+                self.assertEqual(
+                    [post.pk for post in first] + [post.pk for post in second],
+                    expected
+                )
+                back = self.guest_client.get(
+                    page, {'cursor': second.previous_cursor}
+                ).context['page_obj']
+                self.assertEqual(list(back), list(first))
+                self.assertFalse(back.has_previous())
+
+    def test_broken_cursor_returns_first_page(self):
+        self.assertIsNone(decode_cursor('не-токен'))
+        for values in (
+            ['n', '2020-01-01T00:00:00+00:00', 10 ** 30],
+            ['n', '2020-01-01T00:00:00', 1],
+            ['n', '2020-01-01T00:00:00+00:00', 'id'],
+        ):
+            with self.subTest(values=values):
+                token = encode_token(values)
+                self.assertIsNone(decode_cursor(token))
+                response = self.guest_client.get(
+                    reverse('posts:index'), {'cursor': token}
+                )
+                self.assertEqual(len(response.context['page_obj']), POST_NUM)
+        response = self.guest_client.get(
+            reverse('posts:index'), {'cursor': 'не-токен'}
+        )
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), POST_NUM)
+        self.assertFalse(page_obj.has_previous())
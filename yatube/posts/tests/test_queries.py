@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..registry import groups
+from ..window import feed_window
+
+User = get_user_model()
+POSTS_FOR_TEST = 15
+
+
+class FeedQueriesTest(TestCase):
+    """Число запросов на страницу не должно зависеть от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(
+            username='queries',
+            first_name='Имя',
+            last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Запросы',
+            slug='queries',
+            description='Описание'
+        )
+        for i in range(POSTS_FOR_TEST):
+            Post.objects.create(
+                text=f'Текстик {i}',
+                author=cls.user,
+                group=cls.group
+            )
+        cls.post = Post.objects.first()
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        # Реестр групп и окно ленты прогреты: в рабочем режиме они
+        # заполняются первыми же запросами процесса.
+        groups.all()
+        feed_window.sync()
+        self.guest_client = Client()
+
+    def test_queries_per_view(self):
+        # Первый запрос каждой страницы — валидаторы для ответа 304.
+        # Главная лента целиком помещается в окно и базу не трогает.
+        pages = {
+            reverse('posts:index'): 0,
+            reverse('posts:index') + '?page=2': 0,
+            reverse(
+                'posts:group_list', kwargs={'slug': self.group.slug}
+            ): 3,
+            reverse(
+                'posts:profile', kwargs={'username': self.user.username}
+            ): 4,
+            reverse(
+                'posts:post_detail', kwargs={'post_id': self.post.pk}
+            ): 3,
+        }
+        for page, queries in pages.items():
+            with self.subTest(page=page):
+                with self.assertNumQueries(queries):
+                    self.guest_client.get(page)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..forms import PostForm
+from ..models import Group
+from ..registry import bump_version, groups
+
+
+class GroupRegistryTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='Реестр',
+            slug='registry',
+            description='Описание'
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_lookups_cost_no_queries(self):
+        groups.get_by_slug(self.group.slug)
+        groups.get_by_slug('missing')
+        with self.assertNumQueries(0):
+            self.assertEqual(groups.get_by_slug(self.group.slug), self.group)
+            self.assertIsNone(groups.get_by_slug('missing'))
+            self.assertEqual(
+                groups.get_many([self.group.pk]), {self.group.pk: self.group}
+            )
+
+    def test_form_group_from_registry(self):
+        groups.get_many([self.group.pk])
+        with self.assertNumQueries(0):
+            form = PostForm({'text': 'Текст', 'group': self.group.pk})
+            self.assertIn(self.group.title, str(form['group']))
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['group'], self.group)
+
+    def test_invalidated_on_save_and_delete(self):
+        group = Group.objects.get(pk=self.group.pk)
+        groups.get_by_slug(group.slug)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(
+            groups.get_by_slug(group.slug).title, 'Новое название'
+        )
+        group.delete()
+        self.assertIsNone(groups.get_by_slug(self.group.slug))
+
+    @override_settings(GROUP_REGISTRY_MISSING_LIMIT=2)
+    def test_missing_slugs_bounded(self):
+        for slug in ('first', 'second', 'third'):
+            groups.get_by_slug(slug)
+        with self.assertNumQueries(0):
+            groups.get_by_slug('second')
+        with self.assertNumQueries(1):
+            groups.get_by_slug('third')
+
+    def test_copies_expire_after_max_age(self):
+        groups.all()
+        with override_settings(GROUP_REGISTRY_MAX_AGE=0):
+            with self.assertNumQueries(1):
+                groups.get_by_slug(self.group.slug)
+
+    def test_load_raced_by_change_not_kept(self):
+        group = Group.objects.get(pk=self.group.pk)
+        groups.sync()
+        group.title = 'Параллельное изменение'
+        load = Group.objects.order_by
+
+        def order_by_then_change(*fields):
+            # Группа меняется, пока реестр читает базу.
+            loaded = list(load(*fields))
+            Group.objects.filter(pk=group.pk).update(title=group.title)
+            bump_version()
+            return loaded
+
+        with mock.patch.object(
+            Group.objects, 'order_by', side_effect=order_by_then_change
+        ):
+            self.assertEqual(groups.all()[0].title, 'Реестр')
+        self.assertEqual(groups.all()[0].title, 'Параллельное изменение')
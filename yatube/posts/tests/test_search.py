@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.tasks import Worker
+
+from ..models import Post
+from ..search import search_posts, stem, tokenize
+
+User = get_user_model()
+POSTS_FOR_TEST = 12
+POST_NUM = 10
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        forms = {
+            'кошка': ('кошки', 'кошкой', 'кошками'),
+            'программирование': ('программированием', 'программирования'),
+            'красивый': ('красивая', 'красивые', 'красивыми'),
+        }
+        for word, others in forms.items():
+            for other in others:
+                with self.subTest(word=other):
+                    self.assertEqual(stem(other), stem(word))
+
+    def test_tokenize_skips_stop_words(self):
+        self.assertEqual(
+            list(tokenize('Ёжик и кошка в тумане')),
+            [stem('ежик'), stem('кошка'), stem('тумане')]
+        )
+
+
+@override_settings(TASKS_ALWAYS_EAGER=True)
+class SearchViewTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='searcher')
+        cls.rare = Post.objects.create(
+            text='Кошка спит на окне', author=cls.user
+        )
+        cls.often = Post.objects.create(
+            text='Кошки, кошки и ещё раз кошки', author=cls.user
+        )
+        Post.objects.create(text='Собака лает', author=cls.user)
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query, **params):
+        response = self.guest_client.get(
+            reverse('posts:search'), {'q': query, **params}
+        )
+        return response.context['page_obj']
+
+    def test_results_ranked(self):
+        self.assertEqual(list(self.search('кошками')), [self.often, self.rare])
+        self.assertEqual(list(self.search('кошка окно')), [self.rare])
+        self.assertEqual(list(self.search('жираф')), [])
+
+    def test_index_follows_edit(self):
+        self.rare.text = 'Жираф спит'
+        self.rare.save()
+        self.assertEqual(list(self.search('жирафы')), [self.rare])
+        self.assertEqual(list(self.search('кошка')), [self.often])
+
+    def test_keyset_pages(self):
+        for i in range(POSTS_FOR_TEST):
+            Post.objects.create(text=f'Попугай номер {i}', author=self.user)
+        first = self.search('попугаи')
+        second = self.search('попугаи', cursor=first.next_cursor)
+        self.assertEqual(len(first), POST_NUM)
+        self.assertEqual(len(second), POSTS_FOR_TEST - POST_NUM)
+        self.assertFalse(set(first) & set(second))
+        back = self.search('попугаи', cursor=second.previous_cursor)
+        self.assertEqual(list(back), list(first))
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class BackgroundIndexTest(TestCase):
+    def test_post_indexed_by_worker(self):
+        user = User.objects.create(username='later')
+        client = Client()
+        client.force_login(user)
+        client.post(reverse('posts:post_create'), {'text': 'Кошка'})
+        self.assertEqual(len(search_posts('кошка', None, POST_NUM)), 0)
+        while Worker().run_once():
+            pass
+        self.assertEqual(len(search_posts('кошка', None, POST_NUM)), 1)
@@ -0,0 +1,276 @@
+import csv
+import json
+import os
+import tempfile
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Follow, Group, Post, PostTerm, TimelineEntry
+from ..search import search_posts
+from ..sharding import shard_for
+
+User = get_user_model()
+SHARDS = ('shard0', 'shard1')
+POSTS_PER_AUTHOR = 8
+POST_NUM = 10
+
+
+@override_settings(POST_SHARDS=list(SHARDS))
+class ShardedPostsTest(TransactionTestCase):
+    """Посты в двух файлах SQLite, разложенные по авторам."""
+
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        for alias in SHARDS:
+            path = os.path.join(cls.directory.name, f'{alias}.sqlite3')
+            connections.databases[alias] = {
+                'ENGINE': 'django.db.backends.sqlite3',
+                'NAME': path,
+                'TEST': {'NAME': path},
+            }
+            connections.ensure_defaults(alias)
+            connections.prepare_test_settings(alias)
+            with override_settings(POST_SHARDS=list(SHARDS)):
+                connections[alias].creation.create_test_db(
+                    verbosity=0, autoclobber=True, serialize=False
+                )
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections.databases[alias]
+            delattr(connections._connections, alias)
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.group = Group.objects.create(
+            title='Шарды', slug='shards', description='Описание'
+        )
+        self.authors = {}
+        number = 0
+        while len(self.authors) < len(SHARDS):
+            user = User.objects.create(username=f'author{number}')
+            self.authors.setdefault(shard_for(user.pk), user)
+            number += 1
+        self.started = timezone.now() - timedelta(days=1)
+        # Посты авторов чередуются по времени: лента собирается
+        # из обоих шардов вперемешку.
+        for index in range(POSTS_PER_AUTHOR * len(SHARDS)):
+            author = self.authors[SHARDS[index % len(SHARDS)]]
+            post = Post.objects.create(
+                text=f'Пост {index}', author=author, group=self.group
+            )
+            Post.objects.using(shard_for(author.pk)).filter(
+                pk=post.pk
+            ).update(pub_date=self.started + timedelta(minutes=index))
+        self.client = Client()
+        self.client.force_login(self.authors['shard0'])
+
+    def texts(self, response):
+        return [post.text for post in response.context['page_obj']]
+
+    def expected(self, numbers):
+        return [f'Пост {number}' for number in numbers]
+
+    def test_posts_stored_in_author_shard(self):
+        for alias, author in self.authors.items():
+            other = next(shard for shard in SHARDS if shard != alias)
+            self.assertEqual(
+                Post.objects.using(alias).filter(author=author).count(),
+                POSTS_PER_AUTHOR
+            )
+            self.assertFalse(
+                Post.objects.using(other).filter(author=author).exists()
+            )
+        self.assertFalse(Post.objects.using('default').exists())
+        ids = [
+            pk for alias in SHARDS
+            for pk in Post.objects.using(alias).values_list('pk', flat=True)
+        ]
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_index_merges_shards(self):
+        total = POSTS_PER_AUTHOR * len(SHARDS)
+        response = self.client.get(reverse('posts:index'))
+        first_page = self.texts(response)
+        self.assertEqual(
+            first_page,
+            self.expected(range(total - 1, total - POST_NUM - 1, -1))
+        )
+        cursor = response.context['page_obj'].next_cursor
+        response = self.client.get(reverse('posts:index'), {'cursor': cursor})
+        self.assertEqual(
+            self.texts(response),
+            self.expected(range(total - POST_NUM - 1, -1, -1))
+        )
+        cursor = response.context['page_obj'].previous_cursor
+        response = self.client.get(reverse('posts:index'), {'cursor': cursor})
+        self.assertEqual(self.texts(response), first_page)
+        response = self.client.get(reverse('posts:index'), {'page': 2})
+        self.assertEqual(
+            self.texts(response),
+            self.expected(range(total - POST_NUM - 1, -1, -1))
+        )
+
+    def test_group_merges_shards(self):
+        response = self.client.get(
+            reverse('posts:group_list', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(len(self.texts(response)), POST_NUM)
+        self.assertEqual(
+            response.context['posts_count'], POSTS_PER_AUTHOR * len(SHARDS)
+        )
+
+    def test_profile_reads_one_shard(self):
+        author = self.authors['shard1']
+        with self.assertNumQueries(0, using='shard0'):
+            response = self.client.get(
+                reverse('posts:profile', kwargs={'username': author.username})
+            )
+        self.assertEqual(
+            self.texts(response),
+            self.expected(range(POSTS_PER_AUTHOR * 2 - 1, 0, -2))
+        )
+
+    def test_author_edits_post_in_own_shard(self):
+        author = self.authors['shard0']
+        post = Post.objects.using('shard0').filter(author=author).first()
+        with self.assertNumQueries(0, using='shard1'):
+            response = self.client.post(
+                reverse('posts:post_edit', kwargs={'post_id': post.pk}),
+                {'text': 'Исправлено'}
+            )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(
+            Post.objects.using('shard0').get(pk=post.pk).text, 'Исправлено'
+        )
+
+    def test_foreign_post_not_editable(self):
+        post = Post.objects.using('shard1').first()
+        response = self.client.get(
+            reverse('posts:post_edit', kwargs={'post_id': post.pk})
+        )
+        self.assertRedirects(
+            response,
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+
+    def test_post_detail_found_in_any_shard(self):
+        post = Post.objects.using('shard1').first()
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertEqual(response.context['post'], post)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': 10 ** 6})
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def feed(self):
+        return self.texts(
+            self.client.get(reverse('posts:follow_index'))
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_follow_reads_posts_from_shards(self):
+        author = self.authors['shard1']
+        response = self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}
+        ))
+        self.assertEqual(response.status_code, HTTPStatus.FOUND)
+        total = POSTS_PER_AUTHOR * len(SHARDS)
+        self.assertEqual(
+            self.feed(), self.expected(range(total - 1, 0, -2))
+        )
+        post = Post.objects.create(text='Свежий', author=author)
+        self.assertEqual(self.feed()[0], 'Свежий')
+        post.delete()
+        self.assertFalse(
+            TimelineEntry.objects.filter(post_id=post.pk).exists()
+        )
+        self.client.get(
+            reverse('posts:group_follow', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(
+            self.feed(), self.expected(range(total - 1, total - 11, -1))
+        )
+        self.client.get(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}
+        ))
+        self.client.get(
+            reverse('posts:group_unfollow', kwargs={'slug': self.group.slug})
+        )
+        self.assertEqual(self.feed(), [])
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_search_finds_posts_in_shards(self):
+        author = self.authors['shard1']
+        post = Post.objects.create(text='Шардированный котик', author=author)
+        response = self.client.get(reverse('posts:search'), {'q': 'котик'})
+        self.assertEqual(list(response.context['page_obj']), [post])
+        post.delete()
+        self.assertFalse(PostTerm.objects.filter(post_id=post.pk).exists())
+
+    def test_group_export_merges_shards(self):
+        response = self.client.get(
+            reverse('posts:group_export', kwargs={'slug': self.group.slug})
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        total = POSTS_PER_AUTHOR * len(SHARDS)
+        self.assertEqual(
+            [row['text'] for row in rows],
+            self.expected(range(total - 1, -1, -1))
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_import_routes_rows_to_author_shards(self):
+        reader = User.objects.create(username='reader')
+        for author in self.authors.values():
+            Follow.objects.create(user=reader, author=author)
+        path = os.path.join(self.directory.name, 'import.jsonl')
+        with open(path, 'w', encoding='utf-8') as source:
+            for alias, author in self.authors.items():
+                for number in range(3):
+                    source.write(json.dumps({
+                        'text': f'Импорт {alias} {number}',
+                        'author': author.username,
+                        'group': self.group.slug,
+                    }) + '\n')
+        call_command('import_posts', path, '--batch-size=4', stdout=StringIO())
+        ids = []
+        for alias, author in self.authors.items():
+            imported = Post.objects.using(alias).filter(
+                text__startswith='Импорт'
+            )
+            self.assertEqual(
+                set(imported.values_list('author', flat=True)), {author.pk}
+            )
+            self.assertEqual(imported.count(), 3)
+            ids.extend(imported.values_list('pk', flat=True))
+        self.assertFalse(Post.objects.using('default').exists())
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertEqual(
+            {post.pk for post in search_posts('импорт', None, 10)}, set(ids)
+        )
+        self.assertEqual(
+            set(reader.timeline.values_list('post_id', flat=True)),
+            set(ids)
+        )
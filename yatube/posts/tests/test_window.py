@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+from ..registry import groups
+from ..window import feed_window
+
+User = get_user_model()
+POSTS_FOR_TEST = 25
+POST_NUM = 10
+WINDOW_SIZE = 15
+
+
+@override_settings(FEED_WINDOW_SIZE=WINDOW_SIZE)
+class FeedWindowTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(
+            username='window', first_name='Имя', last_name='Фамилия'
+        )
+        cls.group = Group.objects.create(
+            title='Окно', slug='window', description='Описание'
+        )
+        for i in range(POSTS_FOR_TEST):
+            Post.objects.create(
+                text=f'Текстик {i}', author=cls.user, group=cls.group
+            )
+        cls.expected = list(
+            Post.objects.order_by('-pub_date', '-pk').values_list(
+                'pk', flat=True
+            )
+        )
+
+    def setUp(self):
+        cache.clear()
+        caches['pages'].clear()
+        groups.all()
+        feed_window.sync()
+        self.client = Client()
+
+    def page(self, queries, **params):
+        with self.assertNumQueries(queries):
+            page_obj = self.client.get(
+                reverse('posts:index'), params
+            ).context['page_obj']
+        return page_obj
+
+    def test_pages_inside_window_cost_no_queries(self):
+        first = self.page(0)
+        self.assertEqual([post.pk for post in first], self.expected[:POST_NUM])
+        post = first[0]
+        self.assertEqual(post.author.get_full_name(), 'Имя Фамилия')
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.text, f'Текстик {POSTS_FOR_TEST - 1}')
+        # Число постов нужно только нумерованным страницам:
+        # оно считается один раз на снимок окна.
+        numbered = self.page(1, page=1)
+        self.assertEqual(list(numbered), list(first))
+        self.assertEqual(numbered.paginator.num_pages, 3)
+        self.assertEqual(feed_window.sync().total, POSTS_FOR_TEST)
+
+    def test_cursor_past_window_reads_database(self):
+        first = self.page(0)
+        second = self.page(1, cursor=first.next_cursor)
+        self.assertEqual(
+            [post.pk for post in second], self.expected[POST_NUM:POST_NUM * 2]
+        )
+        back = self.page(0, cursor=second.previous_cursor)
+        self.assertEqual([post.pk for post in back], self.expected[:POST_NUM])
+        self.assertFalse(back.has_previous())
+        third = self.page(2, page=3)
+        self.assertEqual(
+            [post.pk for post in third], self.expected[POST_NUM * 2:]
+        )
+
+    def test_window_follows_new_and_deleted_posts(self):
+        post = Post.objects.create(text='Новый пост', author=self.user)
+        self.assertEqual(self.page(2)[0], post)
+        post.delete()
+        self.assertEqual(
+            [post.pk for post in self.page(2)], self.expected[:POST_NUM]
+        )
+
+    def test_window_follows_renamed_author(self):
+        self.page(0)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Новое'
+        user.save()
+        self.assertEqual(
+            self.page(2)[0].author.get_full_name(), 'Новое Фамилия'
+        )
+
+    def test_window_reloaded_after_max_age(self):
+        snapshot = feed_window.sync()
+        self.assertIs(feed_window.sync(), snapshot)
+        with override_settings(FEED_WINDOW_MAX_AGE=0):
+            self.assertIsNot(feed_window.sync(), snapshot)
+
+    def test_whole_feed_in_window_counted_without_query(self):
+        with override_settings(FEED_WINDOW_SIZE=POSTS_FOR_TEST):
+            caches['pages'].clear()
+            self.assertTrue(feed_window.sync().complete)
+            numbered = self.page(0, page=3)
+        self.assertEqual(
+            [post.pk for post in numbered], self.expected[POST_NUM * 2:]
+        )
+        self.assertEqual(numbered.paginator.count, POSTS_FOR_TEST)
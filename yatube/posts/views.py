@@ -1,12 +1,32 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.db import transaction
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from core.parallel import gather
+from core.routers import replica_reads
+
+from .cache import cache_page_for_guests
+from .conditional import conditional_page
+from .counters import (author_posts_count, group_posts_count,
+                       post_author_posts_count)
+from .export import FORMATS, iter_posts
+from .feed import follow, timeline_page, unfollow
 from .forms import PostForm
-from .models import Group, Post, User
+from .models import Follow, Group, Post, User
+from .pagination import MergedPostList, keyset_page, merged_keyset_page
+from .registry import groups
+from .search import search_posts
+from .sharding import enabled as sharded
+from .sharding import for_author, get_post, scatter
+from .window import feed_modified, feed_window
 
 POSTS_NUM = 10
+AUTOCOMPLETE_LIMIT = 10
 POST = 1
 SYMBOLS = 30
 
@@ -14,15 +34,39 @@ User = get_user_model()
 
 
 def paginatorfunc(request, post_list):
-    paginator = Paginator(post_list, POSTS_NUM)
     page_number = request.GET.get('page')
+    # Список выборок — посты со всех шардов (sharding.scatter).
+    merged = isinstance(post_list, list)
+    if (settings.POSTS_PAGINATION == 'keyset'
+            and page_number is None):
+        page = merged_keyset_page if merged else keyset_page
+        return page(post_list, request.GET.get('cursor'), POSTS_NUM)
+    if merged:
+        post_list = MergedPostList(post_list)
+    paginator = Paginator(post_list, POSTS_NUM)
     page_obj = paginator.get_page(page_number)
+    # Страница загружается здесь, а не в шаблоне: её могут
+    # читать в потоке пула (core.parallel.gather).
+    page_obj.object_list = list(page_obj.object_list)
     return page_obj
 
 
+def is_following(user, **target):
+    return user.is_authenticated and Follow.objects.filter(
+        user=user, **target
+    ).exists()
+
+
+@cache_page_for_guests
+@replica_reads
+@conditional_page(
+    lambda: scatter(Post.objects.all()), modified=feed_modified
+)
 def index(request):
-    post_list = Post.objects.all()
-    page_obj = paginatorfunc(request, post_list)
+    # Первые страницы отдаются из окна в памяти, дальше — из базы.
+    page_obj = feed_window.page(request, POSTS_NUM)
+    if page_obj is None:
+        page_obj = paginatorfunc(request, scatter(Post.objects.for_feed()))
     context = {
         'page_obj': page_obj,
         'title': 'Последние обновления на сайте',
@@ -30,46 +74,180 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+def group_scope(slug):
+    group = groups.get_by_slug(slug)
+    if group is None:
+        return Post.objects.none()
+    return scatter(Post.objects.filter(group=group))
+
+
+def profile_scope(username):
+    posts = Post.objects.filter(author__username=username)
+    if not sharded():
+        return posts
+    author_id = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+    return for_author(posts, author_id) if author_id else posts.none()
+
+
+@cache_page_for_guests
+@replica_reads
+@conditional_page(group_scope)
 def group_posts(request, slug=None):
-    group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()[:POSTS_NUM]
-    post_list = group.posts.all()
-    page_obj = paginatorfunc(request, post_list)
-    context = {
-        'page_obj': page_obj,
-        'group': group,
-        'posts': posts,
-    }
+    group = groups.get_by_slug_or_404(slug)
+    post_list = scatter(Post.objects.for_feed().filter(group=group))
+    context = gather(
+        page_obj=lambda: paginatorfunc(request, post_list),
+        posts_count=lambda: group_posts_count(group.pk),
+        following=lambda: is_following(request.user, group=group),
+    )
+    context.update(group=group)
     return render(request, 'posts/group_list.html', context)
 
 
+@cache_page_for_guests
+@replica_reads
+@conditional_page(profile_scope)
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    post_list = Post.objects.select_related(
-        'group').filter(
-        author__username=username
+    post_list = for_author(
+        Post.objects.for_feed().filter(author=author), author.pk
     )
 
-    page_obj = paginatorfunc(request, post_list)
+    context = gather(
+        page_obj=lambda: paginatorfunc(request, post_list),
+        posts_count=lambda: author_posts_count(author.pk),
+        following=lambda: is_following(request.user, author=author),
+    )
+    context.update(author=author, post_list=post_list)
+    return render(request, 'posts/profile.html', context)
+
+
+@login_required
+def follow_index(request):
+    page_obj = timeline_page(
+        request.user, request.GET.get('cursor'), POSTS_NUM
+    )
     context = {
         'page_obj': page_obj,
-        'author': author,
-        'post_list': post_list,
+        'title': 'Посты из ваших подписок',
     }
-    return render(request, 'posts/profile.html', context)
+    return render(request, 'posts/follow.html', context)
 
 
-def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
-    post_id = Post.objects.filter(author__posts=post_id)
+@login_required
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        follow(request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def profile_unfollow(request, username):
+    author = get_object_or_404(User, username=username)
+    unfollow(request.user, author=author)
+    return redirect('posts:profile', username)
+
+
+@login_required
+def group_follow(request, slug):
+    follow(request.user, group=groups.get_by_slug_or_404(slug))
+    return redirect('posts:group_list', slug)
+
+
+@login_required
+def group_unfollow(request, slug):
+    unfollow(request.user, group=groups.get_by_slug_or_404(slug))
+    return redirect('posts:group_list', slug)
+
+
+def export_response(post_list, fmt, filename):
+    lines, content_type = FORMATS[fmt]
+    response = StreamingHttpResponse(
+        lines(iter_posts(post_list)),
+        content_type=f'{content_type}; charset=utf-8'
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    return export_response(
+        for_author(Post.objects.filter(author=author), author.pk),
+        'jsonl', f'{username}.jsonl'
+    )
+
+
+def group_export(request, slug):
+    group = groups.get_by_slug_or_404(slug)
+    return export_response(
+        scatter(Post.objects.filter(group=group)), 'csv', f'{slug}.csv'
+    )
+
+
+def prefix_range(field, prefix):
+    # Диапазон вместо LIKE: так поиск по началу строки идёт по индексу
+    # в любой базе, в том числе в SQLite.
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\uffff'})
+
+
+def group_autocomplete(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'results': []})
+    condition = prefix_range('slug', query.lower())
+    for prefix in {query, query[:1].upper() + query[1:]}:
+        condition |= prefix_range('title', prefix)
+    found = Group.objects.filter(condition).order_by('title').values(
+        'id', 'title', 'slug'
+    )[:AUTOCOMPLETE_LIMIT]
+    return JsonResponse({'results': list(found)})
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    page_obj = search_posts(query, request.GET.get('cursor'), POSTS_NUM)
     context = {
-        'post': post,
-        'post_id': post_id,
+        'page_obj': page_obj,
+        'query': query,
     }
+    return render(request, 'posts/search.html', context)
+
+
+# На странице поста выводится число постов автора,
+# поэтому она зависит от всех его постов.
+@replica_reads
+@conditional_page(
+    lambda post_id: scatter(Post.objects.filter(author__posts=post_id))
+)
+def post_detail(request, post_id):
+    if sharded():
+        # Шард поста неизвестен: id ищется во всех шардах сразу.
+        post = get_post(Post.objects.for_feed(), post_id)
+        if post is None:
+            raise Http404
+        context = {
+            'post': post,
+            'posts_count': author_posts_count(post.author_id),
+        }
+    else:
+        # Группа поста берётся из реестра, поэтому в базу нужно
+        # только за постом и счётчиком, и оба запроса идут одновременно.
+        context = gather(
+            post=lambda: get_object_or_404(
+                Post.objects.for_feed(), id=post_id
+            ),
+            posts_count=lambda: post_author_posts_count(post_id),
+        )
+    context['post_id'] = Post.objects.filter(author__posts=post_id)
     return render(request, 'posts/post_detail.html', context)
 
 
 @login_required
+@transaction.atomic
 def post_create(request):
     is_edit = False
     form = PostForm(request.POST or None)
@@ -86,10 +264,17 @@ def post_create(request):
 
 
 @login_required
+@transaction.atomic
 def post_edit(request, post_id):
     is_edit = True
-    post = get_object_or_404(Post, pk=post_id)
-    if post.author != request.user:
+    # Править можно только свои посты, поэтому искать достаточно
+    # в шарде пользователя; чужой пост ведёт на его страницу.
+    post = for_author(Post.objects.all(), request.user.pk).filter(
+        pk=post_id
+    ).first()
+    if post is None and not sharded():
+        raise Http404
+    if post is None or post.author != request.user:
         return redirect('posts:post_detail', post_id=post_id)
     form = PostForm(request.POST or None, instance=post)
     if form.is_valid():
@@ -0,0 +1,230 @@
+import time
+from heapq import merge
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Max
+
+from .cache import get_generation, page_cache
+from .conditional import last_modified, latest_change
+from .models import Post
+from .pagination import (BACKWARD, FEED_ORDER, decode_cursor, feed_key,
+                         make_keyset_page)
+from .registry import groups
+
+User = get_user_model()
+POST_FIELDS = ('id', 'text', 'pub_date', 'updated_at', 'author_id', 'group_id')
+AUTHOR_FIELDS = ('id', 'username', 'first_name', 'last_name')
+
+
+class OutsideWindow(Exception):
+    """Запрошенные посты не поместились в окно — нужна база."""
+
+
+class Snapshot:
+    """Неизменяемый снимок начала ленты.
+
+    rows — кортежи значений POST_FIELDS + AUTHOR_FIELDS[1:] в порядке
+    ленты, positions — номер строки по id поста, complete — в окно
+    попала вся лента. Снимок заменяется целиком, поэтому потоки
+    читают его без блокировок. Число постов нужно только нумерованным
+    страницам и считается при первом обращении; если два потока
+    посчитают его одновременно, оба запишут одно и то же.
+    """
+
+    __slots__ = ('version', 'loaded_at', 'rows', 'positions', 'complete',
+                 'total', 'modified')
+
+    def __init__(self, version, rows, complete, modified):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.rows = rows
+        self.positions = {row[0]: number for number, row in enumerate(rows)}
+        self.complete = complete
+        self.total = len(rows) if complete else None
+        self.modified = modified
+
+    def fresh(self, version):
+        return (self.version == version
+                and time.monotonic() - self.loaded_at
+                < settings.FEED_WINDOW_MAX_AGE)
+
+    def count(self):
+        if self.total is None:
+            self.total = sum(
+                Post.objects.using(alias).count()
+                for alias in settings.POST_SHARDS or [DEFAULT_DB_ALIAS]
+            )
+        return self.total
+
+    def covers(self, stop):
+        return stop <= len(self.rows) or self.complete
+
+
+def post_row(post):
+    author = post.author
+    return (
+        post.pk, post.text, post.pub_date, post.updated_at,
+        post.author_id, post.group_id,
+        author.username, author.first_name, author.last_name,
+    )
+
+
+def materialize(rows):
+    """Посты из строк окна: автор и группа подставлены без запросов."""
+    found = groups.get_many({row[5] for row in rows if row[5]})
+    posts = []
+    for row in rows:
+        post = Post.from_db(DEFAULT_DB_ALIAS, POST_FIELDS, row[:6])
+        author = User.from_db(DEFAULT_DB_ALIAS, AUTHOR_FIELDS, (
+            row[4], *row[6:]
+        ))
+        Post.author.field.set_cached_value(post, author)
+        if row[5] in found:
+            Post.group.field.set_cached_value(post, found[row[5]])
+        posts.append(post)
+    return posts
+
+
+class WindowPostList:
+    """Окно как список постов для Paginator.
+
+    Срез за пределами окна поднимает OutsideWindow.
+    """
+
+    ordered = True
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def count(self):
+        return self.snapshot.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        if not self.snapshot.covers(index.stop):
+            raise OutsideWindow
+        return materialize(self.snapshot.rows[index])
+
+
+def page_stop(page_number, per_page):
+    """Конец среза нумерованной страницы; 0 — если номер не разобрать."""
+    try:
+        return max(int(page_number), 1) * per_page
+    except (TypeError, ValueError):
+        return 0
+
+
+class FeedWindow:
+    """Последние FEED_WINDOW_SIZE постов ленты в памяти процесса.
+
+    Первые страницы главной ленты запрашиваются чаще всего, поэтому
+    их посты вместе с автором хранятся здесь в виде кортежей.
+    Версией окна служит поколение кэша страниц (posts.cache): сигналы
+    сохранения и удаления постов и групп его увеличивают, и каждый
+    процесс перечитывает окно при следующем обращении. Окно читается
+    из основной базы или шардов, а не с реплик: отставшая реплика
+    закрепила бы в окне старые посты до следующего изменения.
+    Окно старше FEED_WINDOW_MAX_AGE перечитывается, даже если
+    поколение не менялось.
+    """
+
+    def __init__(self):
+        self.snapshot = None
+
+    def sync(self):
+        version = get_generation(page_cache())
+        snapshot = self.snapshot
+        if snapshot is None or not snapshot.fresh(version):
+            snapshot = self.load(version)
+            self.snapshot = snapshot
+        return snapshot
+
+    def load(self, version):
+        size = settings.FEED_WINDOW_SIZE
+        shards = []
+        modified = []
+        for alias in settings.POST_SHARDS or [DEFAULT_DB_ALIAS]:
+            posts = Post.objects.using(alias)
+            # Лишний пост показывает, что лента длиннее окна:
+            # COUNT по всей таблице при каждой перезагрузке не нужен.
+            shards.append(list(
+                posts.for_feed().order_by(*FEED_ORDER)[:size + 1]
+            ))
+            modified.append(
+                posts.aggregate(latest=Max('updated_at'))['latest']
+            )
+        rows = tuple(
+            post_row(post) for post in islice(
+                merge(*shards, key=feed_key, reverse=True), size
+            )
+        )
+        complete = sum(len(posts) for posts in shards) <= size
+        modified = [value for value in modified if value is not None]
+        return Snapshot(
+            version, rows, complete, max(modified) if modified else None
+        )
+
+    def last_modified(self):
+        return latest_change([self.sync().modified])
+
+    def page(self, request, per_page):
+        """Страница ленты из окна или None, если она выходит за окно."""
+        if not settings.FEED_WINDOW_SIZE:
+            return None
+        snapshot = self.sync()
+        page_number = request.GET.get('page')
+        if (settings.POSTS_PAGINATION == 'keyset'
+                and page_number is None):
+            return self.keyset_page(
+                snapshot, request.GET.get('cursor'), per_page
+            )
+        if not snapshot.covers(page_stop(page_number, per_page)):
+            # Страница заведомо за окном: не считаем посты зря,
+            # база всё равно посчитает их сама.
+            return None
+        paginator = Paginator(WindowPostList(snapshot), per_page)
+        try:
+            return paginator.get_page(page_number)
+        except OutsideWindow:
+            return None
+
+    def keyset_page(self, snapshot, token, per_page):
+        cursor = decode_cursor(token)
+        if cursor is None:
+            start = 0
+        else:
+            direction, pub_date, pk = cursor
+            position = snapshot.positions.get(pk)
+            if (position is None
+                    or snapshot.rows[position][2] != pub_date):
+                return None
+            if direction == BACKWARD:
+                rows = snapshot.rows[max(position - per_page - 1, 0):position]
+                return make_keyset_page(
+                    materialize(rows[::-1]), cursor, per_page
+                )
+            start = position + 1
+        stop = start + per_page + 1
+        if not snapshot.covers(stop):
+            return None
+        return make_keyset_page(
+            materialize(snapshot.rows[start:stop]), cursor, per_page
+        )
+
+
+feed_window = FeedWindow()
+
+
+def feed_modified(posts):
+    """Время изменения главной ленты для conditional_page — из окна."""
+    if not settings.FEED_WINDOW_SIZE:
+        return last_modified(posts)
+    return feed_window.last_modified()
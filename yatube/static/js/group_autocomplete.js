@@ -0,0 +1,45 @@
+// Подсказки для поля группы: варианты приходят с сервера по первым
+// буквам, в форму уходит id выбранной группы. Если id не найден,
+// сервер ищет группу по тексту поля.
+function initGroupAutocomplete(input) {
+  var hidden = document.getElementById(input.dataset.target);
+  var list = document.getElementById(input.getAttribute('list'));
+  var ids = {};
+  var timer = null;
+
+  input.addEventListener('input', function () {
+    hidden.value = ids[input.value] || '';
+    clearTimeout(timer);
+    if (!input.value || hidden.value) {
+      return;
+    }
+    timer = setTimeout(function () {
+      var url = input.dataset.url + '?q=' + encodeURIComponent(input.value);
+      fetch(url).then(function (response) {
+        return response.json();
+      }).then(function (data) {
+        list.innerHTML = '';
+        ids = {};
+        data.results.forEach(function (group) {
+          var option = document.createElement('option');
+          option.value = group.title;
+          list.appendChild(option);
+          ids[group.title] = group.id;
+        });
+        hidden.value = ids[input.value] || '';
+      });
+    }, 200);
+  });
+}
+
+function initAllGroupAutocompletes() {
+  document.querySelectorAll('[data-group-autocomplete]').forEach(
+    initGroupAutocomplete
+  );
+}
+
+if (document.readyState === 'loading') {
+  document.addEventListener('DOMContentLoaded', initAllGroupAutocompletes);
+} else {
+  initAllGroupAutocompletes();
+}
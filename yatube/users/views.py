@@ -1,6 +1,7 @@
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
-from django.views.generic.base import TemplateView
+
+from core.prerender import PrerenderedTemplateView
 
 from .forms import CreationForm
 
@@ -12,5 +13,5 @@ class SignUp(CreateView):
     template_name = 'users/signup.html'
 
 
-class JustStaticPage(TemplateView):
+class JustStaticPage(PrerenderedTemplateView):
     template_name = 'app_name/just_page.html'
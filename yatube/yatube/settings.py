@@ -2,18 +2,31 @@
 
 import os
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
 
-# Quick-start development settings - unsuitable for production
-# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+# Профиль настроек задаётся переменной окружения YATUBE_PROFILE:
+# dev — разработка (по умолчанию), test — прогон тестов,
+# prod — рабочий сервер.
+PROFILES = ('dev', 'test', 'prod')
+PROFILE = os.getenv('YATUBE_PROFILE', 'dev')
+if PROFILE not in PROFILES:
+    raise ImproperlyConfigured(
+        f'YATUBE_PROFILE должен быть одним из: {", ".join(PROFILES)}'
+    )
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'vqmea20y8k7-dz2f=wp6-l4n-+c)f^k7e*1@pq53ja3vt_!uyc'
+SECRET_KEY = os.getenv('YATUBE_SECRET_KEY')
+if SECRET_KEY is None:
+    if PROFILE == 'prod':
+        raise ImproperlyConfigured('В профиле prod нужен YATUBE_SECRET_KEY')
+    SECRET_KEY = 'vqmea20y8k7-dz2f=wp6-l4n-+c)f^k7e*1@pq53ja3vt_!uyc'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = PROFILE == 'dev'
 
 ALLOWED_HOSTS = [
     'localhost',
@@ -21,12 +34,24 @@ ALLOWED_HOSTS = [
     '[::1]',
     'testserver',
 ]
+ALLOWED_HOSTS += [
+    host for host in os.getenv('YATUBE_ALLOWED_HOSTS', '').split(',') if host
+]
 
 
 # Application definition
 
+# Админка, пользователи, «об авторе» и /perf/ импортируются при первом
+# обращении (core.lazyurls): так быстрее стартует каждый воркер.
+# Модули admin.py приложений тогда ищутся тоже при первом заходе
+# в админку, поэтому подключается SimpleAdminConfig.
+LAZY_URLCONFS = os.getenv(
+    'YATUBE_LAZY_URLCONFS', '1' if PROFILE == 'prod' else '0'
+) == '1'
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig'
+    if LAZY_URLCONFS else 'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -39,23 +64,44 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ReplicaPinMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'yatube.urls'
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+# В рабочем режиме шаблоны разбираются один раз: их держит в памяти
+# кэширующий загрузчик, а точки входа wsgi и asgi компилируют шаблоны
+# проекта при старте сервера.
+TEMPLATES_CACHED = os.getenv(
+    'YATUBE_TEMPLATES_CACHED', '0' if DEBUG else '1'
+) == '1'
+# Страницы без данных (core.prerender) отдаются анонимам из памяти
+# уже отрендеренными и сжатыми.
+PRERENDER_STATIC_PAGES = os.getenv(
+    'YATUBE_PRERENDER_STATIC_PAGES', '0' if DEBUG else '1'
+) == '1'
+TEMPLATE_LOADERS = [
+    'core.template_loaders.FilesystemLoader',
+    'core.template_loaders.AppDirectoriesLoader',
+]
+if TEMPLATES_CACHED:
+    TEMPLATE_LOADERS = [
+        ('core.template_loaders.CachedLoader', TEMPLATE_LOADERS),
+    ]
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'BACKEND': 'core.template_backend.TimedDjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': TEMPLATE_LOADERS,
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -68,18 +114,174 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+# ASGI (yatube/asgi.py): соединения держит цикл событий,
+# запросы выполняются в пуле из ASGI_THREADS потоков.
+ASGI_THREADS = int(os.getenv('YATUBE_ASGI_THREADS', '8'))
+# Независимые чтения одной страницы (core.parallel.gather)
+# идут одновременно в пуле из DB_READ_THREADS потоков; 0 — по очереди.
+DB_READ_THREADS = int(os.getenv('YATUBE_DB_READ_THREADS', '8'))
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+# Постоянные соединения: в prod соединение живёт между запросами
+# и не открывается заново на каждый из них.
+CONN_MAX_AGE = int(os.getenv(
+    'YATUBE_CONN_MAX_AGE', '600' if PROFILE == 'prod' else '0'
+))
+
+if os.getenv('YATUBE_DB', 'sqlite') == 'postgres':
+    # Соединения берутся из пула процесса (core.backends.postgresql_pool)
+    # и возвращаются в него в конце запроса. Нужен пакет psycopg2.
+    DATABASES = {
+        'default': {
+            'ENGINE': 'core.backends.postgresql_pool',
+            'NAME': os.getenv('YATUBE_DB_NAME', 'yatube'),
+            'USER': os.getenv('YATUBE_DB_USER', 'yatube'),
+            'PASSWORD': os.getenv('YATUBE_DB_PASSWORD', ''),
+            'HOST': os.getenv('YATUBE_DB_HOST', 'localhost'),
+            'PORT': os.getenv('YATUBE_DB_PORT', '5432'),
+            'CONN_MAX_AGE': 0,
+            'POOL': {
+                'MIN': int(os.getenv('YATUBE_DB_POOL_MIN', '1')),
+                'MAX': int(os.getenv('YATUBE_DB_POOL_MAX', '20')),
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv(
+                'YATUBE_SQLITE_PATH', os.path.join(BASE_DIR, 'db.sqlite3')
+            ),
+            'CONN_MAX_AGE': CONN_MAX_AGE,
+            'OPTIONS': {
+                'timeout': 20,
+            },
+        }
+    }
+
+# Реплики только для чтения (core.routers): YATUBE_REPLICAS задаёт их
+# число. Для SQLite это файлы рядом с основной базой, которые
+# обновляет команда sync_replicas; для PostgreSQL — хосты из
+# YATUBE_DB_REPLICA_HOSTS. В тестах реплики смотрят в default.
+REPLICAS = int(os.getenv('YATUBE_REPLICAS', '0'))
+REPLICA_HOSTS = [
+    host for host in os.getenv('YATUBE_DB_REPLICA_HOSTS', '').split(',')
+    if host
+]
+if REPLICAS and DATABASES['default']['ENGINE'] != (
+        'django.db.backends.sqlite3') and not REPLICA_HOSTS:
+    raise ImproperlyConfigured(
+        'Для реплик PostgreSQL нужен YATUBE_DB_REPLICA_HOSTS'
+    )
+for number in range(1, REPLICAS + 1):
+    replica = dict(DATABASES['default'], TEST={'MIRROR': 'default'})
+    if replica['ENGINE'] == 'django.db.backends.sqlite3':
+        root, extension = os.path.splitext(replica['NAME'])
+        replica['NAME'] = f'{root}.replica{number}{extension}'
+    else:
+        replica['HOST'] = REPLICA_HOSTS[(number - 1) % len(REPLICA_HOSTS)]
+    DATABASES[f'replica{number}'] = replica
+DATABASE_REPLICAS = [f'replica{number}' for number in range(1, REPLICAS + 1)]
+
+# Шардирование постов (posts.sharding): YATUBE_POST_SHARDS=N раскладывает
+# посты по базам shard0..shardN-1 по хэшу автора; пользователи и группы
+# копируются во все шарды. Схема шардов создаётся командой
+# migrate --database=shardK, перенос постов — командой shard_posts.
+# Ленты подписок и поиск работают только без шардов.
+POST_SHARDS_COUNT = int(os.getenv('YATUBE_POST_SHARDS', '0'))
+for number in range(POST_SHARDS_COUNT):
+    shard = dict(DATABASES['default'])
+    if shard['ENGINE'] == 'django.db.backends.sqlite3':
+        root, extension = os.path.splitext(shard['NAME'])
+        shard['NAME'] = f'{root}.shard{number}{extension}'
+    else:
+        shard['NAME'] = f'{shard["NAME"]}_shard{number}'
+    DATABASES[f'shard{number}'] = shard
+POST_SHARDS = [f'shard{number}' for number in range(POST_SHARDS_COUNT)]
+
+DATABASE_ROUTERS = [
+    'posts.sharding.ShardRouter',
+    'core.routers.ReplicaRouter',
+]
+# Сколько секунд после записи пользователь читает с основной базы.
+REPLICA_PIN_SECONDS = 15
+
+# PRAGMA для каждого нового соединения с SQLite (core.signals).
+# WAL позволяет читать во время записи, synchronous=NORMAL в режиме WAL
+# не теряет целостность и не ждёт fsync на каждом коммите.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'mmap_size': 256 * 1024 * 1024,
+    'cache_size': -64 * 1024,
+    'temp_store': 'memory',
 }
 
+if PROFILE == 'test':
+    PASSWORD_HASHERS = [
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ]
+
+
+# Cache
+# https://docs.djangoproject.com/en/2.2/topics/cache/
+
+# Кэш должен быть общим для всех процессов: через него расходятся
+# версии страниц, реестра групп и окна ленты (posts.cache,
+# posts.registry, posts.window). YATUBE_CACHE выбирает хранилище:
+# locmem — память одного процесса, годится только для разработки
+# и тестов; file — каталог на диске; memcached — серверы из
+# YATUBE_CACHE_LOCATION через python-memcached.
+CACHE_BACKEND = os.getenv(
+    'YATUBE_CACHE', 'file' if PROFILE == 'prod' else 'locmem'
+)
+
+
+def cache_backend(name):
+    if CACHE_BACKEND == 'locmem':
+        return {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': f'yatube-{name}',
+        }
+    if CACHE_BACKEND == 'file':
+        return {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.path.join(
+                os.getenv('YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+                name
+            ),
+        }
+    if CACHE_BACKEND == 'memcached':
+        return {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': os.getenv(
+                'YATUBE_CACHE_LOCATION', '127.0.0.1:11211'
+            ).split(','),
+            'KEY_PREFIX': name,
+        }
+    raise ImproperlyConfigured(
+        'YATUBE_CACHE должен быть одним из: locmem, file, memcached'
+    )
+
+
+if PROFILE == 'prod' and CACHE_BACKEND == 'locmem':
+    raise ImproperlyConfigured(
+        'В профиле prod кэш должен быть общим для процессов: '
+        'YATUBE_CACHE=file или memcached'
+    )
+
+CACHES = {
+    'default': cache_backend('default'),
+    'pages': cache_backend('pages'),
+}
+
+POSTS_PAGE_CACHE = 'pages'
+POSTS_PAGE_CACHE_TIMEOUT = 60 * 10
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -124,5 +326,66 @@ LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 # LOGOUT_REDIRECT_URL = 'posts:index'
 
+# 'keyset' — постраничная навигация по токенам (pub_date, id),
+# 'offset' — классический Paginator с номерами страниц.
+# Ссылки вида ?page=N обслуживаются в обоих режимах.
+POSTS_PAGINATION = 'keyset'
+# Сколько последних постов главной ленты держать в памяти процесса
+# (posts.window); страницы внутри окна отдаются без запросов к базе.
+# 0 выключает окно. Окно перечитывается не реже чем раз
+# в FEED_WINDOW_MAX_AGE секунд.
+FEED_WINDOW_SIZE = int(os.getenv('YATUBE_FEED_WINDOW_SIZE', '50'))
+FEED_WINDOW_MAX_AGE = 60
+
+# Реестр групп (posts.registry): копии групп в памяти процесса
+# перечитываются не реже чем раз в GROUP_REGISTRY_MAX_AGE секунд;
+# отсутствие группы запоминается не больше чем для
+# GROUP_REGISTRY_MISSING_LIMIT адресов.
+GROUP_REGISTRY_MAX_AGE = 300
+GROUP_REGISTRY_MISSING_LIMIT = 1000
+
+# Ленты подписок: посты авторов и групп, у которых подписчиков больше
+# FEED_FANOUT_LIMIT, не раскладываются по лентам, а читаются при запросе.
+FEED_FANOUT_LIMIT = 1000
+FEED_BACKFILL_SIZE = 100
+
+# Фоновые задачи (core.tasks): очередь в таблице core_task,
+# воркеры запускаются командой run_workers. В режиме EAGER задачи
+# выполняются сразу при постановке в очередь.
+TASKS_ALWAYS_EAGER = os.getenv('YATUBE_TASKS_EAGER') == '1'
+TASKS_WORKERS = 2
+TASKS_BATCH_SIZE = 100
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_DELAY = 10
+TASKS_LOCK_TIMEOUT = 600
+
+# Замеры запросов: доля запросов, попадающих в буфер и лог,
+# размер кольцевого буфера для страницы /perf/ и заголовок Server-Timing.
+PERF_SAMPLE_RATE = float(os.getenv('YATUBE_PERF_SAMPLE_RATE', '0.1'))
+PERF_BUFFER_SIZE = 1000
+PERF_SERVER_TIMING = True
+PERF_LOG_FILE = os.getenv('YATUBE_PERF_LOG')
+
+if PERF_LOG_FILE:
+    LOGGING = {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'handlers': {
+            'perf': {
+                'class': 'logging.handlers.RotatingFileHandler',
+                'filename': PERF_LOG_FILE,
+                'maxBytes': 10 * 1024 * 1024,
+                'backupCount': 5,
+            },
+        },
+        'loggers': {
+            'yatube.perf': {
+                'handlers': ['perf'],
+                'level': 'INFO',
+                'propagate': False,
+            },
+        },
+    }
+
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
@@ -1,10 +1,14 @@
-from django.contrib import admin
 from django.urls import include, path
 
+from core.lazyurls import admin_urls, section
+
 urlpatterns = [
     path('', include('posts.urls', namespace='posts')),
-    path('auth/', include('users.urls')),
-    path('admin/', admin.site.urls),
-    path('auth/', include('django.contrib.auth.urls')),
-    path('about/', include('about.urls', namespace='about')),
+    # Остальные разделы при LAZY_URLCONFS загружаются при первом
+    # обращении, а не при старте процесса (core.lazyurls).
+    section('auth/', 'users.urls', namespace='users'),
+    section('admin/', admin_urls, namespace='admin'),
+    section('auth/', 'django.contrib.auth.urls'),
+    section('about/', 'about.urls', namespace='about'),
+    section('perf/', 'core.urls', namespace='core'),
 ]